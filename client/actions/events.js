@@ -446,6 +446,7 @@ const eventNotifications = {
     'events:updated': () => (onEventUpdated),
     'events:updated:recurring': () => (onEventUpdated),
     'events:unspiked': () => (onEventUpdated),
+    'events:unspiked:recurring': () => (onEventUpdated),
 }
 
 /**
@@ -238,6 +238,30 @@ const onRecurringEventSpiked = (e, data) => (
     }
 )
 
+const onRecurringEventUnspiked = (e, data) => (
+    (dispatch) => {
+        if (get(data, 'items')) {
+            const events = data.items.map((item) => ({
+                _id: item._id,
+                _etag: item.etag,
+                state: item.state,
+            }))
+
+            dispatch({
+                type: EVENTS.ACTIONS.UNSPIKE_RECURRING_EVENTS,
+                payload: {
+                    events: events,
+                    recurrence_id: data.recurrence_id,
+                },
+            })
+
+            return Promise.resolve(events)
+        }
+
+        return Promise.resolve([])
+    }
+)
+
 const self = {
     onEventLocked,
     onEventUnlocked,
@@ -248,6 +272,7 @@ const self = {
     onEventPostponed,
     onEventPublishChanged,
     onRecurringEventSpiked,
+    onRecurringEventUnspiked,
 }
 
 // Map of notification name and Action Event to execute
@@ -262,6 +287,7 @@ self.events = {
     'events:published': () => (self.onEventPublishChanged),
     'events:unpublished': () => (self.onEventPublishChanged),
     'events:spiked:recurring': () => (self.onRecurringEventSpiked),
+    'events:unspiked:recurring': () => (self.onRecurringEventUnspiked),
 }
 
 export default self
@@ -45,6 +45,10 @@ describe('actions.events.notifications', () => {
                 () => (Promise.resolve())
             )
 
+            sinon.stub(eventsNotifications, 'onRecurringEventUnspiked').callsFake(
+                () => (Promise.resolve())
+            )
+
             $rootScope = _$rootScope_
             registerNotifications($rootScope, store)
             $rootScope.$digest()
@@ -58,6 +62,7 @@ describe('actions.events.notifications', () => {
             restoreSinonStub(eventsNotifications.onEventRescheduled)
             restoreSinonStub(eventsNotifications.onEventPublishChanged)
             restoreSinonStub(eventsNotifications.onRecurringEventSpiked)
+            restoreSinonStub(eventsNotifications.onRecurringEventUnspiked)
         })
 
         it('`events:lock` calls onEventLocked', (done) => {
@@ -152,6 +157,22 @@ describe('actions.events.notifications', () => {
                 done()
             }, delay)
         })
+
+        it('`events:unspiked:recurring` calls onRecurringEventUnspiked', (done) => {
+            $rootScope.$broadcast('events:unspiked:recurring', {
+                items: [{ _id: 'e1', etag: 'e456', state: 'draft' }],
+                recurrence_id: 'rec1',
+            })
+
+            setTimeout(() => {
+                expect(eventsNotifications.onRecurringEventUnspiked.callCount).toBe(1)
+                expect(eventsNotifications.onRecurringEventUnspiked.args[0][1]).toEqual({
+                    items: [{ _id: 'e1', etag: 'e456', state: 'draft' }],
+                    recurrence_id: 'rec1',
+                })
+                done()
+            }, delay)
+        })
     })
 
     describe('onEventPublishChanged', () => {
@@ -410,4 +431,23 @@ describe('actions.events.notifications', () => {
             done()
         })
     })
+
+    it('onRecurringEventUnspiked dispatches `UNSPIKE_RECURRING_EVENTS` action', (done) => {
+        restoreSinonStub(eventsNotifications.onRecurringEventUnspiked)
+        store.test(done, eventsNotifications.onRecurringEventUnspiked({}, {
+            items: [{ _id: 'e1', etag: 'e456', state: 'draft' }],
+            recurrence_id: 'rec1',
+        }))
+        .then(() => {
+            expect(store.dispatch.args[0]).toEqual([{
+                type: 'UNSPIKE_RECURRING_EVENTS',
+                payload: {
+                    events: [{ _id: 'e1', _etag: 'e456', state: 'draft' }],
+                    recurrence_id: 'rec1',
+                },
+            }])
+
+            done()
+        })
+    })
 })
@@ -3,6 +3,7 @@ export const EVENTS = {
         SPIKE_EVENT: 'SPIKE_EVENT',
         SPIKE_RECURRING_EVENTS: 'SPIKE_RECURRING_EVENTS',
         UNSPIKE_EVENT: 'UNSPIKE_EVENT',
+        UNSPIKE_RECURRING_EVENTS: 'UNSPIKE_RECURRING_EVENTS',
         REQUEST_EVENTS: 'REQUEST_EVENTS',
         SET_EVENTS_LIST: 'SET_EVENTS_LIST',
         ADD_TO_EVENTS_LIST: 'ADD_TO_EVENTS_LIST',
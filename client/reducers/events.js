@@ -351,6 +351,17 @@ Event Postponed
         return newState
     },
 
+    [EVENTS.ACTIONS.UNSPIKE_RECURRING_EVENTS]: (state, payload) => {
+        let newState = cloneDeep(state)
+        payload.events.forEach((event) => {
+            if (get(event, '_id') in state.events) {
+                unspikeEvent(newState, event)
+            }
+        })
+
+        return newState
+    },
+
     [EVENTS.ACTIONS.MARK_EVENT_PUBLISHED]: (state, payload) => (
         onEventPublishChanged(state, payload)
     ),
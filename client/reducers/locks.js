@@ -117,6 +117,11 @@ export default createReducer(initialLockState, {
         removeLock(payload.event, cloneDeep(state), 'events')
     ),
 
+    [EVENTS.ACTIONS.UNSPIKE_RECURRING_EVENTS]: (state, payload) => (
+        // Same as SPIKE_RECURRING_EVENTS, removeLock checks the recurrence_id first
+        removeLock(payload, cloneDeep(state), 'events')
+    ),
+
     [PLANNING.ACTIONS.SPIKE_PLANNING]: (state, payload) => (
         removeLock(payload.plan, cloneDeep(state), 'planning')
     ),
@@ -441,5 +441,44 @@ describe('events', () => {
                 e3: items.e3,
             })
         })
+
+        it('UNSPIKE_RECURRING_EVENTS', () => {
+            const result = events(
+                {
+                    ...initialState,
+                    events: {
+                        ...items,
+                        e2: {
+                            ...items.e2,
+                            state: 'spiked',
+                            revert_state: 'draft',
+                        },
+                    },
+                },
+                {
+                    type: 'UNSPIKE_RECURRING_EVENTS',
+                    payload: {
+                        events: [{
+                            _id: 'e2',
+                            _etag: 'e456',
+                            state: 'draft',
+                        }, {
+                            _id: 'e4',
+                            _etag: 'e456',
+                            state: 'draft',
+                        }],
+                    },
+                }
+            )
+            expect(result.events).toEqual({
+                e1: items.e1,
+                e2: {
+                    ...items.e2,
+                    _etag: 'e456',
+                    state: 'draft',
+                },
+                e3: items.e3,
+            })
+        })
     })
 })
@@ -1,6 +1,6 @@
 import { WS_NOTIFICATION } from '../constants'
 import * as actions from '../actions'
-import { forEach } from 'lodash'
+import { forEach, get } from 'lodash'
 
 /**
  * Registers WebSocket Notifications to Redux Actions
@@ -10,14 +10,19 @@ import { forEach } from 'lodash'
 export const registerNotifications = ($scope, store) => {
     forEach(actions.notifications, (func, event) => {
         $scope.$on(event, (_e, data) => {
-            store.dispatch({
-                type: WS_NOTIFICATION,
-                payload: {
-                    event,
-                    data,
-                },
+            // Notifications coalesced by the server are handled one by one
+            const batch = get(data, 'batch') || [data]
+
+            forEach(batch, (entry) => {
+                store.dispatch({
+                    type: WS_NOTIFICATION,
+                    payload: {
+                        event,
+                        data: entry,
+                    },
+                })
+                store.dispatch(func()(_e, entry))
             })
-            store.dispatch(func()(_e, data))
         })
     })
 }
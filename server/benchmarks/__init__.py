@@ -0,0 +1,27 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Benchmarks of the planning hot paths
+
+The benchmarks run through the API against the test mongo and elastic databases
+(the same ones used by the behave tests, which are dropped). Every benchmark reports
+its latency percentiles, the number of database queries made by the planning services
+and the peak memory used, as JSON::
+
+    $ python -m benchmarks --output results.json
+    $ python -m benchmarks --baseline results.json --only planning_patch
+
+With ``--baseline`` the results are compared with a previous run, and the command
+fails if a benchmark got slower (or made more queries, or used more memory) than the
+allowed ``--tolerance``.
+
+The ``planning_import`` and ``app_startup`` benchmarks time new processes, and
+``python -m benchmarks.startup`` profiles where their time goes.
+"""
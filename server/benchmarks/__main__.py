@@ -0,0 +1,62 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Run the planning benchmarks, see ``benchmarks/__init__.py``"""
+
+import sys
+import argparse
+from flask import json
+from settings import INSTALLED_APPS
+from .runner import BENCHMARKS, run_benchmarks, compare
+from . import cases  # noqa
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Run the planning benchmarks')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS.keys()), help='benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs per benchmark')
+    parser.add_argument('--output', help='file to write the results to, printed if not provided')
+    parser.add_argument('--baseline', help='results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed latency and memory growth compared to the baseline (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    config = {
+        'INSTALLED_APPS': INSTALLED_APPS,
+        'ELASTICSEARCH_FORCE_REFRESH': True,
+        'MAX_RECURRENT_EVENTS': 1000
+    }
+    results = run_benchmarks(config, names=args.only, repeat=args.repeat)
+
+    regressions = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            results['comparison'] = compare(results, json.load(baseline_file), args.tolerance)
+        regressions = {
+            name: comparison['regressions']
+            for name, comparison in results['comparison'].items()
+            if comparison['regressions']
+        }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            output_file.write(output)
+    else:
+        print(output)
+
+    for name, regressed in sorted(regressions.items()):
+        sys.stderr.write('{} regressed: {}\n'.format(name, ', '.join(regressed)))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""The planning hot path benchmarks"""
+
+import os
+import sys
+import subprocess
+from datetime import timedelta
+from threading import Thread
+from superdesk.utc import utcnow
+from .runner import benchmark
+
+SERIES_SIZE = 50
+LIST_SIZE = 100
+EXPORT_SIZE = 500
+LOCK_THREADS = 8
+LOCK_ROUNDS = 5
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get_dates(days=1, count=None):
+    start = (utcnow() + timedelta(days=days)).replace(microsecond=0)
+    dates = {
+        'start': start.isoformat(),
+        'end': (start + timedelta(hours=2)).isoformat(),
+        'tz': 'Australia/Sydney'
+    }
+    if count:
+        dates['recurring_rule'] = {
+            'frequency': 'DAILY',
+            'interval': 1,
+            'count': count,
+            'endRepeatMode': 'count'
+        }
+    return dates
+
+
+def create_series(context, count, with_plannings=False):
+    """Create a recurring series of ``count`` events, with a planning item per event"""
+    events = context.post('/events', [{'name': 'Benchmark series', 'dates': get_dates(count=count)}])['_items']
+    if with_plannings:
+        context.post('/planning', [
+            {'slugline': 'Benchmark {}'.format(index), 'event_item': event['_id']}
+            for index, event in enumerate(events)
+        ])
+    return events
+
+
+def get_coverages(count, desk=None, user=None, slugline='Benchmark coverage'):
+    coverages = []
+    for index in range(count):
+        coverage = {
+            'planning': {
+                'g2_content_type': 'text',
+                'slugline': '{} {}'.format(slugline, index),
+                'ednote': 'Benchmark coverage'
+            },
+            'news_coverage_status': {'qcode': 'ncostat:int'}
+        }
+        if desk:
+            coverage['assigned_to'] = {'desk': desk, 'user': user}
+        coverages.append(coverage)
+    return coverages
+
+
+def create_desk(context):
+    return context.post('/desks', {'name': 'Benchmark {}'.format(utcnow().timestamp())})
+
+
+def lock(context, resource, item, action='edit', client=None):
+    return context.post('/{}/{}/lock'.format(resource, item['_id']), {'lock_action': action}, client=client)
+
+
+def unlock(context, resource, item, client=None):
+    return context.post('/{}/{}/unlock'.format(resource, item['_id']), {}, client=client)
+
+
+def register_recurring_create(count):
+    @benchmark('events_create_recurring_{}'.format(count))
+    def events_create_recurring(context, state):
+        create_series(context, count)
+
+
+for _count in (10, 200, 1000):
+    register_recurring_create(_count)
+
+
+def setup_series_action(action):
+    def setup(context):
+        events = create_series(context, SERIES_SIZE, with_plannings=True)
+        return lock(context, 'events', events[SERIES_SIZE // 2], action)
+    return setup
+
+
+@benchmark('events_reschedule_series', setup=setup_series_action('reschedule'))
+def events_reschedule_series(context, event):
+    dates = get_dates(days=2, count=SERIES_SIZE)
+    context.patch('/events/reschedule/{}'.format(event['_id']), {
+        'update_method': 'all',
+        'reason': 'Benchmark',
+        'dates': dates
+    }, event['_etag'])
+
+
+@benchmark('events_cancel_series', setup=setup_series_action('cancel'))
+def events_cancel_series(context, event):
+    context.patch('/events/cancel/{}'.format(event['_id']), {
+        'update_method': 'all',
+        'reason': 'Benchmark'
+    }, event['_etag'])
+
+
+def register_planning_patch(count):
+    def setup(context):
+        return context.post('/planning', {'slugline': 'Benchmark', 'coverages': get_coverages(count)})
+
+    @benchmark('planning_patch_{}_coverages'.format(count), setup=setup)
+    def planning_patch(context, plan):
+        coverages = plan['coverages']
+        for coverage in coverages:
+            coverage['planning']['slugline'] += ' updated'
+        context.patch('/planning/{}'.format(plan['_id']), {'coverages': coverages}, plan['_etag'])
+
+
+for _count in (5, 50, 200):
+    register_planning_patch(_count)
+
+
+def setup_planning_list(context):
+    if context.get('/planning?max_results=1')['_meta']['total'] >= LIST_SIZE:
+        return
+
+    desk = create_desk(context)
+    user = str(context.user['_id'])
+    context.post('/planning', [
+        {'slugline': 'Benchmark {}'.format(index), 'coverages': get_coverages(2, desk['_id'], user)}
+        for index in range(LIST_SIZE)
+    ])
+
+
+@benchmark('planning_list_with_assignments', setup=setup_planning_list)
+def planning_list_with_assignments(context, state):
+    context.get('/planning?max_results={}'.format(LIST_SIZE))
+
+
+def setup_lock_concurrency(context):
+    return context.post('/planning', [
+        {'slugline': 'Benchmark lock {}'.format(index)} for index in range(LOCK_THREADS)
+    ])['_items']
+
+
+@benchmark('planning_lock_unlock_concurrent', setup=setup_lock_concurrency)
+def planning_lock_unlock_concurrent(context, plans):
+    errors = []
+
+    def lock_unlock(plan):
+        client = context.app.test_client()
+        try:
+            for _round in range(LOCK_ROUNDS):
+                lock(context, 'planning', plan, client=client)
+                unlock(context, 'planning', plan, client=client)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [Thread(target=lock_unlock, args=(plan,)) for plan in plans]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def setup_planning_export(context):
+    template = context.post('/content_templates', {
+        'template_name': 'Benchmark export {}'.format(utcnow().timestamp()),
+        'template_type': 'planning_export',
+        'data': {'slugline': 'Benchmark'}
+    })
+    desk = context.post('/desks', {
+        'name': 'Benchmark export {}'.format(utcnow().timestamp()),
+        'default_content_template': template['_id']
+    })
+    plans = context.post('/planning', [
+        {'slugline': 'Benchmark export {}'.format(index), 'coverages': get_coverages(2)}
+        for index in range(EXPORT_SIZE)
+    ])['_items']
+    return {'desk': desk['_id'], 'items': [plan['_id'] for plan in plans]}
+
+
+@benchmark('planning_export_{}'.format(EXPORT_SIZE), setup=setup_planning_export, repeat=3)
+def planning_export(context, export):
+    context.post('/planning_export', export)
+
+
+def run_python(*args):
+    subprocess.check_call((sys.executable,) + args, cwd=SERVER_DIR, stdout=subprocess.DEVNULL)
+
+
+@benchmark('planning_import', repeat=5)
+def planning_import(context, state):
+    """Start of a new interpreter importing planning, like a manage.py command"""
+    run_python('-c', 'import planning')
+
+
+@benchmark('app_startup', repeat=3)
+def app_startup(context, state):
+    """Start of a new interpreter creating the app, like a celery worker
+
+    ``python -m benchmarks.startup`` reports where the time goes.
+    """
+    run_python('-c', 'from app import get_app; get_app()')
@@ -0,0 +1,193 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Benchmark registry, runner and comparison with a baseline"""
+
+import math
+import time
+import platform
+import tracemalloc
+from collections import OrderedDict, namedtuple
+from flask import json
+from superdesk.tests import setup as setup_app, setup_auth_user, clean_dbs, get_prefixed_url
+from planning.query_stats import start_query_recording, stop_query_recording
+from app import get_app
+
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run', 'repeat'])
+
+BENCHMARKS = OrderedDict()
+
+PERCENTILES = (50, 90, 99)
+
+
+def benchmark(name, setup=None, repeat=None):
+    """Register the decorated function as the benchmark ``name``
+
+    :param str name: name of the benchmark
+    :param setup: function preparing the data of every run (not timed), its result is passed to the benchmark
+    :param int repeat: number of runs, defaults to the ``--repeat`` option
+    """
+    def decorator(fn):
+        BENCHMARKS[name] = Benchmark(name, setup, fn, repeat)
+        return fn
+    return decorator
+
+
+def percentile(values, percent):
+    """Nearest rank percentile of the values"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class BenchmarkContext:
+    """App and authenticated test client the benchmarks run with
+
+    Uses the same setup as the behave tests, so the test databases are used.
+    """
+
+    def __init__(self, config):
+        self.headers = []
+        self.user = None
+        setup_app(self, config=config, app_factory=get_app)
+        self.app.config['PLANNING_QUERY_STATS'] = True
+
+    def reset(self):
+        """Drop the test databases and log in again"""
+        clean_dbs(self.app, force=True)
+        self.headers = [('Content-Type', 'application/json')]
+        setup_auth_user(self)
+
+    def url(self, endpoint):
+        return get_prefixed_url(self.app, endpoint)
+
+    def _check(self, response, method, endpoint):
+        if response.status_code >= 400:
+            raise AssertionError('{} {} failed with {}: {}'.format(
+                method, endpoint, response.status_code, response.get_data(as_text=True)
+            ))
+        data = response.get_data(as_text=True)
+        return json.loads(data) if data else None
+
+    def get(self, endpoint, client=None):
+        response = (client or self.client).get(self.url(endpoint), headers=self.headers)
+        return self._check(response, 'GET', endpoint)
+
+    def post(self, endpoint, data, client=None):
+        response = (client or self.client).post(self.url(endpoint), data=json.dumps(data), headers=self.headers)
+        return self._check(response, 'POST', endpoint)
+
+    def patch(self, endpoint, data, etag, client=None):
+        headers = self.headers + [('If-Match', etag)]
+        response = (client or self.client).patch(self.url(endpoint), data=json.dumps(data), headers=headers)
+        return self._check(response, 'PATCH', endpoint)
+
+
+def run_benchmark(context, bench, repeat):
+    """Run the benchmark ``repeat`` times, plus once more to measure its queries and memory
+
+    The memory is traced in a separate run, as tracing slows down the code.
+    """
+    context.reset()
+    timings = []
+    for _run in range(bench.repeat or repeat):
+        state = bench.setup(context) if bench.setup else None
+        start = time.perf_counter()
+        bench.run(context, state)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    state = bench.setup(context) if bench.setup else None
+    start_query_recording(context.app)
+    tracemalloc.start()
+    try:
+        bench.run(context, state)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        queries = stop_query_recording(context.app)
+
+    latency = OrderedDict([('min', min(timings))])
+    for percent in PERCENTILES:
+        latency['p{}'.format(percent)] = percentile(timings, percent)
+    latency['max'] = max(timings)
+    latency['mean'] = sum(timings) / len(timings)
+
+    return OrderedDict([
+        ('runs', len(timings)),
+        ('latency_ms', OrderedDict((key, round(value, 3)) for key, value in latency.items())),
+        ('queries', queries.total),
+        ('query_breakdown', OrderedDict(
+            ('{} {}.{}'.format(kind, resource, operation), count)
+            for (kind, resource, operation), count in queries.queries.most_common()
+        )),
+        ('peak_memory_kb', round(peak_memory / 1024.0, 1))
+    ])
+
+
+def run_benchmarks(config, names=None, repeat=5):
+    """Run the benchmarks (or only the ones in ``names``)
+
+    :return dict: results of the run
+    """
+    context = BenchmarkContext(config)
+    results = OrderedDict()
+    for name, bench in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        results[name] = run_benchmark(context, bench, repeat)
+
+    return OrderedDict([
+        ('meta', OrderedDict([
+            ('date', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('python', platform.python_version()),
+            ('repeat', repeat)
+        ])),
+        ('benchmarks', results)
+    ])
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Compare the results of a run with a baseline run
+
+    A benchmark regressed if its median latency or peak memory grew more than ``tolerance``
+    (0.2 = 20%), or if it made more queries.
+
+    :return dict: comparison by benchmark name, with a ``regressions`` list per benchmark
+    """
+    comparison = OrderedDict()
+    for name, result in results['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if not base:
+            continue
+
+        ratios = OrderedDict([
+            ('latency_p50', _ratio(result['latency_ms']['p50'], base['latency_ms']['p50'])),
+            ('peak_memory', _ratio(result['peak_memory_kb'], base['peak_memory_kb'])),
+        ])
+        regressions = [key for key, ratio in ratios.items() if ratio is not None and ratio > 1 + tolerance]
+        if result['queries'] > base['queries']:
+            regressions.append('queries')
+
+        comparison[name] = OrderedDict([
+            ('latency_p50', ratios['latency_p50']),
+            ('peak_memory', ratios['peak_memory']),
+            ('queries', result['queries'] - base['queries']),
+            ('regressions', regressions)
+        ])
+
+    return comparison
+
+
+def _ratio(value, base):
+    if not base:
+        return None
+    return round(value / float(base), 3)
@@ -0,0 +1,25 @@
+from unittest import TestCase
+from benchmarks.runner import percentile, compare
+
+
+def get_results(p50, queries, memory):
+    return {'benchmarks': {'bench': {'latency_ms': {'p50': p50}, 'queries': queries, 'peak_memory_kb': memory}}}
+
+
+class BenchmarkRunnerTestCase(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 50), 5)
+        self.assertEqual(percentile(values, 90), 9)
+        self.assertEqual(percentile(values, 99), 10)
+        self.assertEqual(percentile([3], 50), 3)
+        self.assertIsNone(percentile([], 50))
+
+    def test_compare_with_baseline(self):
+        baseline = get_results(100, 10, 1000)
+        self.assertEqual(compare(get_results(110, 10, 1000), baseline)['bench']['regressions'], [])
+        self.assertEqual(compare(get_results(130, 12, 1300), baseline)['bench'], {
+            'latency_p50': 1.3, 'peak_memory': 1.3, 'queries': 2,
+            'regressions': ['latency_p50', 'peak_memory', 'queries']
+        })
+        self.assertEqual(compare(get_results(100, 10, 1000), {'benchmarks': {}}), {})
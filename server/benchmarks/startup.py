@@ -0,0 +1,115 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Profile the import of planning and the start up of the app
+
+Must run in a new interpreter, so that nothing is imported yet::
+
+    $ python -m benchmarks.startup
+    $ python -m benchmarks.startup --top 30
+
+Reports the time spent importing ``planning`` and the modules that took the longest to
+import, the time spent creating the app and the planning functions that took the longest,
+and the deferred modules which were imported anyway.
+"""
+
+import sys
+import time
+import argparse
+import cProfile
+import pstats
+from collections import OrderedDict
+from flask import json
+
+# modules planning only imports once they are used
+DEFERRED_MODULES = (
+    'icalendar',
+    'deepdiff',
+    'dateutil.rrule',
+    'planning.feed_parsers.ics_2_0',
+    'planning.feed_parsers.ntb_event_xml',
+    'planning.feeding_services.event_file_service',
+    'planning.feeding_services.event_http_service',
+    'planning.feeding_services.event_email_service',
+)
+
+
+def profile(fn):
+    """Call ``fn`` with the profiler enabled
+
+    :return tuple: duration in ms and the profile stats
+    """
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        fn()
+    finally:
+        profiler.disable()
+    return (time.perf_counter() - start) * 1000, pstats.Stats(profiler)
+
+
+def get_slowest(stats, top, match):
+    """Return the ``top`` entries of the stats matched by ``match(filename, name)``, by cumulative time"""
+    entries = [
+        (filename, line, name, cumulative)
+        for (filename, line, name), (_calls, _primitive, _total, cumulative, _callers) in stats.stats.items()
+        if match(filename, name)
+    ]
+    entries.sort(key=lambda entry: entry[3], reverse=True)
+    return OrderedDict(
+        ('{}:{}({})'.format(filename, line, name), round(cumulative * 1000, 3))
+        for filename, line, name, cumulative in entries[:top]
+    )
+
+
+def profile_startup(top=20):
+    """Import planning and create the app, reporting where the time went
+
+    :param int top: number of modules and functions to report
+    :return dict: report
+    """
+    def import_planning():
+        import planning  # noqa
+
+    import_ms, import_stats = profile(import_planning)
+
+    def create_app():
+        from app import get_app
+        get_app()
+
+    init_ms, init_stats = profile(create_app)
+
+    return OrderedDict([
+        ('import_ms', round(import_ms, 3)),
+        ('init_ms', round(init_ms, 3)),
+        ('slowest_imports_ms', get_slowest(import_stats, top, lambda filename, name: name == '<module>')),
+        ('slowest_init_ms', get_slowest(
+            init_stats, top, lambda filename, name: '/planning/' in filename and name != '<module>'
+        )),
+        ('deferred_modules_imported', [name for name in DEFERRED_MODULES if name in sys.modules])
+    ])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.startup',
+                                     description='Profile the import of planning and the start up of the app')
+    parser.add_argument('--top', type=int, default=20, help='number of modules and functions to report')
+    args = parser.parse_args(argv)
+
+    if 'planning' in sys.modules:
+        parser.error('planning is already imported')
+
+    print(json.dumps(profile_startup(args.top), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
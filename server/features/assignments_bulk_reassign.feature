@@ -0,0 +1,139 @@
+Feature: Assignments Bulk Reassign
+    Background: Initial setup
+        Given "desks"
+        """
+        [{"name": "Sports", "content_expiry": 60}, {"name": "Politics", "content_expiry": 60}]
+        """
+
+    @auth
+    @notification
+    Scenario: Reassign many assignments to another desk and user
+        When we post to "/planning"
+        """
+        [{
+            "item_class": "item class value",
+            "slugline": "test slugline"
+        }]
+        """
+        Then we get OK response
+        When we patch "/planning/#planning._id#"
+        """
+        {
+            "coverages": [
+                {
+                    "planning": {"slugline": "first coverage"},
+                    "assigned_to": {"desk": "#desks._id#", "user": "507f191e810c19729de870eb"}
+                },
+                {
+                    "planning": {"slugline": "second coverage"},
+                    "assigned_to": {"desk": "#desks._id#"}
+                }
+            ]
+        }
+        """
+        Then we get OK response
+        Then we store assignment id in "firstassignment" from coverage 0
+        Then we store assignment id in "secondassignment" from coverage 1
+        When we reset notifications
+        When we post to "/assignments/bulk_reassign"
+        """
+        [{
+            "assignment_ids": ["#firstassignment#", "#secondassignment#"],
+            "assigned_to": {"desk": "Politics Desk", "user": "#CONTEXT_USER_ID#"}
+        }]
+        """
+        Then we get OK response
+        When we get "/assignments/#firstassignment#"
+        Then we get existing resource
+        """
+        {
+            "assigned_to": {"desk": "Politics Desk", "user": "#CONTEXT_USER_ID#", "state": "assigned"}
+        }
+        """
+        When we get "/assignments/#secondassignment#"
+        Then we get existing resource
+        """
+        {
+            "assigned_to": {"desk": "Politics Desk", "user": "#CONTEXT_USER_ID#", "state": "assigned"}
+        }
+        """
+        And we get notifications
+        """
+        [
+            {"event": "assignments:updated", "extra": {"item": "#firstassignment#"}},
+            {"event": "assignments:updated", "extra": {"item": "#secondassignment#"}},
+            {
+                "event": "activity",
+                "extra": {
+                    "activity": {
+                        "message": "{{assignor}} assigned {{count}} coverage(s) to {{assignee}}"
+                    }
+                }
+            }
+        ]
+        """
+
+    @auth
+    @vocabularies
+    Scenario: Desk reassignment fails for the whole batch if one assignment is in progress
+        When we post to "/archive"
+        """
+        [{
+            "type": "text",
+            "headline": "test headline",
+            "slugline": "test slugline",
+            "task": {
+                "desk": "#desks._id#",
+                "stage": "#desks.incoming_stage#"
+            }
+        }]
+        """
+        When we post to "/planning"
+        """
+        [{
+            "item_class": "item class value",
+            "slugline": "test slugline"
+        }]
+        """
+        Then we get OK response
+        When we patch "/planning/#planning._id#"
+        """
+        {
+            "coverages": [
+                {
+                    "planning": {"slugline": "first coverage"},
+                    "assigned_to": {"desk": "#desks._id#", "user": "#CONTEXT_USER_ID#"}
+                },
+                {
+                    "planning": {"slugline": "second coverage"},
+                    "assigned_to": {"desk": "#desks._id#", "user": "#CONTEXT_USER_ID#"}
+                }
+            ]
+        }
+        """
+        Then we get OK response
+        Then we store assignment id in "firstassignment" from coverage 0
+        Then we store assignment id in "secondassignment" from coverage 1
+        When we post to "assignments/link"
+        """
+        [{
+            "assignment_id": "#firstassignment#",
+            "item_id": "#archive._id#"
+        }]
+        """
+        Then we get OK response
+        When we post to "/assignments/bulk_reassign"
+        """
+        [{
+            "assignment_ids": ["#firstassignment#", "#secondassignment#"],
+            "assigned_to": {"desk": "Politics Desk"}
+        }]
+        """
+        Then we get error 403
+        When we get "/assignments/#secondassignment#"
+        Then we get existing resource
+        """
+        {
+            "assigned_to": {"desk": "#desks._id#", "user": "#CONTEXT_USER_ID#", "state": "assigned"}
+        }
+        """
@@ -185,4 +185,21 @@ Feature: Assignment content
         Then we get error 400
         """
         {"_status": "ERR", "_message": "Assignment workflow started. Cannot create content."}
-        """
\ No newline at end of file
+        """
+
+    @auth
+    @vocabularies
+    Scenario: Content creation fails if the assignment is repeated in the request
+        When we post to "/assignments/content"
+        """
+        [{"assignment_id": "#firstassignment#"}, {"assignment_id": "#firstassignment#"}]
+        """
+        Then we get error 400
+        """
+        {"_status": "ERR", "_message": "Content already exists for the assignment. Cannot create content."}
+        """
+        When we get "/assignments/#firstassignment#"
+        Then we get existing resource
+        """
+        {"assigned_to": {"desk": "#desks._id#", "state": "assigned"}}
+        """
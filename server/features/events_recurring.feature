@@ -753,6 +753,60 @@ Feature: Events Recurring
         ]}
         """
 
+    @auth
+    Scenario: Unspike all events from recurring series
+        When we post to "events"
+        """
+        [{
+            "name": "Friday Club",
+            "dates": {
+                "start": "2099-11-21T12:00:00.000Z",
+                "end": "2099-11-21T14:00:00.000Z",
+                "tz": "Australia/Sydney",
+                "recurring_rule": {
+                    "frequency": "DAILY",
+                    "interval": 1,
+                    "count": 4,
+                    "endRepeatMode": "count"
+                }
+            }
+        }]
+        """
+        Then we get OK response
+        Then we store "EVENT1" with first item
+        Then we store "EVENT2" with 2 item
+        Then we store "EVENT3" with 3 item
+        Then we store "EVENT4" with 4 item
+        When we spike events "#EVENT2._id#"
+        """
+        { "update_method": "all" }
+        """
+        Then we get OK response
+        When we unspike events "#EVENT2._id#"
+        """
+        { "update_method": "all" }
+        """
+        Then we get OK response
+        When we get "/events"
+        Then we get list with 4 items
+        """
+        {"_items": [
+            { "_id": "#EVENT1._id#", "state": "draft", "revert_state": null },
+            { "_id": "#EVENT2._id#", "state": "draft", "revert_state": null },
+            { "_id": "#EVENT3._id#", "state": "draft", "revert_state": null },
+            { "_id": "#EVENT4._id#", "state": "draft", "revert_state": null }
+        ]}
+        """
+        When we get "/events_history?where={"event_id": "#EVENT3._id#"}"
+        Then we get list with 3 items
+        """
+        {"_items": [
+            {"operation": "create", "event_id": "#EVENT3._id#"},
+            {"operation": "spiked", "event_id": "#EVENT3._id#", "update": {"state": "spiked"}},
+            {"operation": "unspiked", "event_id": "#EVENT3._id#", "update": {"state": "draft"}}
+        ]}
+        """
+
     @auth
     Scenario: Spike all recurring doesnt spike historic events
         When we post to "events"
@@ -345,6 +345,93 @@ Feature: Events Spike
         """
         Then we get OK response
 
+    @auth
+    @notification
+    Scenario: Unspiking a series fails if a Planning item in the series is locked
+        When we post to "events"
+        """
+        [{
+            "name": "Friday Club",
+            "dates": {
+                "start": "2099-11-21T12:00:00.000Z",
+                "end": "2099-11-21T14:00:00.000Z",
+                "tz": "Australia/Sydney",
+                "recurring_rule": {
+                    "frequency": "WEEKLY",
+                    "interval": 1,
+                    "byday": "FR",
+                    "count": 3,
+                    "endRepeatMode": "count"
+                }
+            }
+        }]
+        """
+        Then we get OK response
+        And we store "EVENT1" with first item
+        And we store "EVENT2" with 2 item
+        And we store "EVENT3" with 3 item
+        When we post to "/planning"
+        """
+        [{
+            "slugline": "Friday Club",
+            "headline": "First Meeting",
+            "event_item": "#EVENT2._id#"
+        }]
+        """
+        Then we get OK response
+        When we spike events "#EVENT1._id#"
+        """
+        {"update_method": "all"}
+        """
+        Then we get OK response
+        When we post to "/planning/#planning._id#/lock"
+        """
+        {"lock_action": "edit"}
+        """
+        When we unspike events "#EVENT1._id#"
+        """
+        {"update_method": "all"}
+        """
+        Then we get error 400
+        """
+        {
+            "_issues": {
+                "validator exception": "403: Unspike failed. A related planning item is locked."
+            }
+        }
+        """
+        When we get "/events/#EVENT3._id#"
+        Then we get existing resource
+        """
+        {"_id": "#EVENT3._id#", "state": "spiked"}
+        """
+        When we post to "/planning/#planning._id#/unlock"
+        """
+        {}
+        """
+        Then we get OK response
+        When we unspike events "#EVENT1._id#"
+        """
+        {"update_method": "all"}
+        """
+        Then we get OK response
+        And we get notifications
+        """
+        [{
+            "event": "events:unspiked:recurring",
+            "extra": {
+                "item": "#EVENT1._id#",
+                "recurrence_id": "#EVENT1.recurrence_id#",
+                "user": "#CONTEXT_USER_ID#"
+            }
+        }]
+        """
+        When we get "/events/#EVENT3._id#"
+        Then we get existing resource
+        """
+        {"_id": "#EVENT3._id#", "state": "draft"}
+        """
+
     @auth
     Scenario: Spiking a series of Events only spiked Events not in use
         When we post to "events"
@@ -411,4 +498,11 @@ Feature: Events Spike
                 "state": "scheduled"
             }
         ]}
-        """
\ No newline at end of file
+        """
+        When we unspike events "#EVENT3._id#"
+        Then we get OK response
+        When we get "/events/#EVENT3._id#"
+        Then we get existing resource
+        """
+        {"_id": "#EVENT3._id#", "state": "draft"}
+        """
@@ -24,6 +24,27 @@ Feature: Planning Item Locking
         """
         Then we get OK response
 
+    @auth
+    Scenario: Lock item within the query budget
+        Given "planning"
+        """
+        [{
+            "slugline": "TestPlan"
+        }]
+        """
+        Given we count the database queries
+        When we post to "/planning/#planning._id#/lock"
+        """
+        {"lock_action": "edit"}
+        """
+        Then we get new resource
+        """
+        {
+          "_id": "#planning._id#", "slugline": "TestPlan", "lock_user": "#CONTEXT_USER_ID#"
+        }
+        """
+        And we used at most 30 database queries
+
     @auth
     Scenario: Fail edit on locked item
         Given "planning"
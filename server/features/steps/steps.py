@@ -9,10 +9,11 @@
 # at https://www.sourcefabric.org/superdesk/license
 
 from superdesk.tests.publish_steps import * # noqa
-from superdesk.tests.steps import (then, when, step_impl_then_get_existing, get_json_data,
+from superdesk.tests.steps import (given, then, when, step_impl_then_get_existing, get_json_data,
                                    assert_200, unique_headers, get_prefixed_url,
                                    if_match, assert_404, apply_placeholders, get_res, set_placeholder)
 from flask import json
+from planning.query_stats import start_query_recording, stop_query_recording
 
 
 @then('we get a list with {total_count} items')
@@ -114,8 +115,9 @@ def step_impl_when_unspike_resource(context, resource, item_id):
     res = get_res(item_url, context)
     headers = if_match(context, res.get('_etag'))
 
+    data = apply_placeholders(context, context.text) if context.text else '{}'
     context.response = context.client.patch(get_prefixed_url(context.app, unspike_url),
-                                            data='{}', headers=headers)
+                                            data=data, headers=headers)
 
 
 @when('we perform {action} on {resource} "{item_id}"')
@@ -167,3 +169,19 @@ def then_we_store_assignment_id(context, index):
     assert len(response.get('coverages')), 'Coverage are not defined.'
     coverage = response.get('coverages')[index]
     assert not coverage.get('assigned_to', {}).get('assignment_id'), 'Coverage has an assignment'
+
+
+@given('we count the database queries')
+def given_we_count_the_database_queries(context):
+    context.app.config['PLANNING_QUERY_STATS'] = True
+    start_query_recording(context.app)
+
+
+@then('we used at most {budget} database queries')
+def then_we_used_at_most_database_queries(context, budget):
+    budget = int(budget)
+    queries = stop_query_recording(context.app)
+    assert queries is not None, 'Queries are not counted, use "Given we count the database queries" first'
+    assert queries.total <= budget, 'Used {} queries, the budget is {}: {}'.format(
+        queries.total, budget, queries.format_breakdown()
+    )
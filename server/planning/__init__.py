@@ -11,11 +11,12 @@
 """Superdesk Planning Plugin."""
 
 import superdesk
+from datetime import timedelta
 from superdesk.services import BaseService
 
-from .events import EventsResource, EventsService
+from .events import EventsResource, EventsService, EventsArchiveResource
 from .events_spike import EventsSpikeResource, EventsSpikeService, EventsUnspikeResource, EventsUnspikeService
-from .planning import PlanningResource, PlanningService
+from .planning import PlanningResource, PlanningService, PlanningArchiveResource
 from .planning_spike import PlanningSpikeResource, PlanningSpikeService, PlanningUnspikeResource, PlanningUnspikeService
 from .events_files import EventsFilesResource, EventsFilesService
 # from .coverage import CoverageResource, CoverageService
@@ -23,6 +24,14 @@ from .events_files import EventsFilesResource, EventsFilesService
 from .locations import LocationsResource, LocationsService
 from .events_history import EventsHistoryResource, EventsHistoryService
 from .planning_history import PlanningHistoryResource, PlanningHistoryService
+from .history import flush_history_after_request, flush_history_on_teardown
+from .notifications import flush_notifications_after_request, flush_notifications_on_teardown
+from .identity_map import IdentityMapBackend, clear_identity_maps
+from .query_stats import start_query_stats, report_query_stats_after_request, report_query_stats_on_teardown
+from .history_archive import HistoryArchiveResource, HistoryArchiveService
+from .purged_items import PurgedItemsResource, PurgedItemsService
+from .archive_tier import ArchiveTierService
+from .item_history import ItemHistoryResource, ItemHistoryService
 from .planning_lock import PlanningLockResource, PlanningLockService, PlanningUnlockResource, PlanningUnlockService
 from .assignments_lock import AssignmentsLockResource, AssignmentsLockService,\
     AssignmentsUnlockResource, AssignmentsUnlockService
@@ -30,12 +39,8 @@ from .planning_publish import PlanningPublishService, PlanningPublishResource
 from .planning_duplicate import PlanningDuplicateService, PlanningDuplicateResource
 from .events_lock import EventsLockResource, EventsLockService, EventsUnlockResource, EventsUnlockService
 from .agendas import AgendasResource, AgendasService
-from superdesk.io.registry import register_feeding_service, register_feed_parser
-from .feed_parsers.ics_2_0 import IcsTwoFeedParser
-from .feed_parsers.ntb_event_xml import NTBEventXMLFeedParser
-from .feeding_services.event_file_service import EventFileFeedingService
-from .feeding_services.event_http_service import EventHTTPFeedingService
-from .feeding_services.event_email_service import EventEmailFeedingService
+from .feed_parsers import register_feed_parsers
+from .feeding_services import register_feeding_services
 from .events_duplicate import EventsDuplicateResource, EventsDuplicateService
 from .events_publish import EventsPublishService, EventsPublishResource
 from .events_cancel import EventsCancelService, EventsCancelResource
@@ -44,9 +49,11 @@ from .events_reschedule import EventsRescheduleService, EventsRescheduleResource
 from .planning_reschedule import PlanningRescheduleService, PlanningRescheduleResource
 from .events_postpone import EventsPostponeService, EventsPostponeResource
 from .planning_postpone import PlanningPostponeService, PlanningPostponeResource
+from .planning_jobs import PlanningJobsService, PlanningJobsResource
 from planning.planning_types import PlanningTypesService, PlanningTypesResource
-from .common import get_max_recurrent_events
+from .common import get_max_recurrent_events, on_desk_updated, on_desk_deleted
 from .planning_export import PlanningExportResource, PlanningExportService
+from .planning_export_stream import bp as planning_export_stream_bp
 from apps.common.components.utils import register_component
 from .item_lock import LockService
 from .assignments import AssignmentsResource, AssignmentsService
@@ -55,6 +62,8 @@ from .assignments_content import AssignmentsContentResource, AssignmentsContentS
 from .assignments_link import AssignmentsLinkResource, AssignmentsLinkService
 from .assignments_unlink import AssignmentsUnlinkResource, AssignmentsUnlinkService
 from .assignments_complete import AssignmentsCompleteResource, AssignmentsCompleteService
+from .assignments_bulk_reassign import AssignmentsBulkReassignResource, AssignmentsBulkReassignService
+from .assignments_workload import AssignmentsWorkloadResource, AssignmentsWorkloadService
 from .commands import *  # noqa
 
 
@@ -63,80 +72,83 @@ def init_app(app):
 
     :param app: superdesk app
     """
-    planning_search_service = PlanningService('planning', backend=superdesk.get_backend())
+    # keeps the events, planning and assignments read during a request
+    backend = IdentityMapBackend()
+
+    planning_search_service = PlanningService('planning', backend=backend)
     PlanningResource('planning', app=app, service=planning_search_service)
 
-    planning_lock_service = PlanningLockService('planning_lock', backend=superdesk.get_backend())
+    planning_lock_service = PlanningLockService('planning_lock', backend=backend)
     PlanningLockResource('planning_lock', app=app, service=planning_lock_service)
 
-    events_lock_service = EventsLockService('events_lock', backend=superdesk.get_backend())
+    events_lock_service = EventsLockService('events_lock', backend=backend)
     EventsLockResource('events_lock', app=app, service=events_lock_service)
 
     assignments_lock_service = AssignmentsLockService(AssignmentsLockResource.endpoint_name,
-                                                      backend=superdesk.get_backend())
+                                                      backend=backend)
     AssignmentsLockResource(AssignmentsLockResource.endpoint_name, app=app, service=assignments_lock_service)
 
-    planning_unlock_service = PlanningUnlockService('planning_unlock', backend=superdesk.get_backend())
+    planning_unlock_service = PlanningUnlockService('planning_unlock', backend=backend)
     PlanningUnlockResource('planning_unlock', app=app, service=planning_unlock_service)
 
-    events_unlock_service = EventsUnlockService('events_unlock', backend=superdesk.get_backend())
+    events_unlock_service = EventsUnlockService('events_unlock', backend=backend)
     EventsUnlockResource('events_unlock', app=app, service=events_unlock_service)
 
     assignments_unlock_service = AssignmentsUnlockService(AssignmentsUnlockResource.endpoint_name,
-                                                          backend=superdesk.get_backend())
+                                                          backend=backend)
     AssignmentsUnlockResource(AssignmentsUnlockResource.endpoint_name, app=app, service=assignments_unlock_service)
 
-    planning_spike_service = PlanningSpikeService('planning_spike', backend=superdesk.get_backend())
+    planning_spike_service = PlanningSpikeService('planning_spike', backend=backend)
     PlanningSpikeResource('planning_spike', app=app, service=planning_spike_service)
 
-    planning_unspike_service = PlanningUnspikeService('planning_unspike', backend=superdesk.get_backend())
+    planning_unspike_service = PlanningUnspikeService('planning_unspike', backend=backend)
     PlanningUnspikeResource('planning_unspike', app=app, service=planning_unspike_service)
 
-    planning_publish_service = PlanningPublishService('planning_publish', backend=superdesk.get_backend())
+    planning_publish_service = PlanningPublishService('planning_publish', backend=backend)
     PlanningPublishResource('planning_publish', app=app, service=planning_publish_service)
 
-    planning_duplicate_service = PlanningDuplicateService('planning_duplicate', backend=superdesk.get_backend())
+    planning_duplicate_service = PlanningDuplicateService('planning_duplicate', backend=backend)
     PlanningDuplicateResource('planning_duplicate', app=app, service=planning_duplicate_service)
 
-    agendas_service = AgendasService('agenda', backend=superdesk.get_backend())
+    agendas_service = AgendasService('agenda', backend=backend)
     AgendasResource('agenda', app=app, service=agendas_service)
 
-    events_search_service = EventsService('events', backend=superdesk.get_backend())
+    events_search_service = EventsService('events', backend=backend)
     EventsResource('events', app=app, service=events_search_service)
 
-    events_spike_service = EventsSpikeService('events_spike', backend=superdesk.get_backend())
+    events_spike_service = EventsSpikeService('events_spike', backend=backend)
     EventsSpikeResource('events_spike', app=app, service=events_spike_service)
 
-    events_unspike_service = EventsUnspikeService('events_unspike', backend=superdesk.get_backend())
+    events_unspike_service = EventsUnspikeService('events_unspike', backend=backend)
     EventsUnspikeResource('events_unspike', app=app, service=events_unspike_service)
 
-    events_publish_service = EventsPublishService('events_publish', backend=superdesk.get_backend())
+    events_publish_service = EventsPublishService('events_publish', backend=backend)
     EventsPublishResource('events_publish', app=app, service=events_publish_service)
 
-    locations_search_service = LocationsService('locations', backend=superdesk.get_backend())
+    locations_search_service = LocationsService('locations', backend=backend)
     LocationsResource('locations', app=app, service=locations_search_service)
 
-    files_service = EventsFilesService('events_files', backend=superdesk.get_backend())
+    files_service = EventsFilesService('events_files', backend=backend)
     EventsFilesResource('events_files', app=app, service=files_service)
 
-    events_history_service = EventsHistoryService('events_history', backend=superdesk.get_backend())
+    events_history_service = EventsHistoryService('events_history', backend=backend)
     EventsHistoryResource('events_history', app=app, service=events_history_service)
 
     planning_type_service = PlanningTypesService(PlanningTypesResource.endpoint_name,
-                                                 backend=superdesk.get_backend())
+                                                 backend=backend)
     PlanningTypesResource(PlanningTypesResource.endpoint_name,
                           app=app,
                           service=planning_type_service)
 
     events_cancel_service = EventsCancelService(EventsCancelResource.endpoint_name,
-                                                backend=superdesk.get_backend())
+                                                backend=backend)
     EventsCancelResource(EventsCancelResource.endpoint_name,
                          app=app,
                          service=events_cancel_service)
 
     events_reschedule_service = EventsRescheduleService(
         EventsRescheduleResource.endpoint_name,
-        backend=superdesk.get_backend()
+        backend=backend
     )
     EventsRescheduleResource(
         EventsRescheduleResource.endpoint_name,
@@ -145,20 +157,20 @@ def init_app(app):
     )
 
     events_postpone_service = EventsPostponeService(EventsPostponeResource.endpoint_name,
-                                                    backend=superdesk.get_backend())
+                                                    backend=backend)
     EventsPostponeResource(EventsPostponeResource.endpoint_name,
                            app=app,
                            service=events_postpone_service)
 
     planning_cancel_service = PlanningCancelService(PlanningCancelResource.endpoint_name,
-                                                    backend=superdesk.get_backend())
+                                                    backend=backend)
     PlanningCancelResource(PlanningCancelResource.endpoint_name,
                            app=app,
                            service=planning_cancel_service)
 
     planning_reschedule_service = PlanningRescheduleService(
         PlanningRescheduleResource.endpoint_name,
-        backend=superdesk.get_backend()
+        backend=backend
     )
     PlanningRescheduleResource(
         PlanningRescheduleResource.endpoint_name,
@@ -167,11 +179,14 @@ def init_app(app):
     )
 
     planning_postpone_service = PlanningPostponeService(PlanningPostponeResource.endpoint_name,
-                                                        backend=superdesk.get_backend())
+                                                        backend=backend)
     PlanningPostponeResource(PlanningPostponeResource.endpoint_name,
                              app=app,
                              service=planning_postpone_service)
 
+    planning_jobs_service = PlanningJobsService(PlanningJobsResource.endpoint_name, backend=backend)
+    PlanningJobsResource(PlanningJobsResource.endpoint_name, app=app, service=planning_jobs_service)
+
     superdesk.register_resource(
         'planning_export',
         PlanningExportResource,
@@ -180,7 +195,9 @@ def init_app(app):
         _app=app
     )
 
-    assignments_publish_service = AssignmentsService('assignments', backend=superdesk.get_backend())
+    superdesk.blueprint(planning_export_stream_bp, app)
+
+    assignments_publish_service = AssignmentsService('assignments', backend=backend)
     AssignmentsResource('assignments', app=app, service=assignments_publish_service)
 
     app.on_updated_events += events_history_service.on_item_updated
@@ -193,7 +210,7 @@ def init_app(app):
     app.on_updated_events_reschedule += events_history_service.on_reschedule
     app.on_updated_events_postpone += events_history_service.on_postpone
 
-    planning_history_service = PlanningHistoryService('planning_history', backend=superdesk.get_backend())
+    planning_history_service = PlanningHistoryService('planning_history', backend=backend)
     PlanningHistoryResource('planning_history', app=app, service=planning_history_service)
 
     app.on_inserted_planning += planning_history_service.on_item_created
@@ -204,22 +221,54 @@ def init_app(app):
     app.on_updated_planning_reschedule += planning_history_service.on_reschedule
     app.on_updated_planning_postpone += planning_history_service.on_postpone
 
+    history_archive_service = HistoryArchiveService(HistoryArchiveResource.endpoint_name,
+                                                    backend=backend)
+    HistoryArchiveResource(HistoryArchiveResource.endpoint_name, app=app, service=history_archive_service)
+
+    purged_items_service = PurgedItemsService(PurgedItemsResource.endpoint_name, backend=backend)
+    PurgedItemsResource(PurgedItemsResource.endpoint_name, app=app, service=purged_items_service)
+
+    events_archive_service = ArchiveTierService('events_archive', backend=backend)
+    EventsArchiveResource('events_archive', app=app, service=events_archive_service)
+
+    planning_archive_service = ArchiveTierService('planning_archive', backend=backend)
+    PlanningArchiveResource('planning_archive', app=app, service=planning_archive_service)
+
+    item_history_service = ItemHistoryService(ItemHistoryResource.endpoint_name, backend=backend)
+    ItemHistoryResource(ItemHistoryResource.endpoint_name, app=app, service=item_history_service)
+
+    app.before_request(clear_identity_maps)
+
+    # Count the queries of every request, reported once the request is done
+    app.before_request(start_query_stats)
+    app.after_request(report_query_stats_after_request)
+    app.teardown_appcontext(report_query_stats_on_teardown)
+
+    # Send the notifications queued during the request once the request is done,
+    # registered first so they are sent after the history is written
+    app.after_request(flush_notifications_after_request)
+    app.teardown_appcontext(flush_notifications_on_teardown)
+
+    # Write the history queued during the request once the request is done
+    app.after_request(flush_history_after_request)
+    app.teardown_appcontext(flush_history_on_teardown)
+
     app.on_locked_planning += planning_search_service.on_locked_planning
     app.on_locked_events += events_search_service.on_locked_event
 
-    events_duplicate_service = EventsDuplicateService('events_duplicate', backend=superdesk.get_backend())
+    events_duplicate_service = EventsDuplicateService('events_duplicate', backend=backend)
     EventsDuplicateResource('events_duplicate', app=app, service=events_duplicate_service)
 
-    delivery_service = BaseService('delivery', backend=superdesk.get_backend())
+    delivery_service = BaseService('delivery', backend=backend)
     DeliveryResource('delivery', app=app, service=delivery_service)
 
-    assignments_content_service = AssignmentsContentService('assignments_content', backend=superdesk.get_backend())
+    assignments_content_service = AssignmentsContentService('assignments_content', backend=backend)
     AssignmentsContentResource('assignments_content', app=app, service=assignments_content_service)
 
-    assignments_link_service = AssignmentsLinkService('assignments_link', backend=superdesk.get_backend())
+    assignments_link_service = AssignmentsLinkService('assignments_link', backend=backend)
     AssignmentsLinkResource('assignments_link', app=app, service=assignments_link_service)
 
-    assignments_unlink_service = AssignmentsUnlinkService('assignments_unlink', backend=superdesk.get_backend())
+    assignments_unlink_service = AssignmentsUnlinkService('assignments_unlink', backend=backend)
     AssignmentsUnlinkResource('assignments_unlink', app=app, service=assignments_unlink_service)
 
     # Updating data/lock on assignments based on content item updates from authoring
@@ -230,13 +279,13 @@ def init_app(app):
     app.on_item_unlocked += assignments_publish_service.sync_assignment_unlock
 
     assignments_complete_service = AssignmentsCompleteService(AssignmentsCompleteResource.endpoint_name,
-                                                              backend=superdesk.get_backend())
+                                                              backend=backend)
 
     # Enhance the archive/published item resources with assigned desk/user information
     app.on_fetched_resource_archive += assignments_publish_service.on_fetched_resource_archive
     app.on_fetched_item_archive += assignments_publish_service.on_fetched_item_archive
     app.on_fetched_resource_published += assignments_publish_service.on_fetched_resource_archive
-    app.on_fetched_item_published += assignments_publish_service.on_fetched_resource_archive
+    app.on_fetched_item_published += assignments_publish_service.on_fetched_item_archive
 
     AssignmentsCompleteResource(
         AssignmentsCompleteResource.endpoint_name,
@@ -244,6 +293,61 @@ def init_app(app):
         service=assignments_complete_service
     )
 
+    assignments_bulk_reassign_service = AssignmentsBulkReassignService(AssignmentsBulkReassignResource.endpoint_name,
+                                                                       backend=backend)
+    AssignmentsBulkReassignResource(
+        AssignmentsBulkReassignResource.endpoint_name,
+        app=app,
+        service=assignments_bulk_reassign_service
+    )
+
+    assignments_workload_service = AssignmentsWorkloadService(AssignmentsWorkloadResource.endpoint_name,
+                                                              backend=backend)
+    AssignmentsWorkloadResource(
+        AssignmentsWorkloadResource.endpoint_name,
+        app=app,
+        service=assignments_workload_service
+    )
+
+    # Reconcile the workload counters periodically, unless the deployment schedules it itself
+    reconcile_minutes = int(app.config.get('PLANNING_WORKLOAD_RECONCILE_MINUTES', 15))
+    if reconcile_minutes > 0:
+        app.config.setdefault('CELERY_BEAT_SCHEDULE', {}).setdefault('planning:reconcile_assignment_workload', {
+            'task': 'planning.commands.reconcile_assignment_workload.reconcile_assignment_workload',
+            'schedule': timedelta(minutes=reconcile_minutes)
+        })
+
+    # Move the history older than the retention period to the history archive every day
+    if int(app.config.get('PLANNING_HISTORY_RETENTION_DAYS', 0)) > 0:
+        app.config.setdefault('CELERY_BEAT_SCHEDULE', {}).setdefault('planning:archive_history', {
+            'task': 'planning.commands.archive_history.archive_history',
+            'schedule': timedelta(hours=24)
+        })
+
+    # Purge the expired events and planning items every hour
+    if app.config.get('PLANNING_PURGE_EXPIRED'):
+        app.config.setdefault('CELERY_BEAT_SCHEDULE', {}).setdefault('planning:purge_expired', {
+            'task': 'planning.commands.purge_expired_items.purge_expired_items',
+            'schedule': timedelta(hours=1)
+        })
+
+    # Archive tier: its own elastic index and a daily run moving the old items into it
+    archive_index = app.config.get('PLANNING_ARCHIVE_ELASTICSEARCH_INDEX') or \
+        '{}_planning_archive'.format(app.config.get('ELASTICSEARCH_INDEX', 'superdesk'))
+    elastic_indexes = app.config.setdefault('ELASTICSEARCH_INDEXES', {})
+    elastic_indexes.setdefault('events_archive', archive_index)
+    elastic_indexes.setdefault('planning_archive', archive_index)
+    if int(app.config.get('PLANNING_ARCHIVE_DAYS', 0)) > 0:
+        app.config.setdefault('CELERY_BEAT_SCHEDULE', {}).setdefault('planning:archive_items', {
+            'task': 'planning.commands.archive_items.archive_items',
+            'schedule': timedelta(days=1)
+        })
+
+    # Keep the cached desk directory in sync with desk changes
+    app.on_updated_desks += on_desk_updated
+    app.on_replaced_desks += on_desk_updated
+    app.on_deleted_item_desks += on_desk_deleted
+
     register_component(LockService(app))
 
     superdesk.privilege(
@@ -333,21 +437,6 @@ def init_app(app):
     app.client_config['max_recurrent_events'] = get_max_recurrent_events(app)
 
 
-register_feeding_service(
-    EventFileFeedingService.NAME,
-    EventFileFeedingService(),
-    EventFileFeedingService.ERRORS
-)
-register_feeding_service(
-    EventHTTPFeedingService.NAME,
-    EventHTTPFeedingService(),
-    EventHTTPFeedingService.ERRORS
-)
-register_feeding_service(
-    EventEmailFeedingService.NAME,
-    EventEmailFeedingService(),
-    EventEmailFeedingService.ERRORS
-)
-
-register_feed_parser(IcsTwoFeedParser.NAME, IcsTwoFeedParser())
-register_feed_parser(NTBEventXMLFeedParser.NAME, NTBEventXMLFeedParser())
+# registered lazily, the feeding services and parsers are imported once used for ingest
+register_feeding_services()
+register_feed_parsers()
@@ -2,7 +2,7 @@ from apps.archive.common import set_original_creator
 from apps.auth import get_user_id
 from superdesk import Resource, Service, config, get_resource_service
 from superdesk.errors import SuperdeskApiError
-from superdesk.notification import push_notification
+from .notifications import push_notification
 
 
 class AgendasResource(Resource):
@@ -0,0 +1,292 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Archive tier of the events and planning items
+
+Events and planning items older than ``PLANNING_ARCHIVE_DAYS`` are moved out of the hot
+``events`` and ``planning`` collections (and their elastic index) into the ``events_archive``
+and ``planning_archive`` collections, indexed in their own elastic index
+(``ELASTICSEARCH_INDEXES``). Archived items are read only, they can be restored into the
+hot tier by id.
+
+Searches of the events and planning lists only include the archive tier when their date
+range starts before the cutoff, or when they are made with ``include_archive=1``. Both tiers
+are then searched with a single elastic request, so sorting and paging work across them.
+Archived items are returned with ``_archived: True``.
+"""
+
+import re
+import copy
+import logging
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+from flask import current_app as app, json
+from eve.utils import config
+from superdesk import get_resource_service
+from superdesk.services import BaseService
+from superdesk.utc import utcnow, get_date, utc
+from .bulk import get_collection, bulk_delete, get_search_index
+from .query_stats import record_query
+
+logger = logging.getLogger(__name__)
+
+# hot resources and their archive resource
+TIERED_RESOURCES = {
+    'planning': 'planning_archive',
+    'events': 'events_archive'
+}
+
+# date fields of the items, all of them are before the cutoff for archived items
+DATE_FIELDS = {
+    'planning': ('_planning_date', '_planning_schedule.scheduled'),
+    'events': ('dates.start', 'dates.end')
+}
+
+# elastic query keys which don't restrict the results to the ranges they contain
+NON_RESTRICTING_KEYS = ('should', 'must_not', 'not', 'or', 'sort', 'aggs', 'aggregations', 'highlight')
+
+DATE_MATH = re.compile(r'^now(?P<offsets>(?:[+-]\d+[yMwdhHms])*)(?:/(?P<rounding>[yMwdhHms]))?$')
+DATE_MATH_OFFSET = re.compile(r'([+-])(\d+)([yMwdhHms])')
+DATE_MATH_UNITS = {
+    'y': timedelta(days=365),
+    'M': timedelta(days=30),
+    'w': timedelta(weeks=1),
+    'd': timedelta(days=1),
+    'h': timedelta(hours=1),
+    'H': timedelta(hours=1),
+    'm': timedelta(minutes=1),
+    's': timedelta(seconds=1)
+}
+
+
+def get_archive_cutoff(now=None):
+    """Get the date before which items can be archived, None if the archive tier is disabled"""
+    days = app.config.get('PLANNING_ARCHIVE_DAYS', 0)
+    if not days:
+        return None
+    return (now or utcnow()) - timedelta(days=int(days))
+
+
+def parse_range_date(value, now=None):
+    """Parse a date of an elastic range, None if not supported
+
+    Date math (``now-1d/d``) is approximated, rounding moves the date a whole unit back.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000.0, utc)
+
+    if not isinstance(value, str):
+        return None
+
+    match = DATE_MATH.match(value)
+    if match:
+        date = now or utcnow()
+        for sign, amount, unit in DATE_MATH_OFFSET.findall(match.group('offsets')):
+            offset = DATE_MATH_UNITS[unit] * int(amount)
+            date = date + offset if sign == '+' else date - offset
+        if match.group('rounding'):
+            date -= DATE_MATH_UNITS[match.group('rounding')]
+        return date
+
+    try:
+        # date math on a date (``2018-01-01||+1M``) is ignored
+        return get_date(value.split('||')[0])
+    except Exception:
+        return None
+
+
+def get_range_start(query, fields):
+    """Get the latest start of the ranges on ``fields`` the query results are restricted to
+
+    :return datetime: start of the range, None if the results are not restricted by a range
+    """
+    starts = []
+
+    def walk(node):
+        if isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif isinstance(node, dict):
+            for key, value in node.items():
+                if key in NON_RESTRICTING_KEYS:
+                    continue
+                if key == 'range' and isinstance(value, dict):
+                    for field, bounds in value.items():
+                        if field in fields and isinstance(bounds, dict):
+                            start = parse_range_date(bounds.get('gte', bounds.get('gt')))
+                            if start is not None:
+                                starts.append(start)
+                walk(value)
+
+    walk(query)
+    return max(starts) if starts else None
+
+
+def needs_archive(resource, req, lookup=None):
+    """Check if a search of the resource needs the archive tier
+
+    The archive tier is only searched when the elastic ``source`` of the search has a date
+    range starting before the cutoff, or when the ``include_archive`` arg is set. Internal
+    lookups only use the hot tier. A day of margin is kept for the time zones of the ranges.
+    """
+    if resource not in TIERED_RESOURCES or lookup:
+        return False
+
+    cutoff = get_archive_cutoff()
+    if cutoff is None:
+        return False
+
+    args = getattr(req, 'args', None) or {}
+    if str(args.get('include_archive', '')).lower() in ('1', 'true'):
+        return True
+
+    if not args.get('source'):
+        return False
+
+    start = get_range_start(json.loads(args['source']), DATE_FIELDS[resource])
+    return start is not None and start - timedelta(days=1) < cutoff
+
+
+def get_tiered_elastic(resource):
+    """Get the elastic data layer searching both tiers of the resource
+
+    It is a copy of ``app.data.elastic`` which only changes the indexes and types of the
+    resource searches, the queries are built by the data layer as for any other search.
+    """
+    archive = TIERED_RESOURCES[resource]
+    elastic = copy.copy(app.data.elastic)
+    es_args = elastic._es_args
+
+    def tiered_es_args(name, *args, **kwargs):
+        search_args = es_args(name, *args, **kwargs)
+        if name == resource:
+            search_args['index'] = ','.join(sorted(set([get_search_index(resource), get_search_index(archive)])))
+            search_args['doc_type'] = ','.join([resource, archive])
+        return search_args
+
+    elastic._es_args = tiered_es_args
+    return elastic
+
+
+def search_with_archive(resource, req, lookup=None):
+    """Search both tiers of the resource with a single elastic search
+
+    :return: elastic cursor of the items, archived items have ``_archived`` set
+    """
+    record_query('elastic', resource, 'search')
+    cursor = get_tiered_elastic(resource).find(resource, req, lookup)
+    for doc in cursor.docs:
+        if doc.get('_type') == TIERED_RESOURCES[resource]:
+            doc['_archived'] = True
+    return cursor
+
+
+class ArchiveTierService(BaseService):
+    """Service of the archive resources, moving items between the hot and archive tiers"""
+
+    @property
+    def hot_resource(self):
+        return next(resource for resource, archive in TIERED_RESOURCES.items() if archive == self.datasource)
+
+    def get_archivable(self, cutoff, batch_size):
+        """Yield the ids of the items older than the cutoff which are not locked, one batch at a time"""
+        if self.hot_resource == 'planning':
+            lookup = {
+                '_planning_date': {'$lt': cutoff},
+                '_planning_schedule.scheduled': {'$not': {'$gte': cutoff}}
+            }
+        else:
+            lookup = {'dates.end': {'$lt': cutoff}}
+        lookup['lock_user'] = None
+
+        batch = []
+        for item in get_collection(self.hot_resource).find(lookup, [config.ID_FIELD]).batch_size(batch_size):
+            batch.append(item[config.ID_FIELD])
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def get_in_use(self, ids):
+        """Get the ids of the items still in use by the hot tier
+
+        Planning items with assignments and events with planning items stay in the hot tier, as
+        the assignments and their deliveries are not archived.
+        """
+        if self.hot_resource == 'planning':
+            return set(assignment['planning_item'] for assignment in get_collection('assignments').find(
+                {'planning_item': {'$in': ids}}, ['planning_item']
+            ))
+
+        return set(plan['event_item'] for plan in get_collection('planning').find(
+            {'event_item': {'$in': ids}}, ['event_item']
+        ))
+
+    def archive(self, days=None, batch_size=None):
+        """Move the items older than ``days`` into the archive tier, in batches
+
+        Items are written to the archive before being removed from the hot tier, so an
+        interrupted run can only leave items in both tiers, which the next run fixes.
+
+        :param int days: age in days, at least ``PLANNING_ARCHIVE_DAYS`` as searches only include the
+            archive tier for ranges starting before it
+        :param int batch_size: number of items per batch, defaults to ``PLANNING_ARCHIVE_BATCH_SIZE``
+        :return int: number of archived items
+        """
+        min_days = app.config.get('PLANNING_ARCHIVE_DAYS', 0)
+        if not min_days:
+            logger.warning('The archive tier is disabled, PLANNING_ARCHIVE_DAYS is not set')
+            return 0
+
+        cutoff = utcnow() - timedelta(days=max(int(days or 0), int(min_days)))
+        batch_size = batch_size or app.config.get('PLANNING_ARCHIVE_BATCH_SIZE', 500)
+        total = 0
+        for ids in self.get_archivable(cutoff, batch_size):
+            in_use = self.get_in_use(ids)
+            ids = [_id for _id in ids if _id not in in_use]
+            if ids:
+                total += len(self.move(self.hot_resource, self.datasource, ids))
+                logger.info('Archived {} {} items'.format(total, self.hot_resource))
+
+        return total
+
+    def restore(self, ids):
+        """Move the archived items ``ids`` back into the hot tier
+
+        :return list: ids of the restored items
+        """
+        return self.move(self.datasource, self.hot_resource, list(ids))
+
+    def move(self, source, target, ids):
+        """Move the items from the source resource to the target one, in mongo and elastic
+
+        Items locked in the meantime are not moved, their copy in the target is removed.
+
+        :return list: ids of the moved items
+        """
+        unlocked = {config.ID_FIELD: {'$in': ids}, 'lock_user': None}
+        docs = list(get_collection(source).find(unlocked))
+        if not docs:
+            return []
+
+        ids = [doc[config.ID_FIELD] for doc in docs]
+        record_query('mongo', target, 'bulk_write')
+        get_collection(target).bulk_write([
+            ReplaceOne({config.ID_FIELD: doc[config.ID_FIELD]}, doc, upsert=True) for doc in docs
+        ], ordered=False)
+        get_resource_service(target).backend.create_in_search(target, docs)
+
+        moved = bulk_delete(source, ids, {'lock_user': None})
+        locked = [_id for _id in ids if _id not in set(moved)]
+        if locked:
+            logger.info('Not moving {} {} items locked meanwhile'.format(len(locked), source))
+            bulk_delete(target, locked)
+        return moved
@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from unittest import mock
+from bson import ObjectId
+from flask import json
+from eve.utils import ParsedRequest
+from planning.tests import TestCase
+from planning.bulk import get_collection
+from planning.archive_tier import parse_range_date, get_range_start, needs_archive, get_tiered_elastic
+from superdesk import get_resource_service
+from superdesk.utc import utcnow, utc
+from superdesk.tests import update_config
+from superdesk.factory.app import get_app
+from planning.commands.archive_items import ArchiveItemsCommand
+
+
+def get_request(query, **args):
+    req = ParsedRequest()
+    req.args = {'source': json.dumps(query)}
+    req.args.update(args)
+    return req
+
+
+class ArchiveTierTestCase(TestCase):
+    def test_parse_range_date(self):
+        now = datetime(2018, 3, 10, 12, tzinfo=utc)
+        self.assertEqual(parse_range_date('now', now), now)
+        self.assertEqual(parse_range_date('now-1M+2d', now), now - timedelta(days=28))
+        self.assertEqual(parse_range_date('now/d', now), now - timedelta(days=1))
+        self.assertEqual(parse_range_date(1520683200000), now)
+        self.assertEqual(parse_range_date('2018-03-10T12:00:00+0000||+1M'), now)
+        self.assertIsNone(parse_range_date(None))
+        self.assertIsNone(parse_range_date('not a date'))
+
+    def test_get_range_start(self):
+        fields = ('dates.start', 'dates.end')
+        query = {
+            'query': {'filtered': {'filter': {'bool': {
+                'must': [
+                    {'range': {'dates.end': {'gte': '2018-01-01T00:00:00+0000'}}},
+                    {'nested': {'filter': {'range': {'dates.start': {'gt': '2018-02-01T00:00:00+0000'}}}}}
+                ],
+                'must_not': [{'range': {'dates.start': {'gte': '2018-03-01T00:00:00+0000'}}}]
+            }}}},
+            'sort': [{'dates.start': 'asc'}]
+        }
+        self.assertEqual(get_range_start(query, fields), datetime(2018, 2, 1, tzinfo=utc))
+        self.assertIsNone(get_range_start({'query': {'match_all': {}}}, fields))
+        self.assertIsNone(get_range_start({'query': {'range': {'versioncreated': {'gte': 'now'}}}}, fields))
+
+    def test_needs_archive(self):
+        with self.app.app_context():
+            upcoming = get_request({'query': {'range': {'dates.start': {'gte': 'now-1d'}}}})
+            past = get_request({'query': {'range': {'dates.start': {'gte': 'now-1y'}}}})
+            unbounded = get_request({'query': {'match_all': {}}})
+
+            self.app.config['PLANNING_ARCHIVE_DAYS'] = 0
+            self.assertFalse(needs_archive('events', unbounded))
+
+            self.app.config['PLANNING_ARCHIVE_DAYS'] = 30
+            self.assertFalse(needs_archive('events', upcoming))
+            self.assertTrue(needs_archive('events', past))
+            self.assertFalse(needs_archive('events', unbounded))
+            self.assertTrue(needs_archive('events', get_request({'query': {'match_all': {}}}, include_archive='1')))
+            self.assertFalse(needs_archive('events', past, {'_id': 'e1'}))
+            self.assertFalse(needs_archive('events', ParsedRequest()))
+            self.assertFalse(needs_archive('assignments', unbounded))
+
+    def test_archive_and_restore(self):
+        with self.app.app_context():
+            self.app.config['PLANNING_ARCHIVE_DAYS'] = 30
+            now = utcnow()
+            past = now - timedelta(days=60)
+            self.app.data.insert('events', [
+                {'_id': 'e1', 'name': 'past', 'dates': {'start': past, 'end': past}},
+                {'_id': 'e2', 'name': 'with planning', 'dates': {'start': past, 'end': past}},
+                {'_id': 'e3', 'name': 'locked', 'dates': {'start': past, 'end': past}, 'lock_user': ObjectId()},
+                {'_id': 'e4', 'name': 'upcoming', 'dates': {'start': now, 'end': now}},
+            ])
+            self.app.data.insert('planning', [
+                {'_id': 'p1', 'slugline': 'past', '_planning_date': past},
+                {'_id': 'p2', 'slugline': 'assigned', '_planning_date': past, 'event_item': 'e2'},
+                {'_id': 'p3', 'slugline': 'covered later', '_planning_date': past,
+                 '_planning_schedule': [{'scheduled': past}, {'scheduled': now}]},
+                {'_id': 'p4', 'slugline': 'completed', '_planning_date': past},
+            ])
+            self.app.data.insert('assignments', [
+                {'_id': ObjectId(), 'planning_item': 'p2', 'assigned_to': {'state': 'assigned'}},
+                {'_id': ObjectId(), 'planning_item': 'p4', 'assigned_to': {'state': 'completed'}},
+            ])
+
+            self.assertEqual(get_resource_service('planning_archive').archive(batch_size=1), 1)
+            self.assertEqual(get_resource_service('events_archive').archive(days=1), 1)
+
+            self.assertEqual(sorted(plan['_id'] for plan in get_collection('planning').find()), ['p2', 'p3', 'p4'])
+            self.assertEqual([plan['_id'] for plan in get_collection('planning_archive').find()], ['p1'])
+            self.assertEqual(sorted(event['_id'] for event in get_collection('events').find()), ['e2', 'e3', 'e4'])
+            self.assertEqual([event['_id'] for event in get_collection('events_archive').find()], ['e1'])
+
+            self.assertEqual(get_resource_service('events_archive').restore(['e1', 'e4']), ['e1'])
+            self.assertEqual(get_collection('events_archive').count(), 0)
+            self.assertEqual(get_collection('events').find_one({'_id': 'e1'})['name'], 'past')
+
+    def test_move_skips_items_locked_meanwhile(self):
+        with self.app.app_context():
+            past = utcnow() - timedelta(days=60)
+            self.app.data.insert('events', [
+                {'_id': 'e1', 'name': 'past', 'dates': {'start': past, 'end': past}},
+                {'_id': 'e2', 'name': 'locked', 'dates': {'start': past, 'end': past}, 'lock_user': ObjectId()},
+                {'_id': 'e3', 'name': 'locked meanwhile', 'dates': {'start': past, 'end': past}},
+            ])
+
+            def lock_e3(resource, docs):
+                get_collection('events').update_one({'_id': 'e3'}, {'$set': {'lock_user': ObjectId()}})
+
+            service = get_resource_service('events_archive')
+            with mock.patch.object(service.backend, 'create_in_search', side_effect=lock_e3):
+                self.assertEqual(service.move('events', 'events_archive', ['e1', 'e2', 'e3']), ['e1'])
+
+            self.assertEqual(sorted(event['_id'] for event in get_collection('events').find()), ['e2', 'e3'])
+            self.assertEqual([event['_id'] for event in get_collection('events_archive').find()], ['e1'])
+
+    def test_tiered_elastic_searches_both_tiers(self):
+        with self.app.app_context():
+            elastic = get_tiered_elastic('events')
+            args = elastic._es_args('events', source_projections='name')
+            self.assertEqual(args['doc_type'], 'events,events_archive')
+            self.assertEqual(len(args['index'].split(',')), len(set([
+                self.app.data.elastic._es_args('events')['index'],
+                self.app.data.elastic._es_args('events_archive')['index']
+            ])))
+            self.assertEqual(args['_source'], 'name')
+            self.assertEqual(elastic._es_args('planning'), self.app.data.elastic._es_args('planning'))
+            self.assertNotIn('_es_args', vars(self.app.data.elastic))
+
+
+class ArchiveTierSetupTestCase(TestCase):
+    def test_archive_index_is_configured(self):
+        indexes = self.app.config['ELASTICSEARCH_INDEXES']
+        self.assertEqual(indexes['events_archive'], 'sptest_planning_archive')
+        self.assertEqual(indexes['planning_archive'], 'sptest_planning_archive')
+        self.assertEqual(indexes['archive'], 'sptest_archive')
+        self.assertNotIn('planning:archive_items', self.app.config['CELERY_BEAT_SCHEDULE'])
+
+    def test_configured_archive_index_and_schedule_are_kept(self):
+        config = {'INSTALLED_APPS': ['planning'], 'PLANNING_ARCHIVE_DAYS': 30}
+        update_config(config)
+        config['ELASTICSEARCH_INDEXES']['events_archive'] = 'events_archive_index'
+        app = get_app(config)
+
+        self.assertEqual(app.config['ELASTICSEARCH_INDEXES']['events_archive'], 'events_archive_index')
+        self.assertEqual(app.config['ELASTICSEARCH_INDEXES']['planning_archive'], 'sptest_planning_archive')
+        entry = app.config['CELERY_BEAT_SCHEDULE']['planning:archive_items']
+        self.assertEqual(entry['task'], 'planning.commands.archive_items.archive_items')
+        self.assertEqual(entry['schedule'], timedelta(days=1))
+
+    def test_archive_is_skipped_while_running(self):
+        with self.app.app_context():
+            with mock.patch('planning.commands.archive_items.lock', return_value=False), \
+                    mock.patch('planning.commands.archive_items.get_resource_service') as get_service:
+                ArchiveItemsCommand().run()
+            get_service.assert_not_called()
@@ -13,30 +13,49 @@
 import superdesk
 import logging
 from copy import deepcopy
+from collections import OrderedDict
 from bson import ObjectId
+from superdesk import get_resource_service
 from superdesk.errors import SuperdeskApiError
 from superdesk.metadata.utils import item_url
 from superdesk.metadata.item import metadata_schema, ITEM_STATE, CONTENT_STATE
 from superdesk.resource import not_analyzed
-from superdesk.notification import push_notification
+from .notifications import push_notification, get_notification_changes
 from apps.archive.common import get_user, get_auth
 from apps.duplication.archive_move import ITEM_MOVE
 from apps.publish.enqueue import ITEM_PUBLISH
-from eve.utils import config
+from eve.utils import config, ParsedRequest
+from flask import json
 from superdesk.utc import utcnow
 from superdesk.activity import add_activity, ACTIVITY_UPDATE
 from .planning import coverage_schema
-from superdesk import get_resource_service
 from apps.common.components.utils import get_component
 from .item_lock import LockService, LOCK_USER
 from superdesk.users.services import current_user_has_privilege
-from .common import ASSIGNMENT_WORKFLOW_STATE, assignment_workflow_state, remove_lock_information
+from .common import ASSIGNMENT_WORKFLOW_STATE, assignment_workflow_state, remove_lock_information, get_desk
+from .cache import TTLCache, get_request_cache, clear_request_cache
+from .bulk import bulk_update
 
 
 logger = logging.getLogger(__name__)
 planning_type = deepcopy(superdesk.Resource.rel('planning', type='string'))
 planning_type['mapping'] = not_analyzed
 
+ASSIGNMENT_CACHE = 'assignments'
+ASSIGNMENT_SUMMARY_CACHE = 'assignment_summaries'
+
+# ``assigned_to`` details of assignments, shared between requests for a few seconds
+# as every desk monitoring view enhances its archive listing with them
+assignment_summary_cache = TTLCache('PLANNING_ASSIGNMENT_SUMMARY_CACHE_TTL', 5)
+
+
+def invalidate_assignment_cache(ids):
+    """Remove the cached assignments and ``assigned_to`` details for the assignment ``ids``"""
+    keys = [str(_id) for _id in ids if _id]
+    clear_request_cache(ASSIGNMENT_CACHE, keys)
+    clear_request_cache(ASSIGNMENT_SUMMARY_CACHE, keys)
+    assignment_summary_cache.invalidate(keys)
+
 
 class AssignmentsService(superdesk.Service):
     """Service class for the Assignments model."""
@@ -45,26 +64,60 @@ class AssignmentsService(superdesk.Service):
         self._enhance_archive_items(docs[config.ITEMS])
 
     def on_fetched_item_archive(self, doc):
-        if doc.get('assignment_id'):
-            assignment = self.find_one(req=None, _id=doc['assignment_id'])
-            doc['assignment'] = assignment.get('assigned_to') or {}
+        self._enhance_archive_items([doc])
 
     def _enhance_archive_items(self, docs):
-        ids = [str(item['assignment_id']) for item in docs if item.get('assignment_id')]
-        assignments = {str(item[config.ID_FIELD]): item for item in self.get_from_mongo(
-            req=None,
-            lookup={'_id': {'$in': ids}}
-        )}
+        ids = set(str(item['assignment_id']) for item in docs if item.get('assignment_id'))
+        if not ids:
+            # Most archive items are not linked to an assignment, nothing to look up
+            return
+
+        assignments = self.get_assignment_summaries(ids)
 
         for doc in docs:
-            if doc.get('assignment_id') in assignments:
-                doc['assignment'] = assignments[doc['assignment_id']].get('assigned_to') or {}
+            assigned_to = assignments.get(str(doc.get('assignment_id')))
+            if assigned_to is not None:
+                doc['assignment'] = deepcopy(assigned_to)
+
+    def get_assignment_summaries(self, ids):
+        """Get the ``assigned_to`` details of the assignments
+
+        The details are looked up in the request cache, then in the shared short lived cache,
+        and whatever is left is fetched from mongo in a single query projected on ``assigned_to``.
+
+        :param ids: iterable of assignment ids
+        :return dict: ``assigned_to`` details keyed by the assignment id as string
+        """
+        ids = set(str(_id) for _id in ids)
+        request_cache = get_request_cache(ASSIGNMENT_SUMMARY_CACHE)
+        summaries = {_id: request_cache[_id] for _id in ids if _id in request_cache}
+
+        missing = ids - set(summaries.keys())
+        if missing:
+            cached = assignment_summary_cache.get_many(missing)
+            summaries.update(cached)
+            missing -= set(cached.keys())
+
+        if missing:
+            req = ParsedRequest()
+            req.projection = json.dumps({'assigned_to': 1})
+            fetched = {str(item[config.ID_FIELD]): item.get('assigned_to') or {} for item in self.get_from_mongo(
+                req=req,
+                lookup={config.ID_FIELD: {'$in': list(missing)}}
+            )}
+            assignment_summary_cache.set_many(fetched)
+            summaries.update(fetched)
+
+        request_cache.update(summaries)
+        return summaries
 
     def on_create(self, docs):
         for doc in docs:
             self.set_assignment(doc)
 
     def on_created(self, docs):
+        self.update_workload([(None, doc.get('assigned_to')) for doc in docs])
+
         for doc in docs:
             self.notify('assignments:created', doc, {})
 
@@ -138,16 +191,108 @@ class AssignmentsService(superdesk.Service):
                 and updates.get('priority'):
             kwargs['priority'] = doc.get('priority')
 
+        if event_name == 'assignments:updated':
+            invalidate_assignment_cache([doc.get(config.ID_FIELD)])
+            kwargs.update(get_notification_changes(updates, original))
+
         push_notification(event_name, **kwargs)
 
     def on_updated(self, updates, original):
         self.notify('assignments:updated', updates, original)
         self.send_assignment_notification(updates, original)
 
+    def update(self, id, updates, original):
+        item = super().update(id, updates, original)
+        invalidate_assignment_cache([id])
+        self.update_workload([(original.get('assigned_to'), updates.get('assigned_to', original.get('assigned_to')))])
+        return item
+
     def system_update(self, id, updates, original):
         super().system_update(id, updates, original)
+        self.update_workload([(original.get('assigned_to'), updates.get('assigned_to', original.get('assigned_to')))])
         self.notify('assignments:updated', updates, original)
 
+    def on_deleted(self, doc):
+        invalidate_assignment_cache([doc.get(config.ID_FIELD)])
+        self.update_workload([(doc.get('assigned_to'), None)])
+
+    def update_workload(self, changes):
+        """Keep the desk and user workload counters in step with the assignments
+
+        :param list changes: list of (original assigned_to, new assigned_to) tuples
+        """
+        get_resource_service('assignments_workload').update_counters(changes)
+
+    def update_assignments(self, changes):
+        """Update many assignments with a single bulk write
+
+        The same hooks as for a single ``patch`` are run, the assignment rules before
+        the write and the cache, workload counters and notifications after it.
+
+        :param list changes: list of (original, updates) tuples
+        """
+        if not changes:
+            return
+
+        for original, updates in changes:
+            self.on_update(updates, original)
+
+            # the whole assigned_to is written, so merge it as eve does for a patch
+            if updates.get('assigned_to'):
+                assigned_to = deepcopy(original.get('assigned_to') or {})
+                assigned_to.update(updates['assigned_to'])
+                updates['assigned_to'] = assigned_to
+
+        ids = bulk_update(self.datasource, changes)
+        invalidate_assignment_cache(ids)
+        self.update_workload([
+            (original.get('assigned_to'), updates.get('assigned_to', original.get('assigned_to')))
+            for original, updates in changes
+        ])
+
+        for original, updates in changes:
+            self.on_updated(updates, original)
+
+    def get_assignment(self, assignment_id):
+        """Get the assignment, reading it from the database at most once per request
+
+        Archive hooks for the same content item (update, move, publish, lock and unlock)
+        all look up the related assignment, the request cache collapses these into a single read.
+        The cache entry is dropped whenever the assignment is updated through this service.
+
+        :param assignment_id: assignment id
+        :return dict: assignment or None if not found
+        """
+        if not assignment_id:
+            return None
+
+        cache = get_request_cache(ASSIGNMENT_CACHE)
+        key = str(assignment_id)
+        if key not in cache:
+            cache[key] = self.find_one(req=None, _id=assignment_id)
+
+        return cache[key]
+
+    def get_assignments(self, assignment_ids):
+        """Get many assignments with a single query, sharing the request cache with ``get_assignment``
+
+        :param assignment_ids: iterable of assignment ids
+        :return dict: assignments keyed by the assignment id as string, None for the ones not found
+        """
+        cache = get_request_cache(ASSIGNMENT_CACHE)
+        keys = set(str(assignment_id) for assignment_id in assignment_ids if assignment_id)
+        missing = [key for key in keys if key not in cache]
+
+        if missing:
+            fetched = {str(assignment[config.ID_FIELD]): assignment for assignment in self.get_from_mongo(
+                req=None,
+                lookup={config.ID_FIELD: {'$in': missing}}
+            )}
+            for key in missing:
+                cache[key] = fetched.get(key)
+
+        return {key: cache.get(key) for key in keys}
+
     def is_assignment_modified(self, updates, original):
         """Checks whether the assignment is modified or not"""
         updates_assigned_to = updates.get('assigned_to') or {}
@@ -192,44 +337,102 @@ class AssignmentsService(superdesk.Service):
         if not assignment:
             return
 
-        user = get_user()
-        assigned_to = assignment.get('assigned_to')
-        slugline = assignment.get('planning').get('slugline')
+        self.send_assignment_cancellation_notifications([assignment])
 
-        if assigned_to.get('desk'):
-            desk = get_resource_service('desks').find_one(req=None, _id=assigned_to.get('desk'))
-            notify_users = [str(member['user']) for member in desk.get('members', [])]
+    def send_assignment_cancellation_notifications(self, assignments):
+        """Send the cancellation activities for many assignments
 
-        if assigned_to.get('user'):
-            # Done to avoid fetching users data for every assignment
-            # Because user assigned can also be a provider whose qcode
-            # might be an invalid GUID, check if the user assigned is a valid user (GUID)
-            # However, in a rare case where qcode of a provider is a valid GUID,
-            # This will create activity records - inappropriate
-            if ObjectId.is_valid(assigned_to.get('user')):
-                notify_users = [assigned_to.get('user')]
+        Assignments notifying the same users are grouped into a single activity,
+        so cancelling a whole series does not flood the desk members with one activity per coverage.
 
-        add_activity(ACTIVITY_UPDATE,
-                     'Assignment {{slugline}} for desk {{desk}} has been cancelled by {{user}}',
-                     self.datasource,
-                     notify=notify_users,
-                     user=user.get('username')
-                     if str(user.get(config.ID_FIELD, None)) != assigned_to.get('user') else 'You',
-                     slugline=slugline,
-                     desk=desk.get('name'))
+        :param list assignments: the cancelled assignments (before the cancellation)
+        """
+        user = get_user()
+        groups = OrderedDict()
+        for assignment in assignments:
+            assigned_to = assignment.get('assigned_to')
+            desk = get_desk(assigned_to.get('desk')) or {}
+            notify_users = [str(member['user']) for member in desk.get('members') or []]
+
+            if assigned_to.get('user'):
+                # Done to avoid fetching users data for every assignment
+                # Because user assigned can also be a provider whose qcode
+                # might be an invalid GUID, check if the user assigned is a valid user (GUID)
+                # However, in a rare case where qcode of a provider is a valid GUID,
+                # This will create activity records - inappropriate
+                if ObjectId.is_valid(assigned_to.get('user')):
+                    notify_users = [assigned_to.get('user')]
+
+            user_name = user.get('username') \
+                if str(user.get(config.ID_FIELD, None)) != assigned_to.get('user') else 'You'
+            groups.setdefault((tuple(notify_users), desk.get('name'), user_name), []).append(assignment)
+
+        for (notify_users, desk_name, user_name), group in groups.items():
+            if len(group) == 1:
+                add_activity(ACTIVITY_UPDATE,
+                             'Assignment {{slugline}} for desk {{desk}} has been cancelled by {{user}}',
+                             self.datasource,
+                             notify=list(notify_users),
+                             user=user_name,
+                             slugline=group[0].get('planning').get('slugline'),
+                             desk=desk_name)
+            else:
+                add_activity(ACTIVITY_UPDATE,
+                             '{{count}} assignments for desk {{desk}} have been cancelled by {{user}}',
+                             self.datasource,
+                             notify=list(notify_users),
+                             user=user_name,
+                             count=len(group),
+                             desk=desk_name)
 
-    def cancel_assignment(self, original_assignment, coverage):
+    def _get_cancelled_assignment_updates(self, original_assignment, coverage):
         coverage_to_copy = deepcopy(coverage)
-        if original_assignment:
-            updated_assignment = {'assigned_to': {}}
-            updated_assignment.get('assigned_to').update(original_assignment.get('assigned_to'))
-            updated_assignment.get('assigned_to')['state'] = ASSIGNMENT_WORKFLOW_STATE.cancelled
-            updated_assignment['planning'] = coverage_to_copy.get('planning')
-            updated_assignment['planning']['news_coverage_status'] = coverage_to_copy.get('news_coverage_status')
+        updated_assignment = {'assigned_to': {}}
+        updated_assignment.get('assigned_to').update(original_assignment.get('assigned_to'))
+        updated_assignment.get('assigned_to')['state'] = ASSIGNMENT_WORKFLOW_STATE.cancelled
+        updated_assignment['planning'] = coverage_to_copy.get('planning')
+        updated_assignment['planning']['news_coverage_status'] = coverage_to_copy.get('news_coverage_status')
+        return updated_assignment
 
+    def cancel_assignment(self, original_assignment, coverage):
+        if original_assignment:
+            updated_assignment = self._get_cancelled_assignment_updates(original_assignment, coverage)
             self.system_update(ObjectId(original_assignment.get('_id')), updated_assignment, original_assignment)
             self.send_assignment_cancellation_notification(original_assignment)
 
+    def cancel_assignments(self, cancellations):
+        """Cancel many assignments with a single query and a single bulk write
+
+        Like ``cancel_assignment`` this is a system update, the etag of the assignments is kept.
+
+        :param list cancellations: list of (assignment id, cancelled coverage) tuples
+        """
+        assignments = self.get_assignments(assignment_id for assignment_id, coverage in cancellations)
+        changes = []
+        cancelled = set()
+        for assignment_id, coverage in cancellations:
+            original = assignments.get(str(assignment_id))
+            if not original or str(assignment_id) in cancelled:
+                continue
+
+            cancelled.add(str(assignment_id))
+            updates = self._get_cancelled_assignment_updates(original, coverage)
+            if original.get(config.ETAG):
+                updates[config.ETAG] = original[config.ETAG]
+            changes.append((original, updates))
+
+        if not changes:
+            return
+
+        ids = bulk_update(self.datasource, changes)
+        invalidate_assignment_cache(ids)
+        self.update_workload([(original.get('assigned_to'), updates['assigned_to']) for original, updates in changes])
+
+        for original, updates in changes:
+            self.notify('assignments:updated', updates, original)
+
+        self.send_assignment_cancellation_notifications([original for original, updates in changes])
+
     def _get_empty_updates_for_assignment(self, assignment):
         updated_assignment = {'assigned_to': {}}
         updated_assignment.get('assigned_to').update(assignment.get('assigned_to'))
@@ -248,9 +451,7 @@ class AssignmentsService(superdesk.Service):
         assignment_id = original.get('assignment_id')
         item_user_id = updates.get('version_creator')
         item_desk_id = updates.get('task', {}).get('desk')
-        assignment = None
-        if assignment_id:
-            assignment = self.find_one(req=None, _id=assignment_id)
+        assignment = self.get_assignment(assignment_id)
 
         return {
             'assignment_id': assignment_id,
@@ -275,6 +476,9 @@ class AssignmentsService(superdesk.Service):
             self._update_assignment_and_notify(updated_assignment, assignment_update_data.get('assignment'))
 
     def update_assignment_on_archive_operation(self, updates, original, operation=None):
+        if operation not in (ITEM_MOVE, ITEM_PUBLISH) or not original.get('assignment_id'):
+            return
+
         if operation == ITEM_MOVE:
             assignment_update_data = \
                 self._get_assignment_data_on_archive_update(updates, original)
@@ -308,27 +512,30 @@ class AssignmentsService(superdesk.Service):
         self.notify('assignments:updated', updates, original)
 
     def validate_assignment_lock(self, item, user_id):
-        if item.get('assignment_id'):
-            assignment_update_data = self._get_assignment_data_on_archive_update({}, item)
-            assignment = assignment_update_data.get('assignment')
-            if assignment and assignment.get('lock_user'):
-                if assignment['lock_session'] != get_auth()['_id'] or assignment['lock_user'] != user_id:
-                    raise SuperdeskApiError.badRequestError(message="Lock Failed: Related assignment is locked.")
+        if not item.get('assignment_id'):
+            return
+
+        assignment = self.get_assignment(item['assignment_id'])
+        if assignment and assignment.get('lock_user'):
+            if assignment['lock_session'] != get_auth()['_id'] or assignment['lock_user'] != user_id:
+                raise SuperdeskApiError.badRequestError(message="Lock Failed: Related assignment is locked.")
 
     def sync_assignment_lock(self, item, user_id):
-        if item.get('assignment_id'):
-            assignment_update_data = self._get_assignment_data_on_archive_update({}, item)
-            assignment = assignment_update_data.get('assignment')
-            lock_service = get_component(LockService)
-            lock_service.lock(assignment, user_id, get_auth()['_id'], 'content_edit', 'assignments')
+        if not item.get('assignment_id'):
+            return
+
+        assignment = self.get_assignment(item['assignment_id'])
+        lock_service = get_component(LockService)
+        lock_service.lock(assignment, user_id, get_auth()['_id'], 'content_edit', 'assignments')
 
     def sync_assignment_unlock(self, item, user_id):
-        if item.get('assignment_id'):
-            assignment_update_data = self._get_assignment_data_on_archive_update({}, item)
-            assignment = assignment_update_data.get('assignment')
-            if assignment.get(LOCK_USER):
-                lock_service = get_component(LockService)
-                lock_service.unlock(assignment, user_id, get_auth()['_id'], 'assignments')
+        if not item.get('assignment_id'):
+            return
+
+        assignment = self.get_assignment(item['assignment_id'])
+        if assignment and assignment.get(LOCK_USER):
+            lock_service = get_component(LockService)
+            lock_service.unlock(assignment, user_id, get_auth()['_id'], 'assignments')
 
     def can_edit(self, item, user_id):
         # Check privileges
@@ -399,7 +606,8 @@ class AssignmentsResource(superdesk.Resource):
 
     mongo_indexes = {
         'coverage_item_1': ([('coverage_item', 1)], {'background': True}),
-        'planning_item_1': ([('planning_item', 1)], {'background': True})
+        'planning_item_1': ([('planning_item', 1)], {'background': True}),
+        'lock_session_1': ([('lock_session', 1)], {'background': True})
     }
 
     datasource = {
@@ -0,0 +1,147 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Reassign many assignments to another desk and/or user in one request"""
+
+from copy import deepcopy
+from bson import ObjectId
+from eve.utils import config
+from superdesk import Resource, get_resource_service
+from superdesk.services import BaseService
+from superdesk.errors import SuperdeskApiError
+from superdesk.activity import add_activity, ACTIVITY_UPDATE
+from apps.archive.common import get_user, get_auth
+from .bulk import bulk_update
+from .common import remove_lock_information
+from .item_lock import LOCK_USER, LOCK_SESSION
+
+
+class AssignmentsBulkReassignService(BaseService):
+    def create(self, docs):
+        ids = []
+        for doc in docs:
+            assignments = self._get_assignments(doc['assignment_ids'])
+            changes = self._get_changes(assignments, doc['assigned_to'])
+            bulk_update('assignments', changes)
+            get_resource_service('assignments').update_workload([
+                (original.get('assigned_to'), updates['assigned_to']) for original, updates in changes
+            ])
+            self._send_notifications(changes)
+
+            doc[config.ID_FIELD] = ObjectId()
+            doc['assignment_ids'] = [str(original[config.ID_FIELD]) for original, updates in changes]
+            ids.append(doc[config.ID_FIELD])
+
+        return ids
+
+    def _get_assignments(self, assignment_ids):
+        ids = list(set(assignment_ids))
+        assignments = list(get_resource_service('assignments').get_from_mongo(
+            req=None,
+            lookup={config.ID_FIELD: {'$in': ids}}
+        ))
+
+        if len(assignments) != len(ids):
+            found = set(str(assignment[config.ID_FIELD]) for assignment in assignments)
+            missing = [_id for _id in ids if str(_id) not in found]
+            raise SuperdeskApiError.badRequestError(
+                message='Assignments not found: {}'.format(', '.join(missing))
+            )
+
+        return assignments
+
+    def _get_changes(self, assignments, assigned_to):
+        """Validate the reassignment of every assignment before anything is written
+
+        The same rules as for a single assignment update apply (see ``AssignmentsService.set_assignment``),
+        so a single invalid assignment fails the whole request.
+
+        :return list: list of (original, updates) tuples
+        """
+        assignments_service = get_resource_service('assignments')
+        user_id = str(get_user().get(config.ID_FIELD, ''))
+        session_id = str(get_auth().get(config.ID_FIELD, ''))
+        changes = []
+
+        for original in assignments:
+            locked_by = (str(original[LOCK_USER]), str(original.get(LOCK_SESSION))) if original.get(LOCK_USER) else None
+            if locked_by and locked_by != (user_id, session_id):
+                raise SuperdeskApiError.forbiddenError(
+                    message='Assignment {} is locked by another user.'.format(original[config.ID_FIELD])
+                )
+
+            updates = {'assigned_to': deepcopy(assigned_to)}
+            assignments_service.set_assignment(updates, original)
+            remove_lock_information(updates)
+
+            merged_assigned_to = deepcopy(original.get('assigned_to') or {})
+            merged_assigned_to.update(updates['assigned_to'])
+            updates['assigned_to'] = merged_assigned_to
+            changes.append((original, updates))
+
+        return changes
+
+    def _send_notifications(self, changes):
+        """Notify clients of every updated assignment, and each assignee once for all their new assignments"""
+        assignments_service = get_resource_service('assignments')
+        user = get_user()
+        new_assignments = {}
+
+        for original, updates in changes:
+            assignments_service.notify('assignments:updated', updates, original)
+
+            assignee = updates['assigned_to'].get('user')
+            if assignee and ObjectId.is_valid(assignee) and \
+                    assignments_service.is_assignment_modified(updates, original):
+                new_assignments[assignee] = new_assignments.get(assignee, 0) + 1
+
+        for assignee, count in new_assignments.items():
+            is_self = str(user.get(config.ID_FIELD, None)) == assignee
+            add_activity(ACTIVITY_UPDATE,
+                         '{{assignor}} assigned {{count}} coverage(s) to {{assignee}}',
+                         'assignments',
+                         notify=[assignee],
+                         assignor='You' if is_self else user.get('username'),
+                         assignee='yourself' if is_self else 'you',
+                         count=count)
+
+
+class AssignmentsBulkReassignResource(Resource):
+    endpoint_name = resource_title = 'assignments_bulk_reassign'
+    url = 'assignments/bulk_reassign'
+    schema = {
+        'assignment_ids': {
+            'type': 'list',
+            'required': True,
+            'minlength': 1,
+            'schema': {'type': 'string'}
+        },
+        'assigned_to': {
+            'type': 'dict',
+            'required': True,
+            'schema': {
+                'desk': {'type': 'string', 'required': True},
+                'user': {'type': 'string', 'nullable': True},
+                'coverage_provider': {
+                    'type': 'dict',
+                    'nullable': True,
+                    'schema': {
+                        'qcode': {'type': 'string'},
+                        'name': {'type': 'string'}
+                    }
+                }
+            }
+        }
+    }
+
+    resource_methods = ['POST']
+    item_methods = []
+
+    privileges = {'POST': 'planning'}
@@ -8,13 +8,14 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+from superdesk import get_resource_service
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from superdesk.errors import SuperdeskApiError
 from apps.archive.common import get_user, get_auth
 from eve.utils import config
 from copy import deepcopy
-from .assignments import AssignmentsResource, assignments_schema
+from .assignments import AssignmentsResource, assignments_schema, invalidate_assignment_cache
 from .common import ASSIGNMENT_WORKFLOW_STATE, remove_lock_information
 
 
@@ -47,6 +48,8 @@ class AssignmentsCompleteService(BaseService):
         remove_lock_information(updates)
 
         item = self.backend.update(self.datasource, id, updates, original)
+        invalidate_assignment_cache([original[config.ID_FIELD]])
+        get_resource_service('assignments').update_workload([(original.get('assigned_to'), updates.get('assigned_to'))])
 
         push_notification(
             'assignments:completed',
@@ -13,9 +13,9 @@ from eve.utils import config
 from apps.archive.common import insert_into_versions
 from apps.auth import get_user_id
 from apps.templates.content_templates import get_item_from_template
-from planning.planning_export import get_desk_template
 from superdesk.errors import SuperdeskApiError
-from .common import ASSIGNMENT_WORKFLOW_STATE
+from .common import ASSIGNMENT_WORKFLOW_STATE, get_desks
+from .delivery import get_delivered_assignment_ids
 
 FIELDS_TO_COPY = ('anpa_category', 'subject', 'urgency')
 
@@ -27,16 +27,65 @@ def get_item_from_assignment(assignment, template=None):
     :param string template string: name of template to use
     :return dict: item
     """
-    item = {}
     if not assignment:
-        return item
-
-    desk_id = assignment.get('assigned_to').get('desk')
-    desk = superdesk.get_resource_service('desks').find_one(req=None, _id=desk_id)
-    if template is not None:
-        template = superdesk.get_resource_service('content_templates').find_one(req=None, template_name=template)
-    else:
-        template = get_desk_template(desk)
+        return {}
+
+    return get_items_from_assignments([(assignment, template)])[0]
+
+
+def get_items_from_assignments(assignments):
+    """Get the items for many assignments
+
+    The desks, templates and planning items of all the assignments are fetched
+    with one query each.
+
+    :param list assignments: list of (assignment, template name) tuples
+    :return list: items in the same order as the assignments
+    """
+    desks = get_desks(assignment.get('assigned_to').get('desk') for assignment, template in assignments)
+    templates_service = superdesk.get_resource_service('content_templates')
+
+    template_names = list(set(template for assignment, template in assignments if template is not None))
+    templates_by_name = {}
+    if template_names:
+        for template in templates_service.get_from_mongo(req=None, lookup={'template_name': {'$in': template_names}}):
+            templates_by_name.setdefault(template['template_name'], template)
+
+    desk_template_ids = list(set(
+        str(desk['default_content_template']) for desk in desks.values() if desk.get('default_content_template')
+    ))
+    desk_templates = {}
+    if desk_template_ids:
+        desk_templates = {str(template[config.ID_FIELD]): template for template in templates_service.get_from_mongo(
+            req=None,
+            lookup={config.ID_FIELD: {'$in': desk_template_ids}}
+        )}
+
+    planning_ids = list(set(
+        assignment['planning_item'] for assignment, template in assignments if assignment.get('planning_item')
+    ))
+    planning_items = {}
+    if planning_ids:
+        planning_items = {planning[config.ID_FIELD]: planning for planning in superdesk.get_resource_service(
+            'planning'
+        ).get_from_mongo(req=None, lookup={config.ID_FIELD: {'$in': planning_ids}})}
+
+    items = []
+    for assignment, template in assignments:
+        desk = desks.get(str(assignment.get('assigned_to').get('desk')))
+        if template is not None:
+            template = templates_by_name.get(template)
+        elif desk.get('default_content_template'):
+            template = desk_templates.get(str(desk['default_content_template']))
+        else:
+            template = {}
+
+        items.append(_get_item(assignment, desk, template, planning_items.get(assignment.get('planning_item'))))
+
+    return items
+
+
+def _get_item(assignment, desk, template, planning):
     item = get_item_from_template(template)
 
     slugline = (assignment.get('planning') or {}).get('slugline')
@@ -46,20 +95,17 @@ def get_item_from_assignment(assignment, template=None):
 
     ednote = (assignment.get('planning') or {}).get('ednote')
 
-    planning_item = assignment.get('planning_item')
     # we now merge planning data if they are set
-    if planning_item is not None:
-        planning = superdesk.get_resource_service('planning').find_one(req=None, _id=planning_item)
-        if planning is not None:
-            for field in FIELDS_TO_COPY:
-                if planning.get(field):
-                    item[field] = planning[field]
-            # when creating planning item from news item, we use headline for description_text
-            # so we are doing the opposite here
-            if planning.get('description_text'):
-                item['headline'] = planning['description_text']
-            elif planning.get('headline'):
-                item['headline'] = planning['headline']
+    if planning is not None:
+        for field in FIELDS_TO_COPY:
+            if planning.get(field):
+                item[field] = planning[field]
+        # when creating planning item from news item, we use headline for description_text
+        # so we are doing the opposite here
+        if planning.get('description_text'):
+            item['headline'] = planning['description_text']
+        elif planning.get('headline'):
+            item['headline'] = planning['headline']
 
     if ednote:
         item['ednote'] = ednote
@@ -76,59 +122,75 @@ def get_item_from_assignment(assignment, template=None):
 class AssignmentsContentService(superdesk.Service):
 
     def on_create(self, docs):
+        assignments = superdesk.get_resource_service('assignments').get_assignments(
+            doc.get('assignment_id') for doc in docs
+        )
+        delivered = get_delivered_assignment_ids(
+            assignment[config.ID_FIELD] for assignment in assignments.values() if assignment
+        )
+
         for doc in docs:
-            self._validate(doc)
+            self._validate(doc, assignments, delivered)
+            # an assignment can only get content once, so it cannot be repeated in the request
+            delivered.add(str(doc.get('assignment_id')))
 
     def create(self, docs):
-        ids = []
         production = superdesk.get_resource_service('archive')
         assignments_service = superdesk.get_resource_service('assignments')
-        for doc in docs:
-            assignment = assignments_service.find_one(req=None, _id=doc.pop('assignment_id'))
-            item = get_item_from_assignment(assignment, doc.pop('template_name', None))
+        assignments = assignments_service.get_assignments(doc['assignment_id'] for doc in docs)
+
+        assignments = [
+            (assignments[str(doc.pop('assignment_id'))], doc.pop('template_name', None)) for doc in docs
+        ]
+        items = get_items_from_assignments(assignments)
+        for item, (assignment, template) in zip(items, assignments):
             item[config.VERSION] = 1
             item.setdefault('type', 'text')
             item.setdefault('slugline', 'Planning')
             item['assignment_id'] = assignment[config.ID_FIELD]
 
-            # create content
-            ids = production.post([item])
+        # create content
+        ids = production.post(items)
+        for item in items:
             insert_into_versions(doc=item)
 
-            # create delivery references
-            superdesk.get_resource_service('delivery').post([{
-                'item_id': item[config.ID_FIELD],
-                'assignment_id': assignment[config.ID_FIELD],
-                'planning_id': assignment['planning_item'],
-                'coverage_id': assignment['coverage_item']
-            }])
-
-            # set the assignment to in progress
-            assignments_service.patch(assignment[config.ID_FIELD],
-                                      {
-                                          'assigned_to': {
-                                              'user': str(item.get('task').get('desk')),
-                                              'desk': str(item.get('task').get('desk')),
-                                              'state': ASSIGNMENT_WORKFLOW_STATE.IN_PROGRESS
-                                          }}
-                                      )
+        # create delivery references
+        superdesk.get_resource_service('delivery').post([{
+            'item_id': item[config.ID_FIELD],
+            'assignment_id': assignment[config.ID_FIELD],
+            'planning_id': assignment['planning_item'],
+            'coverage_id': assignment['coverage_item']
+        } for item, (assignment, template) in zip(items, assignments)])
+
+        # set the assignments to in progress
+        assignments_service.update_assignments([(assignment, {
+            'assigned_to': {
+                'user': str(item.get('task').get('desk')),
+                'desk': str(item.get('task').get('desk')),
+                'state': ASSIGNMENT_WORKFLOW_STATE.IN_PROGRESS
+            }
+        }) for item, (assignment, template) in zip(items, assignments)])
+
+        for doc, item in zip(docs, items):
             doc.update(item)
-            ids.append(doc['_id'])
+
         return ids
 
-    def _validate(self, doc):
-        """Validate the doc for content creation"""
-        assignment = superdesk.get_resource_service('assignments').find_one(req=None,
-                                                                            _id=doc.get('assignment_id'))
+    def _validate(self, doc, assignments, delivered):
+        """Validate the doc for content creation
+
+        :param dict doc: content creation request
+        :param dict assignments: prefetched assignments keyed by id
+        :param set delivered: ids of the assignments that already have content
+        """
+        assignment = assignments.get(str(doc.get('assignment_id')))
         if not assignment:
             raise SuperdeskApiError.badRequestError('Assignment not found.')
 
         if assignment.get('assigned_to').get('state') != ASSIGNMENT_WORKFLOW_STATE.ASSIGNED:
             raise SuperdeskApiError.badRequestError('Assignment workflow started. Cannot create content.')
 
-        delivery = superdesk.get_resource_service('delivery').find_one(req=None,
-                                                                       assignment_id=assignment.get(config.ID_FIELD))
-        if delivery:
+        if str(assignment.get(config.ID_FIELD)) in delivered:
             raise SuperdeskApiError.badRequestError('Content already exists for the assignment. '
                                                     'Cannot create content.')
 
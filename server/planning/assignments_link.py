@@ -11,87 +11,124 @@ from superdesk.errors import SuperdeskApiError
 from superdesk.metadata.item import ITEM_STATE, CONTENT_STATE, PUBLISH_STATES
 from eve.utils import config
 from .common import ASSIGNMENT_WORKFLOW_STATE
+from .cache import get_request_cache, clear_request_cache
+from .bulk import bulk_update
+from .delivery import get_delivered_assignment_ids
 from apps.archive.common import get_user, is_assigned_to_a_desk
 from apps.content import push_content_notification
 
 
+ARCHIVE_ITEMS_CACHE = 'assignments_link_items'
+
+
+def get_archive_items(item_ids):
+    """Get many archive items with a single query, at most once per request
+
+    :param item_ids: iterable of item ids
+    :return dict: items keyed by id, None for the ones not found
+    """
+    cache = get_request_cache(ARCHIVE_ITEMS_CACHE)
+    keys = set(str(item_id) for item_id in item_ids if item_id)
+    missing = [key for key in keys if key not in cache]
+
+    if missing:
+        fetched = {str(item[config.ID_FIELD]): item for item in get_resource_service('archive').get_from_mongo(
+            req=None,
+            lookup={config.ID_FIELD: {'$in': missing}}
+        )}
+        for key in missing:
+            cache[key] = fetched.get(key)
+
+    return {key: cache.get(key) for key in keys}
+
+
 class AssignmentsLinkService(Service):
     def on_create(self, docs):
+        assignments = get_resource_service('assignments').get_assignments(doc.get('assignment_id') for doc in docs)
+        items = get_archive_items(doc.get('item_id') for doc in docs)
+        delivered = get_delivered_assignment_ids(
+            assignment[config.ID_FIELD] for assignment in assignments.values() if assignment
+        )
+        linked_items = set()
+
         for doc in docs:
-            self._validate(doc)
+            self._validate(doc, assignments, items, delivered, linked_items)
+            # neither the assignment nor the item can be linked twice in the same request
+            delivered.add(str(doc.get('assignment_id')))
+            linked_items.add(str(doc.get('item_id')))
 
     def create(self, docs):
         ids = []
-        production = get_resource_service('archive')
         assignments_service = get_resource_service('assignments')
         assignments_complete = get_resource_service('assignments_complete')
+        assignments = assignments_service.get_assignments(doc['assignment_id'] for doc in docs)
+        archive_items = get_archive_items(doc['item_id'] for doc in docs)
+        user = get_user()
+        assignment_changes = []
+        item_changes = []
+        deliveries = []
         items = []
 
         for doc in docs:
-            assignment = assignments_service.find_one(req=None, _id=doc.pop('assignment_id'))
-            item = production.find_one(req=None, _id=doc.pop('item_id'))
+            assignment = assignments[str(doc.pop('assignment_id'))]
+            item = archive_items[str(doc.pop('item_id'))]
+            is_published = item.get(ITEM_STATE) in [CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED]
 
             # set the state to in progress if item in published state
             updates = {'assigned_to': deepcopy(assignment.get('assigned_to'))}
-            updates['assigned_to']['state'] = ASSIGNMENT_WORKFLOW_STATE.COMPLETED if \
-                item.get(ITEM_STATE) in [CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED] else \
+            updates['assigned_to']['state'] = ASSIGNMENT_WORKFLOW_STATE.COMPLETED if is_published else \
                 ASSIGNMENT_WORKFLOW_STATE.IN_PROGRESS
 
             # on fulfiling the assignment the user is assigned the assignment.
-            user = get_user()
             if user and str(user.get(config.ID_FIELD)) != (assignment.get('assigned_to') or {}).get('user'):
                 updates['assigned_to']['user'] = str(user.get(config.ID_FIELD))
 
-            if item.get(ITEM_STATE) in [CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED]:
+            if is_published:
                 assignments_complete.update(assignment[config.ID_FIELD], updates, assignment)
             else:
-                assignments_service.patch(assignment[config.ID_FIELD], updates)
+                assignment_changes.append((assignment, updates))
 
             # reference the item to the assignment
-            production.system_update(
-                item[config.ID_FIELD],
-                {'assignment_id': assignment[config.ID_FIELD]},
-                item
-            )
-
-            # if the item is publish then update those items as well
-            if item.get(ITEM_STATE) in PUBLISH_STATES:
-                get_resource_service('published').update_published_items(
-                    item[config.ID_FIELD],
-                    'assignment_id', assignment[config.ID_FIELD])
+            item_changes.append((item, {'assignment_id': assignment[config.ID_FIELD]}))
 
-            get_resource_service('delivery').post([{
+            deliveries.append({
                 'item_id': item[config.ID_FIELD],
                 'assignment_id': assignment[config.ID_FIELD],
                 'planning_id': assignment['planning_item'],
                 'coverage_id': assignment['coverage_item']
-            }])
+            })
 
             doc.update(item)
             ids.append(doc[config.ID_FIELD])
             items.append(item)
 
+        assignments_service.update_assignments(assignment_changes)
+        bulk_update('archive', item_changes)
+
+        # if the item is publish then update those items as well
+        for item, updates in item_changes:
+            if item.get(ITEM_STATE) in PUBLISH_STATES:
+                get_resource_service('published').update_published_items(
+                    item[config.ID_FIELD],
+                    'assignment_id', updates['assignment_id'])
+
+        get_resource_service('delivery').post(deliveries)
+        clear_request_cache(ARCHIVE_ITEMS_CACHE, [str(item[config.ID_FIELD]) for item in items])
+
         push_content_notification(items)
         return ids
 
-    def _validate(self, doc):
-        assignment = get_resource_service('assignments').find_one(
-            req=None,
-            _id=doc.get('assignment_id')
-        )
-
-        if not assignment:
+    def _validate(self, doc, assignments, items, delivered, linked_items):
+        """Validate the doc against the prefetched assignments, items and deliveries"""
+        if not assignments.get(str(doc.get('assignment_id'))):
             raise SuperdeskApiError.badRequestError('Assignment not found.')
 
-        item = get_resource_service('archive').find_one(
-            req=None,
-            _id=doc.get('item_id')
-        )
+        item = items.get(str(doc.get('item_id')))
 
         if not item:
             raise SuperdeskApiError.badRequestError('Content item not found.')
 
-        if item.get('assignment_id'):
+        if item.get('assignment_id') or str(doc.get('item_id')) in linked_items:
             raise SuperdeskApiError.badRequestError(
                 'Content is already linked to an assignment. Cannot link assignment and content.'
             )
@@ -101,12 +138,7 @@ class AssignmentsLinkService(Service):
                 'Content not in workflow. Cannot link assignment and content.'
             )
 
-        delivery = get_resource_service('delivery').find_one(
-            req=None,
-            assignment_id=doc.get('assignment_id')
-        )
-
-        if delivery:
+        if str(doc.get('assignment_id')) in delivered:
             raise SuperdeskApiError.badRequestError(
                 'Content already exists for the assignment. Cannot link assignment and content.'
             )
@@ -0,0 +1,171 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Assignment counters per desk and user, for each assignment workflow state"""
+
+import logging
+from collections import Counter
+from pymongo import UpdateOne, ReplaceOne, DeleteOne
+from superdesk import Resource
+from superdesk.services import BaseService
+from superdesk.resource import not_analyzed
+from .bulk import get_collection
+from .common import assignment_workflow_state
+
+logger = logging.getLogger(__name__)
+
+WORKLOAD_DESK = 'desk'
+WORKLOAD_USER = 'user'
+
+
+def get_workload_id(entity_type, entity_id):
+    return '{}:{}'.format(entity_type, entity_id)
+
+
+def get_workload_keys(assigned_to):
+    """Get the (entity_type, entity_id, state) counter keys an assignment counts towards"""
+    assigned_to = assigned_to or {}
+    state = assigned_to.get('state')
+    if not state:
+        return []
+
+    keys = []
+    if assigned_to.get('desk'):
+        keys.append((WORKLOAD_DESK, str(assigned_to['desk']), state))
+    if assigned_to.get('user'):
+        keys.append((WORKLOAD_USER, str(assigned_to['user']), state))
+    return keys
+
+
+def get_workload_deltas(changes):
+    """Compute the counter changes for a list of assignment changes
+
+    :param list changes: list of (original assigned_to, new assigned_to) tuples,
+        use None as the original for new assignments and as the new value for deleted ones
+    :return dict: counter increments keyed by (entity_type, entity_id, state)
+    """
+    deltas = Counter()
+    for original, updated in changes:
+        for key in get_workload_keys(original):
+            deltas[key] -= 1
+        for key in get_workload_keys(updated):
+            deltas[key] += 1
+
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+class AssignmentsWorkloadService(BaseService):
+
+    def update_counters(self, changes):
+        """Update the counters for the assignment changes with a single bulk write
+
+        The counters are only a read optimisation, a failure here is logged and
+        corrected by the next reconciliation instead of failing the assignment update.
+
+        :param list changes: list of (original assigned_to, new assigned_to) tuples
+        """
+        deltas = get_workload_deltas(changes)
+        if not deltas:
+            return
+
+        operations = [UpdateOne(
+            {'_id': get_workload_id(entity_type, entity_id)},
+            {
+                '$inc': {'counts.{}'.format(state): delta},
+                '$set': {'entity_type': entity_type, 'entity_id': entity_id}
+            },
+            upsert=True
+        ) for (entity_type, entity_id, state), delta in deltas.items()]
+
+        try:
+            get_collection(self.datasource).bulk_write(operations, ordered=False)
+        except Exception:
+            logger.exception('Failed to update assignment workload counters')
+
+    def get_actual_counters(self):
+        """Compute the counters from the assignments collection with a mongo aggregation"""
+        pipeline = [
+            {'$match': {'assigned_to.state': {'$in': assignment_workflow_state}}},
+            {'$group': {
+                '_id': {
+                    'desk': '$assigned_to.desk',
+                    'user': '$assigned_to.user',
+                    'state': '$assigned_to.state'
+                },
+                'count': {'$sum': 1}
+            }}
+        ]
+
+        counters = {}
+        for group in get_collection('assignments').aggregate(pipeline, allowDiskUse=True):
+            for entity_type, entity_id, state in get_workload_keys(group['_id']):
+                _id = get_workload_id(entity_type, entity_id)
+                counter = counters.setdefault(_id, {
+                    '_id': _id,
+                    'entity_type': entity_type,
+                    'entity_id': entity_id,
+                    'counts': {workflow_state: 0 for workflow_state in assignment_workflow_state}
+                })
+                counter['counts'][state] += group['count']
+
+        return counters
+
+    def reconcile(self):
+        """Correct any drift between the counters and the assignments collection
+
+        :return int: number of counters that were corrected
+        """
+        collection = get_collection(self.datasource)
+        actual = self.get_actual_counters()
+        operations = []
+
+        for stored in collection.find():
+            expected = actual.pop(stored['_id'], None)
+            if expected is None:
+                operations.append(DeleteOne({'_id': stored['_id']}))
+            elif any((stored.get('counts') or {}).get(state, 0) != count
+                     for state, count in expected['counts'].items()):
+                operations.append(ReplaceOne({'_id': stored['_id']}, expected))
+
+        operations.extend(ReplaceOne({'_id': counter['_id']}, counter, upsert=True) for counter in actual.values())
+
+        if operations:
+            logger.warning('Correcting {} assignment workload counters'.format(len(operations)))
+            collection.bulk_write(operations, ordered=False)
+
+        return len(operations)
+
+
+class AssignmentsWorkloadResource(Resource):
+    endpoint_name = resource_title = 'assignments_workload'
+    url = 'assignments/workload'
+    schema = {
+        'entity_type': {
+            'type': 'string',
+            'allowed': [WORKLOAD_DESK, WORKLOAD_USER],
+            'mapping': not_analyzed
+        },
+        'entity_id': {
+            'type': 'string',
+            'mapping': not_analyzed
+        },
+        'counts': {
+            'type': 'dict',
+            'schema': {state: {'type': 'integer'} for state in assignment_workflow_state}
+        }
+    }
+
+    datasource = {'source': 'assignments_workload'}
+    resource_methods = ['GET']
+    item_methods = []
+
+    mongo_indexes = {
+        'entity_type_1_entity_id_1': ([('entity_type', 1), ('entity_id', 1)], {'background': True})
+    }
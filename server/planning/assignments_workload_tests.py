@@ -0,0 +1,53 @@
+import unittest
+from datetime import timedelta
+
+from planning.assignments_workload import get_workload_deltas, get_workload_keys
+from planning.tests import TestCase
+
+
+class AssignmentsWorkloadTestCase(unittest.TestCase):
+
+    def test_workload_keys(self):
+        self.assertEqual(get_workload_keys(None), [])
+        self.assertEqual(get_workload_keys({'desk': 'sports'}), [])
+        self.assertEqual(get_workload_keys({'desk': 'sports', 'user': 'foo', 'state': 'assigned'}), [
+            ('desk', 'sports', 'assigned'),
+            ('user', 'foo', 'assigned'),
+        ])
+
+    def test_new_and_deleted_assignments(self):
+        self.assertEqual(get_workload_deltas([
+            (None, {'desk': 'sports', 'user': 'foo', 'state': 'assigned'}),
+            ({'desk': 'sports', 'state': 'in_progress'}, None),
+        ]), {
+            ('desk', 'sports', 'assigned'): 1,
+            ('user', 'foo', 'assigned'): 1,
+            ('desk', 'sports', 'in_progress'): -1,
+        })
+
+    def test_state_transition_and_reassignment(self):
+        self.assertEqual(get_workload_deltas([
+            ({'desk': 'sports', 'user': 'foo', 'state': 'in_progress'},
+             {'desk': 'sports', 'user': 'foo', 'state': 'completed'}),
+            ({'desk': 'sports', 'user': 'foo', 'state': 'assigned'},
+             {'desk': 'politics', 'user': 'foo', 'state': 'assigned'}),
+        ]), {
+            ('desk', 'sports', 'in_progress'): -1,
+            ('user', 'foo', 'in_progress'): -1,
+            ('desk', 'sports', 'completed'): 1,
+            ('user', 'foo', 'completed'): 1,
+            ('desk', 'sports', 'assigned'): -1,
+            ('desk', 'politics', 'assigned'): 1,
+        })
+
+    def test_unchanged_assignment(self):
+        assigned_to = {'desk': 'sports', 'user': 'foo', 'state': 'assigned'}
+        self.assertEqual(get_workload_deltas([(assigned_to, dict(assigned_to))]), {})
+
+
+class ReconcileScheduleTestCase(TestCase):
+
+    def test_reconcile_task_is_scheduled(self):
+        entry = self.app.config['CELERY_BEAT_SCHEDULE']['planning:reconcile_assignment_workload']
+        self.assertEqual(entry['task'], 'planning.commands.reconcile_assignment_workload.reconcile_assignment_workload')
+        self.assertEqual(entry['schedule'], timedelta(minutes=15))
@@ -0,0 +1,167 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Bulk write helpers for the planning resources
+
+These write directly to mongo and elastic, so service hooks are not run.
+Callers are responsible for validation, history and notifications.
+"""
+
+import logging
+from pymongo import UpdateOne
+from elasticsearch import helpers
+from flask import current_app as app
+from eve.utils import config
+from eve.methods.common import resolve_document_etag
+from superdesk import get_resource_service
+from superdesk.utc import utcnow
+from .identity_map import invalidate_identity_map
+from .query_stats import record_query
+
+logger = logging.getLogger(__name__)
+
+
+def get_collection(resource):
+    """Get the mongo collection used by the resource"""
+    source = app.config['DOMAIN'][resource]['datasource']['source']
+    return app.data.get_mongo_collection(source)
+
+
+def bulk_update(resource, changes, projected=False):
+    """Apply many updates to the resource with a single mongo bulk write
+
+    ``_updated`` and ``_etag`` are set on every update the same way the
+    backend does for a single update, and the updated items are then
+    re-indexed in elastic (if the resource has a search backend).
+    The etags are computed from the full documents, as the backend does: if the
+    originals are ``projected`` the full documents are read with a single query.
+
+    :param str resource: resource name
+    :param list changes: list of (original, updates) tuples
+    :param bool projected: the originals only hold some of the fields
+    :return list: ids of the updated items
+    """
+    if not changes:
+        return []
+
+    documents = {}
+    missing = [original[config.ID_FIELD] for original, updates in changes if config.ETAG not in updates]
+    if projected and missing:
+        record_query('mongo', resource, 'find')
+        documents = {doc[config.ID_FIELD]: doc for doc in get_collection(resource).find({
+            config.ID_FIELD: {'$in': missing}
+        })}
+
+    now = utcnow()
+    operations = []
+    ids = []
+    for original, updates in changes:
+        updates.setdefault(config.LAST_UPDATED, now)
+        if config.ETAG not in updates:
+            updated = dict(documents.get(original[config.ID_FIELD]) or original)
+            updated.update(updates)
+            resolve_document_etag(updated, resource)
+            updates[config.ETAG] = updated[config.ETAG]
+
+        ids.append(original[config.ID_FIELD])
+        operations.append(UpdateOne({config.ID_FIELD: original[config.ID_FIELD]}, {'$set': updates}))
+
+    record_query('mongo', resource, 'bulk_write')
+    get_collection(resource).bulk_write(operations, ordered=False)
+    invalidate_identity_map(resource, ids)
+    reindex(resource, ids)
+    return ids
+
+
+def bulk_insert(resource, docs):
+    """Insert many documents into the resource with a single mongo insert
+
+    :param str resource: resource name
+    :param list docs: documents to insert
+    :return list: ids of the inserted documents
+    """
+    if not docs:
+        return []
+
+    now = utcnow()
+    for doc in docs:
+        doc.setdefault(config.DATE_CREATED, now)
+        doc.setdefault(config.LAST_UPDATED, now)
+
+    resolve_document_etag(docs, resource)
+    record_query('mongo', resource, 'insert_many')
+    get_collection(resource).insert_many(docs, ordered=True)
+    invalidate_identity_map(resource, [doc[config.ID_FIELD] for doc in docs])
+    get_resource_service(resource).backend.create_in_search(resource, docs)
+    return [doc[config.ID_FIELD] for doc in docs]
+
+
+def bulk_delete(resource, ids, lookup=None):
+    """Delete many items from mongo and elastic, with a single request to each
+
+    Items are removed from mongo first, and only the items mongo removed are then removed
+    from elastic. With a ``lookup`` only the items still matching it when they are removed
+    are deleted, i.e. ``{'lock_user': None}`` keeps the items locked meanwhile.
+
+    :param str resource: resource name
+    :param list ids: ids of the items to delete
+    :param dict lookup: mongo lookup the deleted items must match
+    :return list: ids of the deleted items
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+
+    collection = get_collection(resource)
+    query = {config.ID_FIELD: {'$in': ids}}
+    record_query('mongo', resource, 'delete_many')
+    result = collection.delete_many({'$and': [query, lookup]} if lookup else query)
+    if lookup and result.deleted_count < len(ids):
+        record_query('mongo', resource, 'find')
+        kept = set(doc[config.ID_FIELD] for doc in collection.find(query, [config.ID_FIELD]))
+        ids = [_id for _id in ids if _id not in kept]
+    invalidate_identity_map(resource, ids)
+
+    if ids and has_search_backend(resource):
+        record_query('elastic', resource, 'bulk')
+        _success, errors = helpers.bulk(app.data.elastic.es, ({
+            '_op_type': 'delete',
+            '_index': get_search_index(resource),
+            '_type': resource,
+            '_id': str(_id)
+        } for _id in ids), raise_on_error=False, refresh=True)
+
+        for error in errors:
+            failure = error.get('delete', {})
+            if failure.get('status') != 404:
+                logger.error('Failed to remove {} {} from elastic: {}'.format(resource, failure.get('_id'), failure))
+
+    return ids
+
+
+def get_search_index(resource):
+    """Get the elastic index used by the resource"""
+    return app.config.get('ELASTICSEARCH_INDEXES', {}).get(resource, app.data.elastic.index)
+
+
+def has_search_backend(resource):
+    return bool(app.config['DOMAIN'][resource]['datasource'].get('search_backend'))
+
+
+def reindex(resource, ids):
+    """Push the current mongo version of the items to elastic"""
+    if not ids or not has_search_backend(resource):
+        return
+
+    lookup = {config.ID_FIELD: {'$in': list(ids)}}
+    record_query('mongo', resource, 'find', (lookup,))
+    docs = list(get_collection(resource).find(lookup))
+    if docs:
+        get_resource_service(resource).backend.create_in_search(resource, docs)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Request scoped and short lived caches used by the planning services"""
+
+import time
+import logging
+from threading import Lock
+from flask import g, has_app_context, current_app as app
+
+logger = logging.getLogger(__name__)
+
+
+def get_request_cache(name):
+    """Get the cache dictionary ``name`` bound to the current app context
+
+    An app context is pushed for every request (and every celery task), so anything
+    stored here is discarded once the request is finished.
+    Outside of an app context an empty throw-away dictionary is returned.
+
+    :param str name: name of the cache
+    :return dict: cache dictionary
+    """
+    if not has_app_context():
+        return {}
+
+    caches = getattr(g, 'planning_request_caches', None)
+    if caches is None:
+        caches = g.planning_request_caches = {}
+
+    return caches.setdefault(name, {})
+
+
+def clear_request_cache(name, keys=None):
+    """Remove ``keys`` (or everything if not provided) from the request cache ``name``"""
+    cache = get_request_cache(name)
+    if keys is None:
+        cache.clear()
+        return
+
+    for key in keys:
+        cache.pop(key, None)
+
+
+class TTLCache:
+    """Process wide cache where entries expire after a configurable number of seconds
+
+    The time to live is read from the app config on every access, using ``ttl_config``
+    as the config key and ``default_ttl`` if it is not set.
+    A time to live of 0 disables the cache.
+    Once ``max_size`` entries are stored, expired (and then the oldest) entries are dropped.
+    """
+
+    def __init__(self, ttl_config, default_ttl, max_size=10000):
+        self.ttl_config = ttl_config
+        self.default_ttl = default_ttl
+        self.max_size = max_size
+        self._items = {}
+        self._lock = Lock()
+
+    @property
+    def ttl(self):
+        if not has_app_context():
+            return self.default_ttl
+        return float(app.config.get(self.ttl_config, self.default_ttl))
+
+    def get_many(self, keys):
+        """Get the non expired values for ``keys``
+
+        :param keys: iterable of cache keys
+        :return dict: key/value pairs that were found in the cache
+        """
+        ttl = self.ttl
+        if ttl <= 0:
+            return {}
+
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._items.get(key)
+                if entry is None:
+                    continue
+
+                if now - entry[0] > ttl:
+                    self._items.pop(key, None)
+                    continue
+
+                found[key] = entry[1]
+
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set_many(self, values):
+        """Store the key/value pairs from the dictionary ``values``"""
+        ttl = self.ttl
+        if ttl <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for key, value in values.items():
+                self._items[key] = (now, value)
+
+            if len(self._items) > self.max_size:
+                self._prune(now, ttl)
+
+    def _prune(self, now, ttl):
+        for key in [key for key, entry in self._items.items() if now - entry[0] > ttl]:
+            self._items.pop(key, None)
+
+        overflow = len(self._items) - self.max_size
+        if overflow > 0:
+            oldest = sorted(self._items.items(), key=lambda entry: entry[1][0])[:overflow]
+            for key, _entry in oldest:
+                self._items.pop(key, None)
+
+    def set(self, key, value):
+        self.set_many({key: value})
+
+    def invalidate(self, keys=None):
+        """Remove ``keys`` (or everything if not provided) from the cache"""
+        with self._lock:
+            if keys is None:
+                self._items.clear()
+                return
+
+            for key in keys:
+                self._items.pop(key, None)
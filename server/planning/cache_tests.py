@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from planning.cache import TTLCache
+
+
+class TTLCacheTestCase(unittest.TestCase):
+
+    def test_get_many_returns_only_stored_keys(self):
+        cache = TTLCache('TEST_CACHE_TTL', 10)
+        cache.set_many({'a': 1, 'b': 2})
+
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('c'))
+
+    def test_entries_expire(self):
+        cache = TTLCache('TEST_CACHE_TTL', 10)
+        with mock.patch('planning.cache.time.monotonic', return_value=100):
+            cache.set('a', 1)
+
+        with mock.patch('planning.cache.time.monotonic', return_value=105):
+            self.assertEqual(cache.get('a'), 1)
+
+        with mock.patch('planning.cache.time.monotonic', return_value=111):
+            self.assertIsNone(cache.get('a'))
+
+    def test_invalidate(self):
+        cache = TTLCache('TEST_CACHE_TTL', 10)
+        cache.set_many({'a': 1, 'b': 2, 'c': 3})
+
+        cache.invalidate(['a'])
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {'b': 2, 'c': 3})
+
+        cache.invalidate()
+        self.assertEqual(cache.get_many(['a', 'b', 'c']), {})
+
+    def test_zero_ttl_disables_the_cache(self):
+        cache = TTLCache('TEST_CACHE_TTL', 0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+    def test_max_size_drops_oldest_entries(self):
+        cache = TTLCache('TEST_CACHE_TTL', 10, max_size=2)
+        for index, key in enumerate(['a', 'b', 'c']):
+            with mock.patch('planning.cache.time.monotonic', return_value=100 + index):
+                cache.set(key, index)
+
+        with mock.patch('planning.cache.time.monotonic', return_value=103):
+            self.assertEqual(cache.get_many(['a', 'b', 'c']), {'b': 1, 'c': 2})
+
+    def test_get_desks_returns_copies(self):
+        from planning.common import get_desks, get_desk
+        cache = TTLCache('TEST_CACHE_TTL', 10)
+        cache.set('desk1', {'name': 'Sports', 'members': [{'user': 'user1'}]})
+
+        with mock.patch('planning.common.desk_directory', cache):
+            get_desks(['desk1'])['desk1']['name'] = 'Politics'
+            get_desk('desk1')['members'].append({'user': 'user2'})
+            self.assertEqual(get_desk('desk1'), {'name': 'Sports', 'members': [{'user': 'user1'}]})
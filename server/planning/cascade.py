@@ -0,0 +1,184 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Cascade event state transitions (cancel, postpone, reschedule) to their planning items
+
+The planning items of all the affected events are loaded with a single query and each
+transition is written with a single bulk write, instead of a ``patch`` per planning item.
+The planning items get the same notes and states as when they are patched one by one
+through the ``planning_cancel``, ``planning_postpone`` and ``planning_reschedule`` services,
+and the same history entries and notifications are sent for each of them.
+"""
+
+from copy import deepcopy
+from eve.utils import config
+from flask import current_app as app
+from superdesk import get_resource_service
+from .notifications import push_notification
+from apps.archive.common import get_user, get_auth
+from .bulk import bulk_update
+from .planning_cancel import get_coverage_cancel_state, get_cancel_note
+
+
+class EventPlanningsCascade:
+    """Planning items of a set of events, loaded once and updated in bulk
+
+    :param list events: events (or event ids) whose planning items are affected
+    :param dict plans: already loaded planning items keyed by event id, skips the query
+    """
+
+    def __init__(self, events, plans=None):
+        self.plans = {}
+        if plans is not None:
+            for event_id, event_plans in plans.items():
+                self.plans[str(event_id)] = list(event_plans)
+            return
+
+        event_ids = list(set(self._get_event_id(event) for event in events))
+        if not event_ids:
+            return
+
+        for plan in get_resource_service('planning').get_from_mongo(
+                req=None, lookup={'event_item': {'$in': event_ids}}
+        ):
+            self.plans.setdefault(str(plan['event_item']), []).append(plan)
+
+    @staticmethod
+    def _get_event_id(event):
+        return event[config.ID_FIELD] if isinstance(event, dict) else event
+
+    def has_plannings(self, event):
+        return bool(self.plans.get(str(self._get_event_id(event))))
+
+    def get_plannings(self, events):
+        plans = []
+        for event in events:
+            plans.extend(self.plans.get(str(self._get_event_id(event))) or [])
+        return plans
+
+    def _get_session(self):
+        return (
+            str(get_user(required=True).get(config.ID_FIELD, '')),
+            str(get_auth().get(config.ID_FIELD, ''))
+        )
+
+    def _write(self, changes):
+        """Write the planning updates and keep the loaded planning items in step"""
+        bulk_update('planning', changes)
+
+        for original, updates in changes:
+            updated = deepcopy(original)
+            updated.update(updates)
+            event_plans = self.plans.get(str(original.get('event_item'))) or []
+            for index, plan in enumerate(event_plans):
+                if plan[config.ID_FIELD] == original[config.ID_FIELD]:
+                    event_plans[index] = updated
+
+    def cancel(self, events, reason=None):
+        """Cancel the planning items of the events, and all their coverages and assignments"""
+        plans = self.get_plannings(events)
+        if not plans:
+            return
+
+        planning_cancel_service = get_resource_service('planning_cancel')
+        coverage_cancel_state = get_coverage_cancel_state()
+        note = get_cancel_note(event_cancellation=True)
+        changes = []
+        cancellations = []
+
+        for plan in plans:
+            updates = {}
+            cancelled = planning_cancel_service._cancel_coverages(updates, plan, coverage_cancel_state, note, reason)
+            cancellations.extend(
+                (assignment_id, coverage) for coverage, assignment_id in cancelled if assignment_id
+            )
+            planning_cancel_service._cancel_plan(updates, plan, note, reason)
+            changes.append((plan, updates))
+
+        get_resource_service('assignments').cancel_assignments(cancellations)
+        self._write(changes)
+
+        user, session = self._get_session()
+        for plan, updates in changes:
+            app.on_updated_planning_cancel(updates, plan)
+            push_notification(
+                'planning:cancelled',
+                item=str(plan[config.ID_FIELD]),
+                user=user,
+                session=session,
+                reason=reason,
+                coverage_state=coverage_cancel_state,
+                event_cancellation=True
+            )
+
+    def postpone(self, events, reason=None):
+        """Postpone the planning items of the events"""
+        plans = self.get_plannings(events)
+        if not plans:
+            return
+
+        planning_postpone_service = get_resource_service('planning_postpone')
+        changes = []
+
+        for plan in plans:
+            updates = {'reason': reason}
+            planning_postpone_service._postpone_plan(updates, plan)
+            updates['coverages'] = deepcopy(plan.get('coverages'))
+            for coverage in updates.get('coverages') or []:
+                planning_postpone_service._postpone_coverage(updates, coverage)
+
+            del updates['reason']
+            changes.append((plan, updates))
+
+        self._write(changes)
+
+        user, session = self._get_session()
+        for plan, updates in changes:
+            app.on_updated_planning_postpone(updates, plan)
+            push_notification(
+                'planning:postponed',
+                item=str(plan[config.ID_FIELD]),
+                user=user,
+                session=session,
+                reason=reason
+            )
+
+    def reschedule(self, events, reason=None, state=None):
+        """Reschedule the planning items of the events
+
+        :param str state: workflow state for the planning items, defaults to rescheduled
+        """
+        plans = self.get_plannings(events)
+        if not plans:
+            return
+
+        planning_reschedule_service = get_resource_service('planning_reschedule')
+        changes = []
+
+        for plan in plans:
+            updates = {'state': state}
+            planning_reschedule_service._reschedule_plan(updates, plan, reason)
+            updates['coverages'] = deepcopy(plan.get('coverages'))
+            for coverage in updates.get('coverages') or []:
+                planning_reschedule_service._reschedule_coverage(coverage, reason)
+
+            changes.append((plan, updates))
+
+        self._write(changes)
+
+        user, session = self._get_session()
+        for plan, updates in changes:
+            app.on_updated_planning_reschedule(updates, plan)
+            push_notification(
+                'planning:rescheduled',
+                item=str(plan[config.ID_FIELD]),
+                user=user,
+                session=session
+            )
@@ -1 +1,7 @@
 from .populate_planning_types import PopulatePlanningTypesCommand  # noqa
+from .reconcile_assignment_workload import ReconcileAssignmentWorkloadCommand  # noqa
+from .archive_history import ArchiveHistoryCommand  # noqa
+from .manage_indexes import ManageIndexesCommand  # noqa
+from .generate_data import GenerateDataCommand  # noqa
+from .purge_expired_items import PurgeExpiredItemsCommand  # noqa
+from .archive_items import ArchiveItemsCommand  # noqa
@@ -0,0 +1,54 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from superdesk import get_resource_service
+from superdesk.celery_app import celery
+from superdesk.lock import lock, unlock
+from planning.history_archive import HISTORY_RESOURCES
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveHistoryCommand(superdesk.Command):
+    """
+    Move the events and planning history older than the retention period into the history archive
+
+    The retention period defaults to the PLANNING_HISTORY_RETENTION_DAYS setting, nothing is archived if it is not set.
+    """
+
+    option_list = (
+        superdesk.Option('--days', '-d', dest='days', type=int, required=False),
+        superdesk.Option('--batch-size', '-b', dest='batch_size', type=int, required=False),
+    )
+
+    def run(self, days=None, batch_size=None):
+        lock_name = 'planning:archive_history'
+        if not lock(lock_name, expire=3600):
+            logger.info('Archive history task is already running')
+            return
+
+        try:
+            service = get_resource_service('history_archive')
+            for resource in sorted(HISTORY_RESOURCES.keys()):
+                archived = service.archive(resource, days, batch_size)
+                logger.info('{} {} entries archived'.format(archived, resource))
+        finally:
+            unlock(lock_name)
+
+
+@celery.task(soft_time_limit=3600)
+def archive_history():
+    ArchiveHistoryCommand().run()
+
+
+superdesk.command('planning:archive_history', ArchiveHistoryCommand())
@@ -0,0 +1,67 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from superdesk import get_resource_service
+from superdesk.celery_app import celery
+from superdesk.lock import lock, unlock
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveItemsCommand(superdesk.Command):
+    """
+    Move the events and planning items older than PLANNING_ARCHIVE_DAYS to the archive tier, in batches
+
+    Locked items, planning items with assignments and events with planning items are kept.
+    With --restore-events or --restore-planning the given archived items are moved back instead.
+    """
+
+    option_list = (
+        superdesk.Option('--days', '-d', dest='days', type=int, required=False),
+        superdesk.Option('--batch-size', '-b', dest='batch_size', type=int, required=False),
+        superdesk.Option('--restore-events', dest='restore_events', nargs='+', required=False),
+        superdesk.Option('--restore-planning', dest='restore_planning', nargs='+', required=False),
+    )
+
+    def run(self, days=None, batch_size=None, restore_events=None, restore_planning=None):
+        lock_name = 'planning:archive_items'
+        if not lock(lock_name, expire=3600):
+            logger.info('Archive items task is already running')
+            return
+
+        try:
+            self._move(days, batch_size, restore_events, restore_planning)
+        finally:
+            unlock(lock_name)
+
+    def _move(self, days, batch_size, restore_events, restore_planning):
+        if restore_events or restore_planning:
+            restored = get_resource_service('events_archive').restore(restore_events or [])
+            logger.info('{} events restored'.format(len(restored)))
+            restored = get_resource_service('planning_archive').restore(restore_planning or [])
+            logger.info('{} planning items restored'.format(len(restored)))
+            return
+
+        # planning items first, so that the events of archived planning items are archived in the same run
+        archived = get_resource_service('planning_archive').archive(days, batch_size)
+        logger.info('{} planning items archived'.format(archived))
+        archived = get_resource_service('events_archive').archive(days, batch_size)
+        logger.info('{} events archived'.format(archived))
+
+
+@celery.task(soft_time_limit=3600)
+def archive_items():
+    ArchiveItemsCommand().run()
+
+
+superdesk.command('planning:archive_items', ArchiveItemsCommand())
@@ -0,0 +1,66 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from datetime import datetime
+from superdesk.utc import utc
+from planning.synthetic_data import SyntheticDataGenerator
+
+
+logger = logging.getLogger(__name__)
+
+
+class GenerateDataCommand(superdesk.Command):
+    """
+    Generate deterministic synthetic agendas, locations, events, planning items and assignments
+
+    The same seed and sizes always generate the same data, use a new seed (or an empty database)
+    to generate data again. Meant for benchmarks and capacity tests, never run it on production.
+
+    Example:
+    ::
+
+        $ python manage.py planning:generate_data --seed 1 --events 1000000 --planning 300000
+
+    """
+
+    option_list = (
+        superdesk.Option('--seed', '-s', dest='seed', type=int, default=1),
+        superdesk.Option('--events', '-e', dest='events', type=int, default=10000),
+        superdesk.Option('--recurring', '-r', dest='recurring', type=float, default=0.2,
+                         help='ratio of the events in recurring series'),
+        superdesk.Option('--planning', '-p', dest='planning', type=int, default=3000),
+        superdesk.Option('--max-coverages', '-c', dest='max_coverages', type=int, default=60),
+        superdesk.Option('--agendas', dest='agendas', type=int, default=20),
+        superdesk.Option('--locations', dest='locations', type=int, default=200),
+        superdesk.Option('--start-date', dest='start_date', default='2018-01-01',
+                         help='earliest date of the events and planning items (YYYY-MM-DD)'),
+        superdesk.Option('--batch-size', '-b', dest='batch_size', type=int, default=1000),
+        superdesk.Option('--no-history', dest='history', action='store_false', default=True),
+    )
+
+    def run(self, seed=1, events=10000, recurring=0.2, planning=3000, max_coverages=60, agendas=20,
+            locations=200, start_date='2018-01-01', batch_size=1000, history=True):
+        start = datetime.strptime(start_date, '%Y-%m-%d').replace(tzinfo=utc)
+        generator = SyntheticDataGenerator(seed=seed, start=start, batch_size=batch_size, history=history)
+        counts = generator.generate(
+            events=events,
+            recurring=recurring,
+            planning=planning,
+            max_coverages=max_coverages,
+            agendas=agendas,
+            locations=locations
+        )
+        for resource, count in sorted(counts.items()):
+            logger.info('{} {} generated'.format(count, resource))
+
+
+superdesk.command('planning:generate_data', GenerateDataCommand())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from planning.indexes import create_indexes, get_index_report, explain_queries
+
+
+logger = logging.getLogger(__name__)
+
+
+class ManageIndexesCommand(superdesk.Command):
+    """
+    Report the missing, unused and undeclared mongo indexes of the planning collections
+
+    With --create the missing indexes are created in the background.
+    With --explain the queries made by the planning services are explained, and the ones
+    running as collection scans are reported.
+
+    Example:
+    ::
+
+        $ python manage.py planning:indexes --create --explain
+    """
+
+    option_list = (
+        superdesk.Option('--create', '-c', dest='create', action='store_true', default=False),
+        superdesk.Option('--explain', '-e', dest='explain', action='store_true', default=False),
+    )
+
+    def run(self, create=False, explain=False):
+        if create:
+            created = create_indexes()
+            logger.info('{} indexes created'.format(len(created)))
+            for resource, name in created:
+                logger.info('created {}.{}'.format(resource, name))
+
+        for resource, report in get_index_report().items():
+            for status in ('missing', 'unused', 'undeclared'):
+                for name in report[status]:
+                    log = logger.warning if status == 'missing' else logger.info
+                    log('{} {}.{}'.format(status, resource, name))
+
+        if explain:
+            scans = 0
+            for query, stages, is_scan in explain_queries():
+                scans += int(is_scan)
+                log = logger.warning if is_scan else logger.info
+                log('{} {} {} ({}): {}'.format(
+                    'COLLSCAN' if is_scan else 'ok',
+                    query.resource,
+                    query.description,
+                    ', '.join(sorted(query.lookup)),
+                    ' > '.join(stages)
+                ))
+
+            if scans:
+                logger.warning('{} planning queries run as collection scans'.format(scans))
+
+
+superdesk.command('planning:indexes', ManageIndexesCommand())
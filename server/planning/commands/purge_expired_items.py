@@ -0,0 +1,54 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from superdesk import get_resource_service
+from superdesk.celery_app import celery
+from superdesk.lock import lock, unlock
+
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeExpiredItemsCommand(superdesk.Command):
+    """
+    Remove the expired events and planning items from mongo and elastic, in batches
+
+    Locked items, planning items with active assignments and events with planning items are kept.
+    With --tombstones a record of every purged item is kept in planning_purged_items.
+    """
+
+    option_list = (
+        superdesk.Option('--batch-size', '-b', dest='batch_size', type=int, required=False),
+        superdesk.Option('--tombstones', '-t', dest='tombstones', action='store_true', default=None),
+    )
+
+    def run(self, batch_size=None, tombstones=None):
+        lock_name = 'planning:purge_expired'
+        if not lock(lock_name, expire=3600):
+            logger.info('Purge expired items task is already running')
+            return
+
+        try:
+            purged = get_resource_service('planning_purged_items').purge(batch_size, tombstones)
+        finally:
+            unlock(lock_name)
+
+        for resource in sorted(purged.keys()):
+            logger.info('{} expired {} items purged'.format(purged[resource], resource))
+
+
+@celery.task(soft_time_limit=3600)
+def purge_expired_items():
+    PurgeExpiredItemsCommand().run()
+
+
+superdesk.command('planning:purge_expired', PurgeExpiredItemsCommand())
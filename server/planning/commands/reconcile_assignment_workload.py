@@ -0,0 +1,35 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import superdesk
+import logging
+from superdesk import get_resource_service
+from superdesk.celery_app import celery
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReconcileAssignmentWorkloadCommand(superdesk.Command):
+    """
+    Recompute the assignment workload counters per desk and user from the assignments collection
+    """
+
+    def run(self):
+        corrected = get_resource_service('assignments_workload').reconcile()
+        logger.info('Assignment workload reconciled, {} counters corrected'.format(corrected))
+
+
+@celery.task(soft_time_limit=600)
+def reconcile_assignment_workload():
+    ReconcileAssignmentWorkloadCommand().run()
+
+
+superdesk.command('planning:reconcile_assignment_workload', ReconcileAssignmentWorkloadCommand())
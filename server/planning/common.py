@@ -8,13 +8,16 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
-from flask import current_app as app
+from flask import current_app as app, json
 from superdesk.utc import utcnow
+from copy import deepcopy
 from datetime import timedelta
 from collections import namedtuple
 from superdesk.resource import not_analyzed
 from superdesk import get_resource_service
+from eve.utils import config, ParsedRequest
 from .item_lock import LOCK_SESSION, LOCK_ACTION, LOCK_TIME, LOCK_USER
+from .cache import TTLCache
 
 ITEM_STATE = 'state'
 ITEM_EXPIRY = 'expiry'
@@ -53,6 +56,17 @@ ASSIGNMENT_WORKFLOW_STATE = namedtuple('ASSIGNMENT_WORKFLOW_STATE',
                                        ['ASSIGNED', 'IN_PROGRESS',
                                         'COMPLETED', 'SUBMITTED', 'cancelled'])(*assignment_workflow_state)
 
+# assignments still worked on, their planning items are not purged when they expire
+ACTIVE_ASSIGNMENT_STATES = [
+    ASSIGNMENT_WORKFLOW_STATE.ASSIGNED,
+    ASSIGNMENT_WORKFLOW_STATE.IN_PROGRESS,
+    ASSIGNMENT_WORKFLOW_STATE.SUBMITTED
+]
+
+# Desk fields used by the planning services (notifications, content and export templates)
+DESK_DIRECTORY_FIELDS = ('name', 'members', 'working_stage', 'default_content_template')
+desk_directory = TTLCache('PLANNING_DESK_CACHE_TTL', 60)
+
 
 def set_item_expiry(doc):
     expiry_minutes = app.settings.get('PLANNING_EXPIRY_MINUTES', None)
@@ -90,3 +104,44 @@ def get_coverage_cancellation_state():
         coverage_cancel_state.pop('is_active', None)
 
     return coverage_cancel_state
+
+
+def get_desks(desk_ids):
+    """Get the desk directory entries for the desks
+
+    Entries are kept in a process wide cache, only unknown desks are fetched
+    from the database (in a single query). The returned desks are copies of the cached ones.
+
+    :param desk_ids: iterable of desk ids
+    :return dict: desks keyed by the desk id as string
+    """
+    ids = set(str(desk_id) for desk_id in desk_ids if desk_id)
+    desks = desk_directory.get_many(ids)
+    missing = ids - set(desks.keys())
+
+    if missing:
+        req = ParsedRequest()
+        req.projection = json.dumps({field: 1 for field in DESK_DIRECTORY_FIELDS})
+        fetched = {str(desk[config.ID_FIELD]): desk for desk in get_resource_service('desks').get_from_mongo(
+            req=req,
+            lookup={config.ID_FIELD: {'$in': list(missing)}}
+        )}
+        desk_directory.set_many(fetched)
+        desks.update(fetched)
+
+    return deepcopy(desks)
+
+
+def get_desk(desk_id):
+    """Get the desk directory entry for the desk, or None if the desk does not exist"""
+    if not desk_id:
+        return None
+    return get_desks([desk_id]).get(str(desk_id))
+
+
+def on_desk_updated(updates, original):
+    desk_directory.invalidate([str(original.get(config.ID_FIELD))])
+
+
+def on_desk_deleted(doc):
+    desk_directory.invalidate([str(doc.get(config.ID_FIELD))])
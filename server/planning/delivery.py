@@ -10,6 +10,7 @@
 
 import superdesk
 import logging
+from bson import ObjectId
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +37,26 @@ delivery_schema = {
 }
 
 
+def get_delivered_assignment_ids(assignment_ids):
+    """Get the ids of the assignments that already have a delivery record, with a single query
+
+    :param assignment_ids: iterable of assignment ids
+    :return set: ids (as strings) of the delivered assignments
+    """
+    # ``query_objectid_as_string`` is set, so the ids are not converted by eve
+    ids = set(str(_id) for _id in assignment_ids if _id)
+    if not ids:
+        return set()
+
+    ids = list(ids) + [ObjectId(_id) for _id in ids if ObjectId.is_valid(_id)]
+
+    deliveries = superdesk.get_resource_service('delivery').get_from_mongo(
+        req=None,
+        lookup={'assignment_id': {'$in': ids}}
+    )
+    return set(str(delivery['assignment_id']) for delivery in deliveries)
+
+
 class DeliveryResource(superdesk.Resource):
     url = 'delivery'
     endpoint_name = url
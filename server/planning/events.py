@@ -17,14 +17,15 @@ from superdesk.resource import not_analyzed
 from superdesk.errors import SuperdeskApiError
 from superdesk.metadata.utils import generate_guid
 from superdesk.metadata.item import GUID_NEWSML, ITEM_TYPE, metadata_schema
-from superdesk.notification import push_notification
+from .notifications import push_notification, get_notification_changes
 from apps.archive.common import set_original_creator, get_user
 from superdesk.users.services import current_user_has_privilege
 from superdesk.utc import utcnow
 from .common import UPDATE_SINGLE, UPDATE_FUTURE, UPDATE_ALL, UPDATE_METHODS, \
     get_max_recurrent_events, WORKFLOW_STATE_SCHEMA, PUBLISHED_STATE_SCHEMA, \
     WORKFLOW_STATE, ITEM_STATE, remove_lock_information
-from dateutil.rrule import rrule, YEARLY, MONTHLY, WEEKLY, DAILY, MO, TU, WE, TH, FR, SA, SU
+from .archive_tier import needs_archive, search_with_archive
+from .cache import get_request_cache
 from eve.defaults import resolve_default_values
 from eve.methods.common import resolve_document_etag
 from eve.utils import config, ParsedRequest
@@ -33,13 +34,13 @@ import itertools
 import copy
 import pytz
 import re
-from deepdiff import DeepDiff
 from copy import deepcopy
 
 logger = logging.getLogger(__name__)
 
-FREQUENCIES = {'DAILY': DAILY, 'WEEKLY': WEEKLY, 'MONTHLY': MONTHLY, 'YEARLY': YEARLY}
-DAYS = {'MO': MO, 'TU': TU, 'WE': WE, 'TH': TH, 'FR': FR, 'SA': SA, 'SU': SU}
+# names of the dateutil.rrule frequencies and weekdays, which is imported once used
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+DAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
 
 organizer_roles = {
     'eorol:artAgent': 'Artistic agent',
@@ -50,9 +51,18 @@ organizer_roles = {
 }
 
 
+# events updated as single events during the request, notified once they are written
+UPDATED_EVENTS_CACHE = 'planning_updated_events'
+
+
 class EventsService(superdesk.Service):
     """Service class for the events model."""
 
+    def get(self, req, lookup):
+        if needs_archive(self.datasource, req, lookup):
+            return search_with_archive(self.datasource, req, lookup)
+        return super().get(req, lookup)
+
     def post_in_mongo(self, docs, **kwargs):
         for doc in docs:
             resolve_default_values(doc, app.config['DOMAIN'][self.datasource]['defaults'])
@@ -236,10 +246,16 @@ class EventsService(superdesk.Service):
                 recurrence_id=str(generated_events[0]['recurrence_id'])
             )
         else:
+            # notified once the event is written, with the etag it is stored with
+            get_request_cache(UPDATED_EVENTS_CACHE)[str(original[config.ID_FIELD])] = True
+
+    def on_updated(self, updates, original):
+        if get_request_cache(UPDATED_EVENTS_CACHE).pop(str(original[config.ID_FIELD]), None):
             push_notification(
                 'events:updated',
                 item=str(original[config.ID_FIELD]),
-                user=str(updates.get('version_creator', ''))
+                user=str(updates.get('version_creator', '')),
+                **get_notification_changes(updates, original)
             )
 
     def _update_recurring_events(self, updates, original, update_method):
@@ -460,13 +476,15 @@ class EventsService(superdesk.Service):
 
         return set([planning['event_item'] for planning in planning_items])
 
-    def get_recurring_timeline(self, selected):
+    def get_recurring_timeline(self, selected, fields=None):
         """Utility method to get all events in the series
 
         This splits up the series of events into 3 separate arrays.
         Historic: event.dates.start < utcnow()
         Past: utcnow() < event.dates.start < selected.dates.start
         Future: event.dates.start > selected.dates.start
+
+        :param list fields: only load these fields of the events (``dates`` is always loaded)
         """
         historic = []
         past = []
@@ -476,6 +494,8 @@ class EventsService(superdesk.Service):
 
         req = ParsedRequest()
         req.sort = '[("dates.start", 1)]'
+        if fields:
+            req.projection = json.dumps(dict({field: 1 for field in fields}, dates=1))
         req.where = json.dumps({
             '$and': [
                 {'recurrence_id': selected['recurrence_id']},
@@ -499,6 +519,8 @@ class EventsService(superdesk.Service):
         new_start_time = None
         new_end_time = None
 
+        from deepdiff import DeepDiff
+
         diffs = DeepDiff(original_dates, updated_dates, ignore_order=True)
         values_changed = diffs.get('values_changed')
         if values_changed:
@@ -823,6 +845,36 @@ class EventsResource(superdesk.Resource):
     privileges = {'POST': 'planning_event_management',
                   'PATCH': 'planning_event_management'}
 
+    mongo_indexes = {
+        'recurrence_id_1': ([('recurrence_id', 1)], {'background': True}),
+        'dates.end_1': ([('dates.end', 1)], {'background': True}),
+        'original_source_1': ([('original_source', 1)], {'background': True}),
+        'lock_session_1': ([('lock_session', 1)], {'background': True}),
+        'expiry_1': ([('expiry', 1)], {'background': True})
+    }
+
+
+class EventsArchiveResource(superdesk.Resource):
+    """Archive tier of the events, see :mod:`planning.archive_tier`"""
+
+    url = 'events_archive'
+    schema = events_schema
+    item_url = r'regex("[\w,.:-]+")'
+    resource_methods = ['GET']
+    datasource = {
+        'source': 'events_archive',
+        'search_backend': 'elastic',
+        'default_sort': [('dates.start', 1)],
+    }
+    item_methods = ['GET']
+    mongo_indexes = {
+        'recurrence_id_1': ([('recurrence_id', 1)], {'background': True})
+    }
+
+
+def get_rrule_constant(rrule, names, name):
+    return getattr(rrule, name) if name in names else None
+
 
 def generate_recurring_dates(start, frequency, interval=1, endRepeatMode='count',
                              until=None, byday=None, count=5, tz=None, date_only=False):
@@ -839,6 +891,8 @@ def generate_recurring_dates(start, frequency, interval=1, endRepeatMode='count'
     :return list: list of datetime
 
     """
+    from dateutil import rrule
+
     # if tz is given, respect the timzone by starting from the local time
     # NOTE: rrule uses only naive datetime
     if tz:
@@ -868,13 +922,13 @@ def generate_recurring_dates(start, frequency, interval=1, endRepeatMode='count'
             day_of_month = int(byday[:1])
             day_of_week = byday[1:]
 
-        byweekday = DAYS.get(day_of_week)(day_of_month)
+        byweekday = get_rrule_constant(rrule, DAYS, day_of_week)(day_of_month)
     else:
         # byday uses DAYS constants
-        byweekday = byday and [DAYS.get(d) for d in byday.split()] or None
+        byweekday = byday and [get_rrule_constant(rrule, DAYS, d) for d in byday.split()] or None
     # TODO: use dateutil.rrule.rruleset to incude ex_date and ex_rule
-    dates = rrule(
-        FREQUENCIES.get(frequency),
+    dates = rrule.rrule(
+        get_rrule_constant(rrule, FREQUENCIES, frequency),
         dtstart=start,
         until=until,
         byweekday=byweekday,
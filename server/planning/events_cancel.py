@@ -10,13 +10,15 @@
 
 from superdesk import get_resource_service
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from .item_lock import LOCK_USER, LOCK_SESSION
 from eve.utils import config
 from apps.archive.common import get_user, get_auth
 from .common import UPDATE_SINGLE, UPDATE_FUTURE, WORKFLOW_STATE
 from copy import deepcopy
 from .events import EventsResource, events_schema
+from .cascade import EventPlanningsCascade
+from .planning_jobs import set_job_total, is_job_processed, set_job_processed
 from flask import current_app as app
 
 event_cancel_schema = deepcopy(events_schema)
@@ -89,20 +91,7 @@ class EventsCancelService(BaseService):
         return item
 
     def _cancel_event_plannings(self, updates, original):
-        planning_service = get_resource_service('planning')
-        planning_cancel_service = get_resource_service('planning_cancel')
-        reason = updates.get('reason', None)
-
-        plans = list(planning_service.find(where={'event_item': original[config.ID_FIELD]}))
-        for plan in plans:
-            updated_plan = planning_cancel_service.patch(
-                plan[config.ID_FIELD],
-                {'reason': reason, 'event_cancellation': True}
-            )
-            app.on_updated_planning_cancel(
-                updated_plan,
-                plan
-            )
+        EventPlanningsCascade([original]).cancel([original], updates.get('reason', None))
 
     def _set_event_cancelled(self, updates, original, occur_cancel_state):
         reason = updates.get('reason', None)
@@ -144,11 +133,23 @@ Event Cancelled
 
         self._set_event_cancelled(updates, original, occur_cancel_state)
 
+        # Load the Planning items of the whole series at once
+        cascade = EventPlanningsCascade(cancelled_events + [original])
+        events_in_use = []
+        set_job_total(len(cancelled_events))
+
         for event in cancelled_events:
-            has_plannings = events_service.has_planning_items(event)
+            in_use = cascade.has_plannings(event) or 'pubstatus' in event
+            if in_use:
+                events_in_use.append(event)
+
+            # Skip the Events already processed when resuming a background job
+            if is_job_processed(event[config.ID_FIELD]):
+                continue
+
             cloned_updates = deepcopy(updates)
 
-            if not has_plannings and 'pubstatus' not in event:
+            if not in_use:
                 if 'reason' in cloned_updates:
                     del cloned_updates['reason']
 
@@ -164,7 +165,6 @@ Event Cancelled
 
             else:
                 # Cancel this Event as it is in use
-                self._cancel_event_plannings(cloned_updates, event)
                 cloned_updates['skip_on_update'] = True
 
                 self.update(
@@ -173,4 +173,9 @@ Event Cancelled
                     event
                 )
 
-        self._cancel_event_plannings(updates, original)
+            set_job_processed(event[config.ID_FIELD])
+
+        # And cancel the Planning items of all these Events together
+        if not is_job_processed('plannings'):
+            cascade.cancel(events_in_use + [original], updates.get('reason', None))
+            set_job_processed('plannings')
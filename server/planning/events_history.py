@@ -9,7 +9,8 @@
 """Superdesk Files"""
 
 from superdesk import Resource
-from .history import HistoryService
+from .history import HistoryService, flush_history
+from .bulk import get_collection
 import logging
 from eve.utils import config
 
@@ -27,12 +28,23 @@ class EventsHistoryResource(Resource):
         'update': {'type': 'dict', 'nullable': True}
     }
 
+    mongo_indexes = {
+        '_created_1': ([('_created', 1)], {'background': True}),
+        'event_id_1__created_1': ([('event_id', 1), ('_created', 1)], {'background': True})
+    }
+
 
 class EventsHistoryService(HistoryService):
 
     def on_item_deleted(self, doc):
+        # write any history of the event still queued before removing it
+        flush_history()
         lookup = {'event_id': doc[config.ID_FIELD]}
         self.delete(lookup=lookup)
+        get_collection('history_archive').delete_many({
+            'resource': self.datasource,
+            'item_id': str(doc[config.ID_FIELD])
+        })
 
     def _save_history(self, event, update, operation):
         history = {
@@ -47,4 +59,4 @@ class EventsHistoryService(HistoryService):
                 history['operation'] = 'publish'
             elif 'canceled' == update.get('state', ''):
                 history['operation'] = 'unpublish'
-        self.post([history])
+        self._write_history(history)
@@ -10,14 +10,15 @@
 
 from superdesk import get_resource_service
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from .item_lock import LOCK_USER, LOCK_SESSION
 from eve.utils import config
 from apps.archive.common import get_user, get_auth
 from .common import UPDATE_SINGLE, UPDATE_FUTURE, WORKFLOW_STATE
 from copy import deepcopy
 from .events import EventsResource, events_schema
-from flask import current_app as app
+from .cascade import EventPlanningsCascade
+from .planning_jobs import set_job_total, is_job_processed, set_job_processed
 
 event_postpone_schema = deepcopy(events_schema)
 event_postpone_schema['reason'] = {
@@ -78,20 +79,7 @@ class EventsPostponeService(BaseService):
         return item
 
     def _postpone_event_plannings(self, updates, original):
-        planning_service = get_resource_service('planning')
-        planning_postpone_service = get_resource_service('planning_postpone')
-        reason = updates.get('reason', None)
-
-        plans = list(planning_service.find(where={'event_item': original[config.ID_FIELD]}))
-        for plan in plans:
-            updated_plan = planning_postpone_service.patch(
-                plan[config.ID_FIELD],
-                {'reason': reason}
-            )
-            app.on_updated_planning_postpone(
-                updated_plan,
-                plan
-            )
+        EventPlanningsCascade([original]).postpone([original], updates.get('reason', None))
 
     def _set_event_postponed(self, updates, original):
         reason = updates.get('reason', None)
@@ -130,11 +118,16 @@ Event Postponed
 
         self._set_event_postponed(updates, original)
 
+        set_job_total(len(postponed_events))
+
         for event in postponed_events:
+            # Skip the Events already processed when resuming a background job
+            if is_job_processed(event[config.ID_FIELD]):
+                continue
+
             cloned_updates = deepcopy(updates)
 
             # Mark the Event as being Postponed
-            self._postpone_event_plannings(cloned_updates, event)
             cloned_updates['skip_on_update'] = True
 
             self.update(
@@ -143,4 +136,10 @@ Event Postponed
                 event
             )
 
-        self._postpone_event_plannings(updates, original)
+            set_job_processed(event[config.ID_FIELD])
+
+        # Postpone the Planning items of the whole series at once
+        if not is_job_processed('plannings'):
+            events = postponed_events + [original]
+            EventPlanningsCascade(events).postpone(events, updates.get('reason', None))
+            set_job_processed('plannings')
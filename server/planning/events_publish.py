@@ -6,7 +6,7 @@ from superdesk import get_resource_service
 from superdesk.resource import Resource
 from superdesk.services import BaseService
 from apps.publish.enqueue import get_enqueue_service
-from superdesk.notification import push_notification
+from .notifications import push_notification
 
 from .events import EventsResource
 from .common import WORKFLOW_STATE, PUBLISHED_STATE, published_state
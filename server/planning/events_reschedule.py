@@ -10,7 +10,7 @@
 
 from superdesk import get_resource_service
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from superdesk.metadata.utils import generate_guid
 from superdesk.metadata.item import GUID_NEWSML
 from eve.utils import config
@@ -18,6 +18,7 @@ from apps.archive.common import get_user, get_auth, set_original_creator
 from .common import UPDATE_SINGLE, UPDATE_FUTURE, WORKFLOW_STATE, ITEM_STATE, remove_lock_information
 from copy import deepcopy
 from .events import EventsResource, events_schema, generate_recurring_dates, set_next_occurrence
+from .cascade import EventPlanningsCascade
 from flask import current_app as app
 from itertools import islice
 import pytz
@@ -82,7 +83,8 @@ class EventsRescheduleService(BaseService):
         )
 
     def _reschedule_single_event(self, updates, original, events_service):
-        has_plannings = events_service.has_planning_items(original)
+        cascade = EventPlanningsCascade([original])
+        has_plannings = cascade.has_plannings(original)
 
         # If the Event is in use, then we will duplicate the original
         # and set the original's status to `rescheduled`
@@ -94,7 +96,7 @@ class EventsRescheduleService(BaseService):
 
             self._mark_event_rescheduled(updates, original)
             if has_plannings:
-                self._reschedule_event_plannings(updates, original)
+                cascade.reschedule([original], updates.get('reason', None))
 
     def _mark_event_rescheduled(self, updates, original, keep_dates=False):
         definition = '''------------------------------------------------------------
@@ -119,28 +121,6 @@ Event Rescheduled
         if not keep_dates:
             updates.pop('dates', None)
 
-    def _reschedule_event_plannings(self, updates, original, plans=None, state=None):
-        planning_service = get_resource_service('planning')
-        planning_reschedule_service = get_resource_service('planning_reschedule')
-        reason = updates.get('reason', None)
-
-        if plans is None:
-            plans = list(planning_service.find(where={'event_item': original[config.ID_FIELD]}))
-
-        plan_updates = {
-            'reason': reason,
-            'state': state
-        }
-        for plan in plans:
-            updated_plan = planning_reschedule_service.patch(
-                plan[config.ID_FIELD],
-                plan_updates
-            )
-            app.on_updated_planning_reschedule(
-                updated_plan,
-                plan
-            )
-
     def _duplicate_event(self, updates, original, events_service):
         new_event = deepcopy(original)
         new_event.update(updates)
@@ -216,6 +196,10 @@ Event Rescheduled
 
         dates_processed = []
 
+        # Load the Planning items of the whole series at once
+        cascade = EventPlanningsCascade(rescheduled_events)
+        draft_events = []
+
         # Iterate over the current events in the series and delete/spike
         # or update the event accordingly
         deleted_events = {}
@@ -250,7 +234,7 @@ Event Rescheduled
                 if event[config.ID_FIELD] == original[config.ID_FIELD]:
                     self._mark_event_rescheduled(updates, original, True)
                     updates['state'] = new_state
-                    self._reschedule_event_plannings(updates, event, state=WORKFLOW_STATE.DRAFT)
+                    draft_events.append(event)
 
                 else:
                     new_updates = {'reason': reason}
@@ -267,12 +251,15 @@ Event Rescheduled
 
                     # And finally update the Event, and Reschedule associated Planning items
                     events_service.patch(event[config.ID_FIELD], new_updates)
-                    self._reschedule_event_plannings(new_updates, event, state=WORKFLOW_STATE.DRAFT)
+                    draft_events.append(event)
                     app.on_updated_events_reschedule(new_updates, {'_id': event[config.ID_FIELD]})
 
                 # Mark this date as being already processed
                 dates_processed.append(event_date)
 
+        # Reschedule the Planning items of the Events that remain in the series together
+        cascade.reschedule(draft_events, reason, state=WORKFLOW_STATE.DRAFT)
+
         # Create new events that do not fall on the original occurrence dates
         new_events = []
         for date in new_dates:
@@ -307,12 +294,11 @@ Event Rescheduled
             app.on_inserted_events(new_events)
 
         # Iterate over the events to delete/spike
-        self._set_events_planning(deleted_events)
-
+        rescheduled_plannings = []
         for event in deleted_events.values():
-            event_plans = event.get('_plans', [])
+            has_plannings = cascade.has_plannings(event)
             is_original = event[config.ID_FIELD] == original[config.ID_FIELD]
-            if len(event_plans) > 0 or event.get('pubstatus', None) is not None:
+            if has_plannings or event.get('pubstatus', None) is not None:
                 if is_original:
                     self._mark_event_rescheduled(updates, original)
                 else:
@@ -325,8 +311,8 @@ Event Rescheduled
                     self._mark_event_rescheduled(new_updates, original)
                     self.patch(event[config.ID_FIELD], new_updates)
 
-                if len(event_plans) > 0:
-                    self._reschedule_event_plannings(updates, original, event_plans)
+                if has_plannings:
+                    rescheduled_plannings.append(event)
             else:
                 # This event has no Planning items, therefor we can safely
                 # delete this event
@@ -336,17 +322,6 @@ Event Rescheduled
                 if is_original:
                     original_deleted = True
 
-        return not original_deleted
-
-    def _set_events_planning(self, events):
-        planning_service = get_resource_service('planning')
+        cascade.reschedule(rescheduled_plannings, reason)
 
-        planning_items = list(planning_service.get_from_mongo(
-            req=None, lookup={'event_item': {'$in': list(events.keys())}}
-        ))
-
-        for plan in planning_items:
-            event = events[plan['event_item']]
-            if '_plans' not in event:
-                event['_plans'] = []
-            event['_plans'].append(plan)
+        return not original_deleted
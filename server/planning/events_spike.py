@@ -13,10 +13,48 @@ from superdesk.errors import SuperdeskApiError
 from .common import ITEM_EXPIRY, ITEM_STATE, set_item_expiry, UPDATE_SINGLE, UPDATE_FUTURE, \
     WORKFLOW_STATE, remove_lock_information
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from apps.archive.common import get_user
 from superdesk import config, get_resource_service
+from eve.utils import ParsedRequest
+from flask import current_app as app, json
 from .item_lock import LOCK_USER, LOCK_SESSION
+from .planning_jobs import is_job_processed, set_job_processed
+from .bulk import bulk_update
+
+# fields of the other events in the series needed to spike or unspike them
+SERIES_FIELDS = [ITEM_STATE, 'revert_state', 'pubstatus', LOCK_USER, LOCK_SESSION]
+
+
+def validate_recurring(events, recurrence_id, action):
+    """Ensure no other event or planning item of the series is locked
+
+    :param list events: the other events of the series
+    :param str recurrence_id: id of the series
+    :param str action: action named in the error message, i.e. ``Spike``
+    :return set: ids of the events with planning items
+    """
+    for event in events:
+        if event.get(LOCK_USER) or event.get(LOCK_SESSION):
+            raise SuperdeskApiError.forbiddenError(
+                message="{} failed. An event in the series is locked.".format(action)
+            )
+
+    events_with_plans = set()
+
+    req = ParsedRequest()
+    req.projection = json.dumps({LOCK_USER: 1, LOCK_SESSION: 1, 'event_item': 1})
+    for planning in get_resource_service('planning').get_from_mongo(req=req, lookup={
+        'recurrence_id': recurrence_id
+    }):
+        if planning.get(LOCK_USER) or planning.get(LOCK_SESSION):
+            raise SuperdeskApiError.forbiddenError(
+                message="{} failed. A related planning item is locked.".format(action)
+            )
+
+        events_with_plans.add(planning.get('event_item'))
+
+    return events_with_plans
 
 
 class EventsSpikeResource(EventsResource):
@@ -74,19 +112,26 @@ class EventsSpikeService(BaseService):
 
         Based on the update_method provided, spikes 'future' or 'all' events in the series.
         Historic events, i.e. events that have already occurred, will not be spiked.
+        The events of the series are spiked with a single bulk write.
         """
+        events_service = get_resource_service('events')
+        historic, past, future = events_service.get_recurring_timeline(original, SERIES_FIELDS)
+
         # Ensure that no other Event or Planning item is currently locked
-        events_with_plans = self._validate_recurring(original[config.ID_FIELD], original['recurrence_id'])
+        events_with_plans = validate_recurring(historic + past + future, original['recurrence_id'], 'Spike')
 
         notifications = []
 
-        events_service = get_resource_service('events')
-        historic, past, future = events_service.get_recurring_timeline(original)
-
         # Mark item as unlocked directly in order to avoid more queries and notifications
         # coming from lockservice.
         remove_lock_information(updates)
-        new_item = self._spike_event(updates, original)
+        if is_job_processed(original[config.ID_FIELD]):
+            # Already spiked before the background job was interrupted
+            new_item = original
+        else:
+            new_item = self._spike_event(updates, original)
+            set_job_processed(original[config.ID_FIELD])
+
         notifications.append({
             '_id': original[config.ID_FIELD],
             'etag': new_item['_etag'],
@@ -103,20 +148,30 @@ class EventsSpikeService(BaseService):
         else:
             spiked_events = past + future
 
+        # Events already spiked are skipped, which also makes resuming a background job safe
+        changes = []
         for event in spiked_events:
             if 'pubstatus' in event or \
                     event[ITEM_STATE] == WORKFLOW_STATE.SPIKED or \
                     event[config.ID_FIELD] in events_with_plans:
                 continue
 
-            self.on_update(updates, event)
-            item = self._spike_event({}, event)
+            event_updates = {
+                'revert_state': event[ITEM_STATE],
+                ITEM_STATE: WORKFLOW_STATE.SPIKED
+            }
+            set_item_expiry(event_updates)
+            changes.append((event, event_updates))
+
+        bulk_update(self.datasource, changes, projected=True)
+
+        for event, event_updates in changes:
             notifications.append({
                 '_id': event[config.ID_FIELD],
-                'etag': item['_etag'],
-                'revert_state': item['revert_state']
+                'etag': event_updates[config.ETAG],
+                'revert_state': event_updates['revert_state']
             })
-            self.on_updated(updates, event)
+            app.on_updated_events_spike(event_updates, event)
 
         user = get_user(required=True)
         push_notification(
@@ -138,32 +193,6 @@ class EventsSpikeService(BaseService):
                 raise SuperdeskApiError.forbiddenError(
                     message="Spike failed. One or more related planning items are locked.")
 
-    def _validate_recurring(self, original_id, recurrence_id):
-        events_service = get_resource_service('events')
-        planning_service = get_resource_service('planning')
-
-        events_with_plans = []
-
-        for event in list(events_service.find(where={'recurrence_id': recurrence_id})):
-            if event[config.ID_FIELD] == original_id:
-                continue
-
-            if event.get(LOCK_USER) or event.get(LOCK_SESSION):
-                raise SuperdeskApiError.forbiddenError(
-                    message="Spike failed. An event in the series is locked."
-                )
-
-        for planning in list(planning_service.find(where={'recurrence_id': recurrence_id})):
-            if planning.get(LOCK_USER) or planning.get(LOCK_SESSION):
-                raise SuperdeskApiError.forbiddenError(
-                    message="Spike failed. A related planning item is locked."
-                )
-
-            if planning['event_item'] not in events_with_plans:
-                events_with_plans.append(planning['event_item'])
-
-        return events_with_plans
-
 
 class EventsUnspikeResource(EventsResource):
     url = 'events/unspike'
@@ -177,18 +206,93 @@ class EventsUnspikeResource(EventsResource):
 
 class EventsUnspikeService(BaseService):
     def update(self, id, updates, original):
-        user = get_user(required=True)
+        if 'update_method' in updates:
+            update_method = updates['update_method']
+            del updates['update_method']
+        else:
+            update_method = UPDATE_SINGLE
 
+        if original.get('recurrence_id') and update_method != UPDATE_SINGLE:
+            item = self._unspike_recurring(updates, original, update_method)
+        else:
+            item = self._unspike_single_event(updates, original)
+
+        return item
+
+    def _get_unspike_updates(self, updates, original):
         updates[ITEM_STATE] = original.get('revert_state', WORKFLOW_STATE.DRAFT)
         updates['revert_state'] = None
         updates[ITEM_EXPIRY] = None
+        return updates
+
+    def _unspike_event(self, updates, original):
+        self._get_unspike_updates(updates, original)
+        return self.backend.update(self.datasource, original[config.ID_FIELD], updates, original)
 
-        item = self.backend.update(self.datasource, id, updates, original)
+    def _unspike_single_event(self, updates, original):
+        item = self._unspike_event(updates, original)
+
+        user = get_user(required=True)
         push_notification(
             'events:unspiked',
-            item=str(id),
+            item=str(original[config.ID_FIELD]),
             user=str(user.get(config.ID_FIELD)),
             etag=item['_etag'],
             state=item[ITEM_STATE]
         )
+
         return item
+
+    def _unspike_recurring(self, updates, original, update_method):
+        """Unspike events in a recurring series
+
+        Based on the update_method provided, unspikes 'future' or 'all' events in the series.
+        The other spiked events of the series are unspiked with a single bulk write.
+        """
+        historic, past, future = get_resource_service('events').get_recurring_timeline(original, SERIES_FIELDS)
+
+        # Ensure that no other Event or Planning item is currently locked
+        validate_recurring(historic + past + future, original['recurrence_id'], 'Unspike')
+
+        new_item = self._unspike_event(updates, original)
+        notifications = [{
+            '_id': original[config.ID_FIELD],
+            'etag': new_item['_etag'],
+            'state': new_item[ITEM_STATE]
+        }]
+
+        # Determine if the selected event is the first one, if so then
+        # act as if we're changing future events
+        if len(historic) == 0 and len(past) == 0:
+            update_method = UPDATE_FUTURE
+
+        if update_method == UPDATE_FUTURE:
+            unspiked_events = future
+        else:
+            unspiked_events = past + future
+
+        changes = [
+            (event, self._get_unspike_updates({}, event))
+            for event in unspiked_events
+            if event[ITEM_STATE] == WORKFLOW_STATE.SPIKED
+        ]
+        bulk_update(self.datasource, changes, projected=True)
+
+        for event, event_updates in changes:
+            notifications.append({
+                '_id': event[config.ID_FIELD],
+                'etag': event_updates[config.ETAG],
+                'state': event_updates[ITEM_STATE]
+            })
+            app.on_updated_events_unspike(event_updates, event)
+
+        user = get_user(required=True)
+        push_notification(
+            'events:unspiked:recurring',
+            item=str(original[config.ID_FIELD]),
+            user=str(user.get(config.ID_FIELD)),
+            items=notifications,
+            recurrence_id=original['recurrence_id']
+        )
+
+        return new_item
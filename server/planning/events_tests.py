@@ -4,6 +4,8 @@ import pytz
 from superdesk import get_resource_service
 from superdesk.utc import utcnow
 from planning.tests import TestCase
+from planning.bulk import bulk_update, get_collection
+from eve.methods.common import resolve_document_etag
 
 
 class EventTestCase(TestCase):
@@ -105,6 +107,22 @@ class EventTestCase(TestCase):
                 self.assertEquals(e['dates']['start'], expected_time)
                 expected_time += datetime.timedelta(days=1)
 
+    def test_bulk_update_etag_of_projected_events(self):
+        with self.app.app_context():
+            self.app.data.insert('events', [{'_id': 'e1', 'name': 'foo', 'state': 'draft', 'dates': {}}])
+            events = get_collection('events')
+            original = events.find_one({'_id': 'e1'})
+
+            updates = {'state': 'spiked', 'revert_state': 'draft'}
+            bulk_update('events', [({'_id': 'e1', 'state': 'draft'}, updates)], projected=True)
+
+            # the etag is the one the backend computes for a patch of the full document
+            updated = dict(original)
+            updated.update({key: value for key, value in updates.items() if key != '_etag'})
+            resolve_document_etag(updated, 'events')
+            self.assertEqual(updates['_etag'], updated['_etag'])
+            self.assertEqual(events.find_one({'_id': 'e1'})['_etag'], updated['_etag'])
+
 
 def generate_recurring_events(num_events):
     events = []
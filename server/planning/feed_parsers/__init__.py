@@ -7,3 +7,23 @@
 # For the full copyright and license information, please see the
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
+
+"""Event feed parsers
+
+The parsers are registered as lazy instances (see :mod:`planning.lazy`), their modules
+(and ``icalendar``) are only imported once a provider using them is updated.
+"""
+
+from superdesk.io.registry import register_feed_parser
+from planning.lazy import lazy_instance, LazyTypedInstance
+
+# name, label and class of the feed parsers
+FEED_PARSERS = (
+    ('ics20', 'iCalendar v2.0', 'planning.feed_parsers.ics_2_0.IcsTwoFeedParser'),
+    ('ntb_event_xml', 'NTB Event XML', 'planning.feed_parsers.ntb_event_xml.NTBEventXMLFeedParser'),
+)
+
+
+def register_feed_parsers():
+    for name, label, import_path in FEED_PARSERS:
+        register_feed_parser(name, lazy_instance(import_path, LazyTypedInstance, NAME=name, label=label))
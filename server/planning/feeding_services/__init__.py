@@ -0,0 +1,56 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Event feeding services
+
+The services are registered as lazy instances (see :mod:`planning.lazy`), their modules
+are only imported once a provider using them is updated or configured.
+"""
+
+from superdesk.errors import ParserError, ProviderError, IngestApiError, IngestEmailError
+from superdesk.io.registry import register_feeding_service
+from planning.lazy import lazy_instance
+
+EVENT_FILE_ERRORS = [
+    ParserError.IPTC7901ParserError().get_error_description(),
+    ParserError.nitfParserError().get_error_description(),
+    ParserError.newsmlOneParserError().get_error_description(),
+    ProviderError.ingestError().get_error_description(),
+    ParserError.parseFileError().get_error_description()
+]
+
+EVENT_HTTP_ERRORS = [
+    IngestApiError.apiTimeoutError().get_error_description(),
+    IngestApiError.apiRedirectError().get_error_description(),
+    IngestApiError.apiRequestError().get_error_description(),
+    IngestApiError.apiUnicodeError().get_error_description(),
+    IngestApiError.apiParseError().get_error_description(),
+    IngestApiError.apiGeneralError().get_error_description()
+]
+
+EVENT_EMAIL_ERRORS = [
+    IngestEmailError.emailError().get_error_description(),
+    IngestEmailError.emailLoginError().get_error_description()
+]
+
+# name, label, class and errors of the feeding services
+FEEDING_SERVICES = (
+    ('event_file', 'Event File Feed',
+     'planning.feeding_services.event_file_service.EventFileFeedingService', EVENT_FILE_ERRORS),
+    ('event_http', 'Event HTTP Feed',
+     'planning.feeding_services.event_http_service.EventHTTPFeedingService', EVENT_HTTP_ERRORS),
+    ('event_email', 'Event Email',
+     'planning.feeding_services.event_email_service.EventEmailFeedingService', EVENT_EMAIL_ERRORS),
+)
+
+
+def register_feeding_services():
+    for name, label, import_path, errors in FEEDING_SERVICES:
+        register_feeding_service(name, lazy_instance(import_path, NAME=name, label=label), errors)
@@ -19,6 +19,7 @@ from superdesk.upload import url_for_media
 from superdesk.media.media_operations import process_file_from_stream
 from planning.feed_parsers.ntb_event_xml import NTBEventXMLFeedParser
 from planning.feed_parsers.ics_2_0 import IcsTwoFeedParser
+from planning.feeding_services import EVENT_EMAIL_ERRORS
 from xml.etree import ElementTree
 from icalendar import Calendar
 
@@ -32,8 +33,7 @@ class EventEmailFeedingService(FeedingService):
     """
 
     NAME = 'event_email'
-    ERRORS = [IngestEmailError.emailError().get_error_description(),
-              IngestEmailError.emailLoginError().get_error_description()]
+    ERRORS = EVENT_EMAIL_ERRORS
 
     label = 'Event Email'
 
@@ -13,11 +13,12 @@ import os
 from datetime import datetime
 
 from xml.etree import ElementTree
-from superdesk.errors import ParserError, ProviderError
+from superdesk.errors import ParserError
 from superdesk.io.feeding_services.file_service import FileFeedingService
 from planning.feed_parsers.ntb_event_xml import NTBEventXMLFeedParser
 from planning.feed_parsers.ics_2_0 import IcsTwoFeedParser
-from superdesk.notification import push_notification
+from ..notifications import push_notification
+from planning.feeding_services import EVENT_FILE_ERRORS
 from superdesk.utc import utc
 from superdesk.utils import get_sorted_files, FileSortAttributes
 from icalendar import Calendar
@@ -31,13 +32,7 @@ class EventFileFeedingService(FileFeedingService):
     """
 
     NAME = 'event_file'
-    ERRORS = [
-        ParserError.IPTC7901ParserError().get_error_description(),
-        ParserError.nitfParserError().get_error_description(),
-        ParserError.newsmlOneParserError().get_error_description(),
-        ProviderError.ingestError().get_error_description(),
-        ParserError.parseFileError().get_error_description()
-    ]
+    ERRORS = EVENT_FILE_ERRORS
 
     label = 'Event File Feed'
 
@@ -19,6 +19,7 @@ from superdesk.logging import logger
 from superdesk.utc import utcnow
 from planning.feed_parsers.ntb_event_xml import NTBEventXMLFeedParser
 from planning.feed_parsers.ics_2_0 import IcsTwoFeedParser
+from planning.feeding_services import EVENT_HTTP_ERRORS
 from flask import current_app as app
 from icalendar import Calendar
 
@@ -29,12 +30,7 @@ class EventHTTPFeedingService(HTTPFeedingService):
     """
 
     NAME = 'event_http'
-    ERRORS = [IngestApiError.apiTimeoutError().get_error_description(),
-              IngestApiError.apiRedirectError().get_error_description(),
-              IngestApiError.apiRequestError().get_error_description(),
-              IngestApiError.apiUnicodeError().get_error_description(),
-              IngestApiError.apiParseError().get_error_description(),
-              IngestApiError.apiGeneralError().get_error_description()]
+    ERRORS = EVENT_HTTP_ERRORS
 
     label = 'Event HTTP Feed'
 
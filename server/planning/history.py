@@ -8,16 +8,119 @@
 
 """Superdesk Files"""
 
-from superdesk import Service
+import logging
+from superdesk import Service, get_resource_service
+from superdesk.celery_app import celery
+from superdesk.utc import utcnow
 from copy import deepcopy
-from flask import g
+from collections import OrderedDict
+from flask import g, has_app_context, current_app as app
 from eve.utils import config
-from bson import ObjectId
+from bson import ObjectId, json_util
 from .item_lock import LOCK_ACTION, LOCK_USER, LOCK_TIME, LOCK_SESSION
 
+logger = logging.getLogger(__name__)
 
 fields_to_remove = ['_id', '_etag', '_current_version', '_updated', '_created', '_links', 'version_creator', 'guid',
                     LOCK_ACTION, LOCK_USER, LOCK_TIME, LOCK_SESSION, '_planning_schedule', '_planning_date']
+fields_to_skip = frozenset(fields_to_remove)
+
+# history is written as soon as it is recorded
+HISTORY_WRITE_SYNC = 'sync'
+# history is queued and written with a single insert per resource at the end of the request
+HISTORY_WRITE_REQUEST = 'request'
+# history is queued and handed over to a celery worker at the end of the request
+HISTORY_WRITE_CELERY = 'celery'
+
+
+def get_history_write_mode():
+    return app.config.get('PLANNING_HISTORY_WRITE_MODE', HISTORY_WRITE_REQUEST)
+
+
+def write_history(resource, history):
+    """Write the history document, or queue it depending on ``PLANNING_HISTORY_WRITE_MODE``
+
+    Queued history keeps the order it was recorded in, and its ``_created`` date is set
+    when it is queued. The queue is flushed at the end of the request (or app context),
+    or as soon as it holds ``PLANNING_HISTORY_QUEUE_SIZE`` documents.
+
+    :param str resource: history resource name
+    :param dict history: history document
+    """
+    if not has_app_context() or get_history_write_mode() == HISTORY_WRITE_SYNC:
+        get_resource_service(resource).post([history])
+        return
+
+    if history.get('update'):
+        # the update can be the updates of the request, which later hooks modify before the flush
+        history['update'] = deepcopy(history['update'])
+
+    now = utcnow()
+    history.setdefault(config.DATE_CREATED, now)
+    history.setdefault(config.LAST_UPDATED, now)
+
+    queue = getattr(g, 'planning_history_queue', None)
+    if queue is None:
+        queue = g.planning_history_queue = []
+
+    queue.append((resource, history))
+    if len(queue) >= app.config.get('PLANNING_HISTORY_QUEUE_SIZE', 500):
+        flush_history()
+
+
+def flush_history():
+    """Write the queued history, with one insert per history resource"""
+    if not has_app_context():
+        return
+
+    queue = getattr(g, 'planning_history_queue', None)
+    if not queue:
+        return
+
+    g.planning_history_queue = []
+    batches = OrderedDict()
+    for resource, history in queue:
+        batches.setdefault(resource, []).append(history)
+
+    if get_history_write_mode() == HISTORY_WRITE_CELERY:
+        try:
+            # bson json keeps the ObjectId and date types through the celery serializer
+            write_history_batches.delay(json_util.dumps(list(batches.items())))
+            return
+        except Exception:
+            logger.exception('Failed to queue the history, writing it now')
+
+    _write_history_batches(batches.items())
+
+
+def _write_history_batches(batches):
+    for resource, docs in batches:
+        get_resource_service(resource).post(docs)
+
+
+@celery.task(soft_time_limit=600)
+def write_history_batches(batches):
+    _write_history_batches(json_util.loads(batches))
+
+
+def flush_history_after_request(response):
+    """Write the queued history once the request is done
+
+    The items are already written, so a failure is logged instead of failing the request.
+    """
+    try:
+        flush_history()
+    except Exception:
+        logger.exception('Failed to write the queued history')
+    return response
+
+
+def flush_history_on_teardown(exception=None):
+    """Write the history still queued when the app context ends (celery tasks and commands)"""
+    try:
+        flush_history()
+    except Exception:
+        logger.exception('Failed to write the queued history')
 
 
 class HistoryService(Service):
@@ -30,15 +133,8 @@ class HistoryService(Service):
                 item[config.ID_FIELD]) else str(item[config.ID_FIELD])}, deepcopy(item), 'create')
 
     def on_item_updated(self, updates, original, operation=None):
-        item = deepcopy(original)
-        if list(item.keys()) == ['_id']:
-            diff = updates
-        else:
-            diff = self._changes(original, updates)
-            if updates:
-                item.update(updates)
-
-        self._save_history(item, diff, operation or 'update')
+        self._save_history(self._get_item_ref(updates, original), self._get_diff(updates, original),
+                           operation or 'update')
 
     def on_spike(self, updates, original):
         self.on_item_updated(updates, original, 'spiked')
@@ -68,30 +164,40 @@ class HistoryService(Service):
         if user:
             return user.get('_id')
 
+    def _get_item_ref(self, updates, original):
+        """Get the item reference history is saved for, without copying the item"""
+        return {config.ID_FIELD: (updates or {}).get(config.ID_FIELD, original.get(config.ID_FIELD))}
+
+    def _get_diff(self, updates, original):
+        if list(original.keys()) == [config.ID_FIELD]:
+            return updates
+        return self._changes(original, updates)
+
     def _changes(self, original, updates):
         """
         Given the original record and the updates calculate what has changed and what is new
 
+        Neither the original nor the updates are copied, ``write_history`` copies the changes
+        when it queues them. Fields in ``fields_to_remove`` are skipped.
+
         :param original:
         :param updates:
-        :return: dictionary of what was changed and what was added
+        :return: dictionary of what was changed and what was added, None if nothing changed
         """
-        original_keys = set(original.keys())
-        updates_keys = set(updates.keys())
-        intersect_keys = original_keys.intersection(updates_keys)
-        modified = {o: updates[o] for o in intersect_keys if original[o] != updates[o]}
-        added_keys = updates_keys - original_keys
-        added = {a: updates[a] for a in added_keys}
-        modified.update(added)
-        return self._remove_unwanted_fields(modified)
-
-    def _remove_unwanted_fields(self, update):
-        if update:
-            update_copy = deepcopy(update)
-            for field in fields_to_remove:
-                update_copy.pop(field, None)
-
-            return update_copy
+        changes = {}
+        changed = False
+        for field, value in (updates or {}).items():
+            if field in original and original[field] == value:
+                continue
+
+            changed = True
+            if field not in fields_to_skip:
+                changes[field] = value
+
+        return changes if changed else None
 
     def _save_history(self, item, update, operation):
         raise NotImplementedError()
+
+    def _write_history(self, history):
+        write_history(self.datasource, history)
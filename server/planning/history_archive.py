@@ -0,0 +1,166 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Cold storage for the events and planning history
+
+History older than ``PLANNING_HISTORY_RETENTION_DAYS`` is moved out of the history
+collections into the ``history_archive`` collection. Each archive document holds
+the compressed history of one item for one archiving batch, so the archive stays
+small and only has one index entry per item and batch.
+"""
+
+import zlib
+import logging
+from datetime import timedelta
+from bson import Binary, json_util
+from eve.utils import config
+from flask import current_app as app
+from superdesk import Resource
+from superdesk.services import BaseService
+from superdesk.errors import SuperdeskApiError
+from superdesk.resource import not_analyzed
+from superdesk.utils import ListCursor
+from superdesk.utc import utcnow
+from .bulk import get_collection
+
+logger = logging.getLogger(__name__)
+
+# history resources and the field referencing the item the history is for
+HISTORY_RESOURCES = {
+    'events_history': 'event_id',
+    'planning_history': 'planning_id'
+}
+
+
+def compress_history(docs):
+    return Binary(zlib.compress(json_util.dumps(docs).encode('utf-8')))
+
+
+def decompress_history(data):
+    return json_util.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class HistoryArchiveService(BaseService):
+
+    def get(self, req, lookup):
+        """Get the archived history of an item, ``resource`` and ``item_id`` arguments are required"""
+        args = getattr(req, 'args', {}) or {}
+        resource = args.get('resource')
+        item_id = args.get('item_id')
+
+        if resource not in HISTORY_RESOURCES or not item_id:
+            raise SuperdeskApiError.badRequestError('Archived history requires a history resource and an item id.')
+
+        return ListCursor(self.get_archived_history(resource, item_id))
+
+    def get_archived_history(self, resource, item_id):
+        """Get the archived history entries of an item, oldest first
+
+        :param str resource: history resource name
+        :param item_id: id of the event or planning item
+        :return list: history entries
+        """
+        history = {}
+        for archive in get_collection(self.datasource).find({'resource': resource, 'item_id': str(item_id)}):
+            # entries archived twice (if archiving was interrupted) are only returned once
+            for entry in decompress_history(archive['data']):
+                history[entry[config.ID_FIELD]] = entry
+
+        return sorted(history.values(), key=lambda entry: (entry[config.DATE_CREATED], entry[config.ID_FIELD]))
+
+    def get_history(self, resource, item_id):
+        """Get the full history of an item, both archived and current"""
+        item_field = HISTORY_RESOURCES[resource]
+        current = list(get_collection(resource).find({item_field: item_id}).sort(
+            [(config.DATE_CREATED, 1), (config.ID_FIELD, 1)]
+        ))
+        current_ids = set(entry[config.ID_FIELD] for entry in current)
+        archived = [entry for entry in self.get_archived_history(resource, item_id)
+                    if entry[config.ID_FIELD] not in current_ids]
+        return archived + current
+
+    def archive(self, resource, days=None, batch_size=None):
+        """Move the history older than ``days`` into the archive, in batches
+
+        Each batch is written to the archive before it is removed from the history collection,
+        so an interrupted run can only leave entries in both places, which reads account for.
+
+        :param str resource: history resource name
+        :param int days: retention in days, defaults to ``PLANNING_HISTORY_RETENTION_DAYS``
+        :param int batch_size: number of entries per batch, defaults to ``PLANNING_HISTORY_ARCHIVE_BATCH_SIZE``
+        :return int: number of archived entries
+        """
+        if days is None:
+            days = app.config.get('PLANNING_HISTORY_RETENTION_DAYS', 0)
+        if not days:
+            return 0
+
+        batch_size = batch_size or app.config.get('PLANNING_HISTORY_ARCHIVE_BATCH_SIZE', 1000)
+        item_field = HISTORY_RESOURCES[resource]
+        history = get_collection(resource)
+        archive = get_collection(self.datasource)
+        before = utcnow() - timedelta(days=int(days))
+        total = 0
+
+        while True:
+            entries = list(history.find({config.DATE_CREATED: {'$lt': before}}).sort(
+                [(config.DATE_CREATED, 1), (config.ID_FIELD, 1)]
+            ).limit(batch_size))
+            if not entries:
+                break
+
+            items = {}
+            for entry in entries:
+                items.setdefault(str(entry.get(item_field)), []).append(entry)
+
+            now = utcnow()
+            archive.insert_many([{
+                'resource': resource,
+                'item_id': item_id,
+                'first_created': item_entries[0][config.DATE_CREATED],
+                'last_created': item_entries[-1][config.DATE_CREATED],
+                'count': len(item_entries),
+                'data': compress_history(item_entries),
+                config.DATE_CREATED: now,
+                config.LAST_UPDATED: now
+            } for item_id, item_entries in items.items()], ordered=True)
+            history.delete_many({config.ID_FIELD: {'$in': [entry[config.ID_FIELD] for entry in entries]}})
+
+            total += len(entries)
+            logger.info('Archived {} {} entries'.format(total, resource))
+
+        return total
+
+
+class HistoryArchiveResource(Resource):
+    endpoint_name = 'history_archive'
+    resource_methods = ['GET']
+    item_methods = []
+    schema = {
+        'resource': {
+            'type': 'string',
+            'allowed': list(HISTORY_RESOURCES.keys()),
+            'mapping': not_analyzed
+        },
+        'item_id': {
+            'type': 'string',
+            'mapping': not_analyzed
+        },
+        'first_created': {'type': 'datetime'},
+        'last_created': {'type': 'datetime'},
+        'count': {'type': 'integer'}
+    }
+
+    mongo_indexes = {
+        'resource_1_item_id_1_first_created_1': (
+            [('resource', 1), ('item_id', 1), ('first_created', 1)],
+            {'background': True}
+        )
+    }
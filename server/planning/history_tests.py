@@ -0,0 +1,106 @@
+from datetime import timedelta
+from planning.tests import TestCase
+from superdesk.utc import utcnow
+from superdesk import get_resource_service
+from unittest import mock
+from superdesk.tests import update_config
+from superdesk.factory.app import get_app
+from planning.history import flush_history, flush_history_after_request
+from planning.commands.archive_history import ArchiveHistoryCommand
+
+
+class HistoryWriteTestCase(TestCase):
+    def get_history(self, event_id):
+        return list(get_resource_service('events_history').get_from_mongo(req=None, lookup={'event_id': event_id}))
+
+    def test_history_is_written_in_order_when_flushed(self):
+        with self.app.app_context():
+            service = get_resource_service('events_history')
+            service.on_item_created([{'_id': 'e1', 'name': 'foo'}])
+            service.on_item_updated({'name': 'bar'}, {'_id': 'e1', 'name': 'foo'})
+            self.assertEqual(self.get_history('e1'), [])
+
+            flush_history()
+            history = self.get_history('e1')
+            self.assertEqual([entry['operation'] for entry in history], ['create', 'update'])
+            self.assertEqual(history[1]['update'], {'name': 'bar'})
+
+    def test_queued_history_keeps_the_updates_it_was_recorded_with(self):
+        with self.app.app_context():
+            service = get_resource_service('planning_history')
+            updates = {'state': 'scheduled', 'pubstatus': 'usable'}
+            service._save_history({'_id': 'p1'}, updates, 'publish')
+            updates['state'] = 'killed'
+
+            flush_history()
+            history = list(service.get_from_mongo(req=None, lookup={'planning_id': 'p1'}))
+            self.assertEqual(history[0]['update'], {'state': 'scheduled', 'pubstatus': 'usable'})
+
+    def test_queued_history_keeps_the_changes_it_was_recorded_with(self):
+        with self.app.app_context():
+            updates = {'dates': {'tz': 'Europe/London'}}
+            get_resource_service('events_history').on_item_updated(updates, {'_id': 'e1', 'dates': {'tz': 'UTC'}})
+            updates['dates']['tz'] = 'Europe/Prague'
+
+            flush_history()
+            self.assertEqual(self.get_history('e1')[0]['update'], {'dates': {'tz': 'Europe/London'}})
+
+    def test_failed_flush_does_not_fail_the_request(self):
+        with self.app.app_context():
+            get_resource_service('events_history').on_item_created([{'_id': 'e1', 'name': 'foo'}])
+            response = object()
+            with mock.patch('planning.history._write_history_batches', side_effect=Exception('down')):
+                self.assertIs(flush_history_after_request(response), response)
+
+    def test_history_is_written_straight_away_in_sync_mode(self):
+        self.app.config['PLANNING_HISTORY_WRITE_MODE'] = 'sync'
+        with self.app.app_context():
+            get_resource_service('events_history').on_item_created([{'_id': 'e1', 'name': 'foo'}])
+            self.assertEqual(len(self.get_history('e1')), 1)
+
+    def test_changes_skip_unchanged_and_internal_fields(self):
+        with self.app.app_context():
+            service = get_resource_service('events_history')
+            original = {'_id': 'e1', 'name': 'foo', 'dates': {'tz': 'Europe/Prague'}, '_etag': '1'}
+            updates = {'name': 'foo', 'dates': {'tz': 'Europe/London'}, 'slugline': 'bar', '_etag': '2'}
+
+            changes = service._changes(original, updates)
+            self.assertEqual(changes, {'dates': {'tz': 'Europe/London'}, 'slugline': 'bar'})
+            self.assertIsNone(service._changes(original, {'name': 'foo'}))
+            self.assertEqual(service._changes(original, {'_etag': '2'}), {})
+
+    def test_archive_history(self):
+        with self.app.app_context():
+            now = utcnow()
+            self.app.data.insert('events_history', [
+                {'event_id': 'e1', 'operation': 'create', '_created': now - timedelta(days=10)},
+                {'event_id': 'e1', 'operation': 'update', '_created': now - timedelta(days=9)},
+                {'event_id': 'e2', 'operation': 'create', '_created': now - timedelta(days=9)},
+                {'event_id': 'e1', 'operation': 'spiked', '_created': now},
+            ])
+
+            service = get_resource_service('history_archive')
+            self.assertEqual(service.archive('events_history', days=5, batch_size=2), 3)
+            self.assertEqual([entry['operation'] for entry in self.get_history('e1')], ['spiked'])
+
+            history = service.get_history('events_history', 'e1')
+            self.assertEqual([entry['operation'] for entry in history], ['create', 'update', 'spiked'])
+            self.assertEqual(len(service.get_history('events_history', 'e2')), 1)
+
+
+class ArchiveHistoryTaskTestCase(TestCase):
+    def test_archive_task_is_scheduled_with_a_retention_period(self):
+        self.assertNotIn('planning:archive_history', self.app.config['CELERY_BEAT_SCHEDULE'])
+
+        config = {'INSTALLED_APPS': ['planning'], 'PLANNING_HISTORY_RETENTION_DAYS': 30}
+        update_config(config)
+        entry = get_app(config).config['CELERY_BEAT_SCHEDULE']['planning:archive_history']
+        self.assertEqual(entry['task'], 'planning.commands.archive_history.archive_history')
+        self.assertEqual(entry['schedule'], timedelta(hours=24))
+
+    def test_archive_is_skipped_while_running(self):
+        with self.app.app_context():
+            with mock.patch('planning.commands.archive_history.lock', return_value=False), \
+                    mock.patch('planning.commands.archive_history.get_resource_service') as get_service:
+                ArchiveHistoryCommand().run()
+            get_service.assert_not_called()
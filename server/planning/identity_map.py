@@ -0,0 +1,191 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Request scoped identity map for the events, planning and assignments resources
+
+The planning services are registered with an ``IdentityMapBackend``, which keeps every
+item read by id during a request (``find_one(req=None, _id=...)`` and ``get_from_mongo``
+with an ``_id`` or ``_id.$in`` lookup) and serves the following reads of the same item
+from memory. Items are copied on the way in and out, so changes made by the callers
+are never seen by later reads.
+
+Every write made through the backend (and the bulk helpers) removes the written items
+from the map. The map is emptied at the start of every request, and can be disabled
+with ``PLANNING_IDENTITY_MAP = False``. It is only used while handling a request: celery
+tasks and commands can run for long and read items other processes change meanwhile.
+"""
+
+import logging
+from copy import deepcopy
+from flask import current_app as app, has_app_context, has_request_context
+from eve.utils import config
+from .cache import get_request_cache, clear_request_cache
+from .query_stats import QueryCountingBackend
+
+logger = logging.getLogger(__name__)
+
+IDENTITY_MAP_SOURCES = ('events', 'planning', 'assignments')
+
+
+def get_source(resource):
+    """Get the mongo collection name of the resource"""
+    return app.config['DOMAIN'][resource]['datasource']['source']
+
+
+def get_identity_map(resource):
+    """Get the identity map of the resource for the current request
+
+    Items are stored by id and then by resource name, as resources sharing the same
+    collection (i.e. ``planning`` and ``planning_lock``) can have different projections.
+
+    :return dict: identity map, or None if disabled for the resource or outside of a request
+    """
+    if not has_request_context() or not app.config.get('PLANNING_IDENTITY_MAP', True):
+        return None
+
+    source = get_source(resource)
+    if source not in IDENTITY_MAP_SOURCES:
+        return None
+
+    return get_request_cache('identity_map:{}'.format(source))
+
+
+def invalidate_identity_map(resource, ids=None):
+    """Remove the items ``ids`` (or all items if not provided) of the resource from the identity map"""
+    if not has_app_context() or resource not in app.config['DOMAIN']:
+        return
+
+    source = get_source(resource)
+    if source in IDENTITY_MAP_SOURCES:
+        clear_request_cache(
+            'identity_map:{}'.format(source),
+            [str(_id) for _id in ids] if ids is not None else None
+        )
+
+
+def clear_identity_maps():
+    """Empty the identity maps, before every request
+
+    The app context (and so the request caches) can be shared by several requests (i.e. in tests).
+    """
+    for source in IDENTITY_MAP_SOURCES:
+        clear_request_cache('identity_map:{}'.format(source))
+
+
+def _is_plain_request(req):
+    """Only requests without any filtering, projection, sorting or paging return whole items"""
+    if req is None:
+        return True
+
+    return not any(getattr(req, attr, None) for attr in ('where', 'projection', 'sort', 'max_results', 'args'))
+
+
+def _get_lookup_ids(lookup):
+    """Get the ids of an ``_id`` or ``_id.$in`` lookup, None for any other lookup"""
+    if not lookup or list(lookup.keys()) != [config.ID_FIELD]:
+        return None
+
+    value = lookup[config.ID_FIELD]
+    if isinstance(value, dict):
+        if list(value.keys()) != ['$in']:
+            return None
+        return list(value['$in'])
+
+    return [value]
+
+
+class IdentityMapResult(list):
+    """List of items returned instead of a cursor, when served from the identity map"""
+
+    def count(self, with_limit_and_skip=False):
+        return len(self)
+
+
+class IdentityMapBackend(QueryCountingBackend):
+    """Backend keeping the items read by id in a request scoped identity map
+
+    Reads served from the identity map are not counted as queries.
+    """
+
+    def find_one(self, endpoint_name, req, **lookup):
+        identity_map = get_identity_map(endpoint_name) if req is None else None
+        ids = _get_lookup_ids(lookup) if identity_map is not None else None
+        if ids is None or len(ids) != 1:
+            return super().find_one(endpoint_name, req, **lookup)
+
+        key = str(ids[0])
+        item = identity_map.get(key, {}).get(endpoint_name)
+        if item is not None:
+            logger.debug('Identity map hit resource={} id={}'.format(endpoint_name, key))
+            return deepcopy(item)
+
+        logger.debug('Identity map miss resource={} id={}'.format(endpoint_name, key))
+        item = super().find_one(endpoint_name, req, **lookup)
+        if item is not None:
+            identity_map.setdefault(key, {})[endpoint_name] = deepcopy(item)
+        return item
+
+    def get_from_mongo(self, endpoint_name, req, lookup):
+        identity_map = get_identity_map(endpoint_name) if _is_plain_request(req) else None
+        ids = _get_lookup_ids(lookup) if identity_map is not None else None
+        if ids is None:
+            return super().get_from_mongo(endpoint_name, req, lookup)
+
+        items = IdentityMapResult()
+        missing = []
+        for _id in ids:
+            item = identity_map.get(str(_id), {}).get(endpoint_name)
+            if item is not None:
+                items.append(deepcopy(item))
+            else:
+                missing.append(_id)
+
+        logger.debug('Identity map resource={} hits={} misses={}'.format(
+            endpoint_name, len(items), len(missing)
+        ))
+
+        if missing:
+            for item in super().get_from_mongo(endpoint_name, req, {config.ID_FIELD: {'$in': missing}}):
+                identity_map.setdefault(str(item[config.ID_FIELD]), {})[endpoint_name] = deepcopy(item)
+                items.append(item)
+
+        return items
+
+    def find_and_modify(self, endpoint_name, **kwargs):
+        invalidate_identity_map(endpoint_name)
+        return super().find_and_modify(endpoint_name, **kwargs)
+
+    def create_in_mongo(self, endpoint_name, docs, **kwargs):
+        ids = super().create_in_mongo(endpoint_name, docs, **kwargs)
+        invalidate_identity_map(endpoint_name, ids or [])
+        return ids
+
+    def update(self, endpoint_name, id, updates, original):
+        invalidate_identity_map(endpoint_name, [id])
+        return super().update(endpoint_name, id, updates, original)
+
+    def system_update(self, endpoint_name, id, updates, original):
+        invalidate_identity_map(endpoint_name, [id])
+        return super().system_update(endpoint_name, id, updates, original)
+
+    def update_in_mongo(self, endpoint_name, id, updates, original):
+        invalidate_identity_map(endpoint_name, [id])
+        return super().update_in_mongo(endpoint_name, id, updates, original)
+
+    def replace_in_mongo(self, endpoint_name, id, document, original):
+        invalidate_identity_map(endpoint_name, [id])
+        return super().replace_in_mongo(endpoint_name, id, document, original)
+
+    def delete(self, endpoint_name, lookup):
+        # the items to delete are read by the backend first, so they are removed afterwards
+        try:
+            return super().delete(endpoint_name, lookup)
+        finally:
+            invalidate_identity_map(endpoint_name)
@@ -0,0 +1,65 @@
+from unittest import mock
+from planning.tests import TestCase
+from superdesk import get_resource_service
+from planning.bulk import bulk_update
+from planning.identity_map import clear_identity_maps
+
+
+class IdentityMapTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            self.app.data.insert('events', [
+                {'_id': 'e1', 'name': 'foo', 'dates': {}},
+                {'_id': 'e2', 'name': 'bar', 'dates': {}}
+            ])
+
+    def test_repeated_reads_are_served_from_memory(self):
+        with self.app.test_request_context():
+            clear_identity_maps()
+            service = get_resource_service('events')
+            with mock.patch('superdesk.eve_backend.EveBackend.find_one', return_value={'_id': 'e1'}) as find_one:
+                event = service.find_one(req=None, _id='e1')
+                event['name'] = 'changed'
+                self.assertEqual(service.find_one(req=None, _id='e1'), {'_id': 'e1'})
+                self.assertEqual(find_one.call_count, 1)
+
+                # other lookups are not cached
+                service.find_one(req=None, name='foo')
+                self.assertEqual(find_one.call_count, 2)
+
+    def test_only_missing_ids_are_fetched(self):
+        with self.app.test_request_context():
+            clear_identity_maps()
+            service = get_resource_service('events')
+            service.find_one(req=None, _id='e1')
+
+            with mock.patch('superdesk.eve_backend.EveBackend.get_from_mongo',
+                            return_value=[{'_id': 'e2', 'name': 'bar'}]) as get_from_mongo:
+                events = service.get_from_mongo(req=None, lookup={'_id': {'$in': ['e1', 'e2']}})
+                self.assertEqual(sorted(event['name'] for event in events), ['bar', 'foo'])
+                self.assertEqual(get_from_mongo.call_args[0][2], {'_id': {'$in': ['e2']}})
+
+                events = service.get_from_mongo(req=None, lookup={'_id': {'$in': ['e1', 'e2']}})
+                self.assertEqual(events.count(), 2)
+                self.assertEqual(get_from_mongo.call_count, 1)
+
+    def test_writes_invalidate_the_items(self):
+        with self.app.test_request_context():
+            clear_identity_maps()
+            service = get_resource_service('events')
+            original = service.find_one(req=None, _id='e1')
+            service.update('e1', {'name': 'patched'}, original)
+            self.assertEqual(service.find_one(req=None, _id='e1')['name'], 'patched')
+
+            original = service.find_one(req=None, _id='e2')
+            bulk_update('events', [(original, {'name': 'bulk'})])
+            self.assertEqual(service.find_one(req=None, _id='e2')['name'], 'bulk')
+
+    def test_identity_map_is_only_used_in_requests(self):
+        with self.app.app_context():
+            service = get_resource_service('events')
+            with mock.patch('superdesk.eve_backend.EveBackend.find_one', return_value={'_id': 'e1'}) as find_one:
+                service.find_one(req=None, _id='e1')
+                service.find_one(req=None, _id='e1')
+                self.assertEqual(find_one.call_count, 2)
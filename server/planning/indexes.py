@@ -0,0 +1,185 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Mongo indexes of the planning collections
+
+The indexes are declared with ``mongo_indexes`` on the resources, plus ``EXTRA_INDEXES``
+for collections of other packages that the planning services query (i.e. ``archive``).
+``QUERY_CATALOGUE`` lists the shapes of the mongo queries made by the planning services,
+which can be explained to find the ones running as collection scans.
+"""
+
+import logging
+from collections import namedtuple
+from flask import current_app as app
+from eve.io.mongo import create_index
+from .bulk import get_collection
+
+logger = logging.getLogger(__name__)
+
+INDEXED_RESOURCES = (
+    'events', 'planning', 'assignments', 'delivery', 'events_history', 'planning_history',
+    'history_archive', 'assignments_workload', 'planning_purged_items', 'events_archive', 'planning_archive'
+)
+
+EXTRA_INDEXES = {
+    'archive': {
+        'assignment_id_1': ([('assignment_id', 1)], {'background': True})
+    }
+}
+
+Query = namedtuple('Query', ['resource', 'lookup', 'sort', 'description'])
+
+QUERY_CATALOGUE = (
+    Query('events', {'recurrence_id': ''}, None, 'events of a recurring series'),
+    Query('events', {'original_source': {'$in': ['']}}, None, 'ingested events by original source'),
+    Query('events', {'lock_session': ''}, None, 'events locked by a session'),
+    Query('events', {'expiry': {'$lt': ''}, 'lock_user': None}, [('expiry', 1)], 'expired events to purge'),
+    Query('events', {'dates.end': {'$lt': ''}, 'lock_user': None}, None, 'events to archive'),
+    Query('planning', {'event_item': {'$in': ['']}}, None, 'planning items of events'),
+    Query('planning', {'recurrence_id': ''}, None, 'planning items of a recurring series'),
+    Query('planning', {'lock_session': ''}, None, 'planning items locked by a session'),
+    Query('planning', {'expiry': {'$lt': ''}, 'lock_user': None}, [('expiry', 1)], 'expired planning items to purge'),
+    Query('planning', {'_planning_date': {'$lt': ''}, '_planning_schedule.scheduled': {'$not': {'$gte': ''}},
+                       'lock_user': None}, None, 'planning items to archive'),
+    Query('assignments', {'coverage_item': {'$in': ['']}}, None, 'assignments of coverages'),
+    Query('assignments', {'planning_item': ''}, None, 'assignments of a planning item'),
+    Query('assignments', {'lock_session': ''}, None, 'assignments locked by a session'),
+    Query('archive', {'assignment_id': ''}, None, 'content linked to an assignment'),
+    Query('delivery', {'assignment_id': {'$in': ['']}}, None, 'deliveries of assignments'),
+    Query('delivery', {'planning_id': ''}, None, 'deliveries of a planning item'),
+    Query('delivery', {'item_id': ''}, None, 'deliveries of a content item'),
+    Query('events_history', {'event_id': ''}, [('_created', 1)], 'history of an event'),
+    Query('planning_history', {'planning_id': ''}, [('_created', 1)], 'history of a planning item'),
+    Query('history_archive', {'resource': '', 'item_id': ''}, [('first_created', 1)], 'archived history of an item'),
+    Query('planning_purged_items', {'resource': '', 'item_id': ''}, None, 'tombstone of a purged item'),
+    Query('assignments_workload', {'entity_type': '', 'entity_id': ''}, None, 'workload counters of a desk or user'),
+)
+
+
+def _get_keys(keys):
+    """Index keys as a comparable tuple, mongo can return the directions as floats"""
+    return tuple(
+        (field, int(direction) if isinstance(direction, float) else direction)
+        for field, direction in keys
+    )
+
+
+def get_declared_indexes():
+    """Get the declared indexes
+
+    :return dict: ``{resource: {index name: (keys, options)}}``
+    """
+    indexes = {}
+    for resource in INDEXED_RESOURCES:
+        if resource in app.config['DOMAIN']:
+            indexes[resource] = dict(app.config['DOMAIN'][resource].get('mongo_indexes__init') or {})
+
+    for resource, resource_indexes in EXTRA_INDEXES.items():
+        if resource in app.config['DOMAIN']:
+            indexes.setdefault(resource, {}).update(resource_indexes)
+
+    return indexes
+
+
+def get_index_usage(collection):
+    """Get the number of times each index was used since the server started, by index name"""
+    try:
+        return {
+            stats['name']: stats['accesses']['ops']
+            for stats in collection.aggregate([{'$indexStats': {}}])
+        }
+    except Exception:
+        # not supported by the server (mongo < 3.2)
+        return {}
+
+
+def create_indexes():
+    """Create the declared indexes missing from the collections, in the background
+
+    :return list: (resource, index name) of the created indexes
+    """
+    created = []
+    for resource, indexes in sorted(get_declared_indexes().items()):
+        existing = {_get_keys(index['key']) for index in get_collection(resource).index_information().values()}
+        for name, (keys, options) in sorted(indexes.items()):
+            if _get_keys(keys) in existing:
+                continue
+
+            options = dict(options)
+            options['background'] = True
+            logger.info('Creating index {} on {}'.format(name, resource))
+            create_index(app, resource, name, keys, options)
+            created.append((resource, name))
+
+    return created
+
+
+def get_index_report():
+    """Compare the declared indexes with the ones in the collections
+
+    :return dict: ``{resource: {'missing': [names], 'unused': [names], 'undeclared': [names]}}``
+        ``unused`` are declared indexes not used since the mongo server started,
+        ``undeclared`` are indexes of the collection not declared by the planning package
+    """
+    report = {}
+    for resource, indexes in sorted(get_declared_indexes().items()):
+        collection = get_collection(resource)
+        existing = {
+            _get_keys(index['key']): name
+            for name, index in collection.index_information().items()
+            if name != '_id_'
+        }
+        declared = {_get_keys(keys): name for name, (keys, options) in indexes.items()}
+        usage = get_index_usage(collection)
+
+        report[resource] = {
+            'missing': sorted(name for keys, name in declared.items() if keys not in existing),
+            'unused': sorted(
+                existing[keys] for keys in declared
+                if keys in existing and usage.get(existing[keys]) == 0
+            ),
+            'undeclared': sorted(
+                name for keys, name in existing.items() if keys not in declared
+            ) if resource not in EXTRA_INDEXES else []
+        }
+
+    return report
+
+
+def get_plan_stages(plan):
+    """Get all the stages of a query plan"""
+    stages = [plan.get('stage')]
+    for child in plan.get('inputStages') or []:
+        stages.extend(get_plan_stages(child))
+    if plan.get('inputStage'):
+        stages.extend(get_plan_stages(plan['inputStage']))
+    return stages
+
+
+def explain_queries():
+    """Explain the catalogued queries
+
+    :return list: ``(query, stages, is collection scan)`` for every query
+    """
+    results = []
+    for query in QUERY_CATALOGUE:
+        if query.resource not in app.config['DOMAIN']:
+            continue
+
+        cursor = get_collection(query.resource).find(query.lookup)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+
+        plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        stages = [stage for stage in get_plan_stages(plan) if stage]
+        results.append((query, stages, 'COLLSCAN' in stages))
+
+    return results
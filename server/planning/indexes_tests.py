@@ -0,0 +1,48 @@
+from planning.tests import TestCase
+from planning.bulk import get_collection
+from planning.indexes import get_declared_indexes, get_plan_stages, create_indexes, get_index_report, \
+    QUERY_CATALOGUE
+
+
+class IndexesTestCase(TestCase):
+    def test_declared_indexes(self):
+        with self.app.app_context():
+            indexes = get_declared_indexes()
+            self.assertIn('recurrence_id_1', indexes['events'])
+            self.assertIn('event_item', indexes['planning'])
+            self.assertIn('recurrence_id_1', indexes['planning'])
+            self.assertIn('_planning_date_1', indexes['planning'])
+            self.assertIn('dates.end_1', indexes['events'])
+            self.assertIn('assignment_id_1', indexes['archive'])
+
+    def test_missing_indexes_are_created(self):
+        with self.app.app_context():
+            if 'recurrence_id_1' in get_collection('events').index_information():
+                get_collection('events').drop_index('recurrence_id_1')
+
+            self.assertIn('recurrence_id_1', get_index_report()['events']['missing'])
+
+            self.assertIn(('events', 'recurrence_id_1'), create_indexes())
+            self.assertEqual(get_index_report()['events']['missing'], [])
+            self.assertEqual(create_indexes(), [])
+
+    def test_catalogue_queries_use_declared_indexes(self):
+        with self.app.app_context():
+            declared = get_declared_indexes()
+            for query in QUERY_CATALOGUE:
+                fields = {keys[0][0] for keys, _options in declared.get(query.resource, {}).values()}
+                self.assertTrue(
+                    set(query.lookup) & fields or (query.sort and query.sort[0][0] in fields),
+                    '{} has no declared index'.format(query.description)
+                )
+
+            self.assertIn(('planning', {'recurrence_id': ''}), [
+                (query.resource, query.lookup) for query in QUERY_CATALOGUE
+            ])
+
+    def test_plan_stages(self):
+        plan = {
+            'stage': 'FETCH',
+            'inputStage': {'stage': 'OR', 'inputStages': [{'stage': 'IXSCAN'}, {'stage': 'COLLSCAN'}]}
+        }
+        self.assertEqual(get_plan_stages(plan), ['FETCH', 'OR', 'IXSCAN', 'COLLSCAN'])
@@ -0,0 +1,189 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Paginated history of a single event or planning item
+
+GET /item_history?resource=events_history&item_id=<id>&max_results=50&cursor=<cursor>
+
+Entries are returned oldest first (or newest first with ``sort=desc``) with the
+name of the user who made each change. The ``_next_cursor`` of a response is
+passed as ``cursor`` to get the next page, it is missing on the last page.
+"""
+
+from datetime import datetime, timezone
+from bson import ObjectId
+from flask import json
+from eve.utils import config, ParsedRequest
+from superdesk import Resource, get_resource_service
+from superdesk.services import BaseService
+from superdesk.errors import SuperdeskApiError
+from superdesk.users.services import get_display_name
+from superdesk.utils import ListCursor
+from .bulk import get_collection
+from .history_archive import HISTORY_RESOURCES
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(entry):
+    created = get_position(entry)[0]
+    return '{}:{}'.format(int(created.timestamp() * 1000), entry[config.ID_FIELD])
+
+
+def get_position(entry):
+    """Get the (_created, _id) position of an entry, as :func:`decode_cursor` returns it"""
+    created = entry[config.DATE_CREATED]
+    if created.tzinfo is None:
+        created = created.replace(tzinfo=timezone.utc)
+    return created, entry[config.ID_FIELD]
+
+
+def is_after(entry, position, descending=False):
+    """Check if the entry comes after the ``position`` of a cursor, None being the start"""
+    if position is None:
+        return True
+    return get_position(entry) < position if descending else get_position(entry) > position
+
+
+def decode_cursor(cursor):
+    """Get the (_created, _id) position a cursor points to"""
+    try:
+        created, _id = cursor.split(':', 1)
+        created = datetime.fromtimestamp(int(created) / 1000, timezone.utc)
+    except (ValueError, AttributeError):
+        raise SuperdeskApiError.badRequestError('Invalid history cursor.')
+
+    return created, ObjectId(_id) if ObjectId.is_valid(_id) else _id
+
+
+class HistoryPageCursor(ListCursor):
+    """History page, adding the cursor of the next page to the response"""
+
+    def __init__(self, docs, next_cursor=None):
+        super().__init__(docs)
+        self.next_cursor = next_cursor
+
+    def extra(self, response):
+        if self.next_cursor:
+            response['_next_cursor'] = self.next_cursor
+
+
+def get_user_names(user_ids):
+    """Get the display names of the users with a single query
+
+    :param user_ids: iterable of user ids
+    :return dict: display names keyed by the user id as string
+    """
+    ids = list(set(str(user_id) for user_id in user_ids if user_id))
+    if not ids:
+        return {}
+
+    req = ParsedRequest()
+    req.projection = json.dumps({'display_name': 1, 'username': 1, 'first_name': 1, 'last_name': 1})
+    users = get_resource_service('users').get_from_mongo(req=req, lookup={config.ID_FIELD: {'$in': ids}})
+    return {
+        str(user[config.ID_FIELD]): user.get('display_name') or get_display_name(user) or user.get('username')
+        for user in users
+    }
+
+
+class ItemHistoryService(BaseService):
+
+    def get(self, req, lookup):
+        args = getattr(req, 'args', {}) or {}
+        resource = args.get('resource')
+        item_id = args.get('item_id')
+
+        if resource not in HISTORY_RESOURCES or not item_id:
+            raise SuperdeskApiError.badRequestError('Item history requires a history resource and an item id.')
+
+        try:
+            # req.max_results is always set by eve, to PAGINATION_DEFAULT if the arg is missing
+            page_size = min(int(args.get('max_results') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        except ValueError:
+            raise SuperdeskApiError.badRequestError('Invalid max_results.')
+        return self.get_page(resource, item_id, args.get('cursor'), page_size, args.get('sort') == 'desc')
+
+    def get_page(self, resource, item_id, cursor=None, page_size=DEFAULT_PAGE_SIZE, descending=False):
+        """Get one page of the history of an item
+
+        Uses the (item id, _created) index of the history resource, so every page
+        costs the same no matter how far into the history it is. Entries moved to the
+        history archive are older than the current ones, they are merged in on the first
+        pages (oldest first) or once the current entries run out (newest first).
+
+        :param str resource: history resource name
+        :param str item_id: event or planning item id
+        :param str cursor: cursor returned with the previous page
+        :param int page_size: number of entries in the page
+        :param bool descending: return the newest entries first
+        :return HistoryPageCursor: history entries
+        """
+        query = {HISTORY_RESOURCES[resource]: item_id}
+        position = None
+        if cursor:
+            position = decode_cursor(cursor)
+            created, _id = position
+            after = '$lt' if descending else '$gt'
+            query['$or'] = [
+                {config.DATE_CREATED: {after: created}},
+                {config.DATE_CREATED: created, config.ID_FIELD: {after: _id}}
+            ]
+
+        direction = -1 if descending else 1
+        entries = list(get_collection(resource).find(query).sort(
+            [(config.DATE_CREATED, direction), (config.ID_FIELD, direction)]
+        ).limit(page_size + 1))
+
+        if self._needs_archived(resource, entries, position, page_size, descending):
+            entries = self._merge_archived(resource, item_id, entries, position, page_size, descending)
+
+        next_cursor = None
+        if len(entries) > page_size:
+            entries = entries[:page_size]
+            next_cursor = encode_cursor(entries[-1])
+
+        user_names = get_user_names(entry.get('user_id') for entry in entries)
+        for entry in entries:
+            entry['user_name'] = user_names.get(str(entry.get('user_id')))
+
+        return HistoryPageCursor(entries, next_cursor)
+
+    def _needs_archived(self, resource, entries, position, page_size, descending):
+        if descending:
+            return len(entries) <= page_size
+
+        # the archived entries are all before the current ones
+        return position is None or not get_collection(resource).find_one({config.ID_FIELD: position[1]}, [])
+
+    def _merge_archived(self, resource, item_id, entries, position, page_size, descending):
+        ids = set(entry[config.ID_FIELD] for entry in entries)
+        archived = [
+            entry for entry in get_resource_service('history_archive').get_archived_history(resource, item_id)
+            if entry[config.ID_FIELD] not in ids and is_after(entry, position, descending)
+        ]
+        if not archived:
+            return entries
+
+        return sorted(entries + archived, key=get_position, reverse=descending)[:page_size + 1]
+
+
+class ItemHistoryResource(Resource):
+    endpoint_name = 'item_history'
+    resource_methods = ['GET']
+    item_methods = []
+    schema = {
+        'user_id': Resource.rel('users', True),
+        'user_name': {'type': 'string'},
+        'operation': {'type': 'string'},
+        'update': {'type': 'dict', 'nullable': True}
+    }
+    datasource = {'source': 'events_history'}
@@ -0,0 +1,79 @@
+from datetime import timedelta
+from unittest import mock
+from bson import ObjectId
+from eve.utils import ParsedRequest
+from planning.item_history import ItemHistoryService
+from planning.tests import TestCase
+from superdesk import get_resource_service
+from superdesk.utc import utcnow
+
+
+class ItemHistoryTestCase(TestCase):
+    def test_history_pages(self):
+        with self.app.app_context():
+            user_id = ObjectId()
+            self.app.data.insert('users', [{'_id': user_id, 'username': 'foo', 'display_name': 'Foo Bar'}])
+
+            now = utcnow()
+            self.app.data.insert('planning_history', [{
+                'planning_id': 'p1',
+                'user_id': user_id,
+                'operation': 'update {}'.format(index),
+                '_created': now + timedelta(seconds=index)
+            } for index in range(5)])
+
+            service = get_resource_service('item_history')
+            page = service.get_page('planning_history', 'p1', page_size=2)
+            self.assertEqual([entry['operation'] for entry in page], ['update 0', 'update 1'])
+            self.assertEqual(page[0]['user_name'], 'Foo Bar')
+
+            operations = []
+            cursor = None
+            while True:
+                page = service.get_page('planning_history', 'p1', cursor=cursor, page_size=2)
+                operations.extend(entry['operation'] for entry in page)
+                cursor = page.next_cursor
+                if not cursor:
+                    break
+
+            self.assertEqual(operations, ['update {}'.format(index) for index in range(5)])
+
+            page = service.get_page('planning_history', 'p1', page_size=2, descending=True)
+            self.assertEqual([entry['operation'] for entry in page], ['update 4', 'update 3'])
+
+    def test_history_pages_include_the_archived_history(self):
+        with self.app.app_context():
+            now = utcnow()
+            self.app.data.insert('events_history', [{
+                'event_id': 'e1',
+                'operation': 'update {}'.format(index),
+                '_created': now - timedelta(days=10 - index)
+            } for index in range(5)])
+            get_resource_service('history_archive').archive('events_history', days=7)
+
+            service = get_resource_service('item_history')
+            for descending in (False, True):
+                operations = []
+                cursor = None
+                while True:
+                    page = service.get_page('events_history', 'e1', cursor=cursor, page_size=2, descending=descending)
+                    operations.extend(entry['operation'] for entry in page)
+                    cursor = page.next_cursor
+                    if not cursor:
+                        break
+
+                expected = ['update {}'.format(index) for index in range(5)]
+                self.assertEqual(operations, list(reversed(expected)) if descending else expected)
+
+    def test_page_size(self):
+        with self.app.app_context():
+            req = ParsedRequest()
+            req.max_results = 25
+            req.args = {'resource': 'events_history', 'item_id': 'e1'}
+            with mock.patch.object(ItemHistoryService, 'get_page') as get_page:
+                get_resource_service('item_history').get(req, {})
+                self.assertEqual(get_page.call_args[0][3], 50)
+
+                req.args['max_results'] = '500'
+                get_resource_service('item_history').get(req, {})
+                self.assertEqual(get_page.call_args[0][3], 200)
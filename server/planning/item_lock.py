@@ -12,7 +12,7 @@ import logging
 import superdesk
 
 from superdesk.errors import SuperdeskApiError
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from superdesk.users.services import current_user_has_privilege
 from superdesk.utc import utcnow
 from superdesk.lock import lock, unlock
@@ -28,6 +28,22 @@ LOCK_TIME = 'lock_time'
 logger = logging.getLogger(__name__)
 
 
+def get_item_lock_id(item):
+    """Get the id of the lock taken while the item (or its series) is being locked or changed"""
+    # lock_id will be:
+    # 1 - Recurrence Id for items part of recurring series (event or planning)
+    # 2 - event_item for planning with associated event
+    # 3 - item's _id for all other cases
+    lock_id_field = config.ID_FIELD
+    if item.get('recurrence_id'):
+        lock_id_field = 'recurrence_id'
+    elif item.get('type') != 'event' and item.get('event_item'):
+        lock_id_field = 'event_item'
+
+    # set the lock_id it per item
+    return "item_lock {}".format(item.get(lock_id_field))
+
+
 class LockService(BaseComponent):
     def __init__(self, app):
         """Initialize planning lock component.
@@ -48,18 +64,7 @@ class LockService(BaseComponent):
         item_service = get_resource_service(resource)
         item_id = item.get(config.ID_FIELD)
 
-        # lock_id will be:
-        # 1 - Recurrence Id for items part of recurring series (event or planning)
-        # 2 - event_item for planning with associated event
-        # 3 - item's _id for all other cases
-        lock_id_field = config.ID_FIELD
-        if item.get('recurrence_id'):
-            lock_id_field = 'recurrence_id'
-        elif item.get('type') != 'event' and item.get('event_item'):
-            lock_id_field = 'event_item'
-
-        # set the lock_id it per item
-        lock_id = "item_lock {}".format(item.get(lock_id_field))
+        lock_id = get_item_lock_id(item)
 
         # get the lock it not raise forbidden exception
         if not lock(lock_id, expire=5):
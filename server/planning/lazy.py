@@ -0,0 +1,73 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Lazily imported instances
+
+The superdesk ingest registries take an instance of every feeding service and feed parser,
+so registering them imports their modules, and the dependencies of these (``icalendar``
+for the event feeds). Most processes (celery workers, ``manage.py`` commands) never ingest
+events, so the planning feeding services and parsers are registered as lazy instances,
+which import their class once one of their attributes is used.
+"""
+
+from werkzeug.utils import import_string
+
+
+class LazyInstance:
+    """Proxy of an instance of the class ``import_path``, created on first use
+
+    Every import path gets its own proxy class (see :func:`lazy_instance`), so that
+    ``instance.__class__()``, used by the superdesk ingest to get a new feeding service
+    or parser, returns another lazy instance of the same class.
+    """
+
+    import_path = None
+
+    def __init__(self):
+        self._instance = None
+
+    def get_instance(self):
+        if self._instance is None:
+            self._instance = import_string(self.import_path)()
+        return self._instance
+
+    def __getattr__(self, name):
+        # only called for the attributes the proxy doesn't have
+        if name.startswith('__') or name == '_instance':
+            raise AttributeError(name)
+        return getattr(self.get_instance(), name)
+
+    def __repr__(self):
+        return '<lazy {}>'.format(self.import_path)
+
+
+class LazyTypedInstance(LazyInstance):
+    """Lazy instance which imports its class for ``isinstance`` checks
+
+    Superdesk checks the type of the registered parsers (``isinstance(parser, XMLFeedParser)``),
+    which only works with the real class. Not used for the feeding services, as the app
+    factory checks the type of all of them on start up.
+    """
+
+    @property
+    def __class__(self):
+        return self.get_instance().__class__
+
+
+def lazy_instance(import_path, base=LazyInstance, **attributes):
+    """Return a lazy instance of the class ``import_path``
+
+    :param str import_path: module and name of the class, ``planning.feed_parsers.ics_2_0.IcsTwoFeedParser``
+    :param base: proxy class, :class:`LazyInstance` or :class:`LazyTypedInstance`
+    :param attributes: class attributes available without importing the class, like ``label``
+    """
+    attributes['import_path'] = import_path
+    proxy_class = type('Lazy' + import_path.rsplit('.', 1)[-1], (base,), attributes)
+    return proxy_class()
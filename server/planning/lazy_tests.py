@@ -0,0 +1,52 @@
+import os
+import sys
+import subprocess
+from unittest import TestCase
+from superdesk.io.registry import registered_feeding_services, registered_feed_parsers
+from superdesk.io.feed_parsers import XMLFeedParser
+from werkzeug.utils import import_string
+from planning.lazy import lazy_instance, LazyTypedInstance
+from planning.feeding_services import FEEDING_SERVICES
+from planning.feed_parsers import FEED_PARSERS
+import planning  # noqa
+
+
+class LazyInstanceTestCase(TestCase):
+    def test_class_is_imported_once_used(self):
+        instance = lazy_instance('collections.OrderedDict', label='Ordered')
+        self.assertEqual(instance.label, 'Ordered')
+        self.assertIsNone(instance._instance)
+
+        instance.update(foo=1)
+        self.assertEqual(list(instance.keys()), ['foo'])
+        self.assertEqual(type(instance._instance).__name__, 'OrderedDict')
+
+        # a new instance of the class is another lazy instance
+        other = instance.__class__()
+        self.assertIsNone(other._instance)
+        self.assertEqual(other.import_path, 'collections.OrderedDict')
+
+    def test_typed_instance(self):
+        parser = registered_feed_parsers['ntb_event_xml']
+        self.assertIsInstance(parser, XMLFeedParser)
+        self.assertEqual(type(parser.__class__()).__name__, 'NTBEventXMLFeedParser')
+
+    def test_registrations_match_the_classes(self):
+        for name, label, import_path, errors in FEEDING_SERVICES:
+            service_class = import_string(import_path)
+            self.assertEqual((service_class.NAME, service_class.label), (name, label))
+            self.assertIs(service_class.ERRORS, errors)
+            self.assertEqual(registered_feeding_services[name].import_path, import_path)
+
+        for name, label, import_path in FEED_PARSERS:
+            parser_class = import_string(import_path)
+            self.assertEqual((parser_class.NAME, parser_class.label), (name, label))
+            self.assertEqual(registered_feed_parsers[name].import_path, import_path)
+            self.assertTrue(issubclass(type(registered_feed_parsers[name]), LazyTypedInstance))
+
+    def test_import_defers_ingest_dependencies(self):
+        script = 'import sys, planning; print(" ".join(sorted(sys.modules)))'
+        server = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        modules = subprocess.check_output([sys.executable, '-c', script], cwd=server).decode().split()
+        for module in ('icalendar', 'deepdiff', 'planning.feed_parsers.ics_2_0'):
+            self.assertNotIn(module, modules)
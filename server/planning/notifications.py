@@ -0,0 +1,124 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Push notifications of the planning package, coalesced per request
+
+With ``PLANNING_NOTIFICATIONS_COALESCE`` enabled, notifications are kept until the end
+of the request (or celery task). Notifications with the same name and item are merged,
+the later values winning, except for the ``original_*`` values (the state before the first
+change) which are kept and the ``changes`` which are combined. The notifications are then
+sent in the order they were recorded, consecutive notifications with the same name in
+one message:
+
+- the notification as it was pushed, if it is alone
+- ``{"batch": [<notification>, ...]}`` otherwise, the client handles each entry on its own
+
+With ``PLANNING_NOTIFICATIONS_CHANGES`` enabled, the ``planning:updated``, ``events:updated``
+and ``assignments:updated`` notifications also carry the new ``etag`` of the item and
+its ``changes``, so clients can apply an update without getting the item again.
+Changes larger than ``PLANNING_NOTIFICATIONS_CHANGES_MAX_SIZE`` (bytes of JSON) are left out.
+"""
+
+import logging
+from collections import OrderedDict
+from flask import g, json, current_app as app, has_app_context
+from eve.utils import config
+from superdesk.notification import push_notification as _push_notification
+
+logger = logging.getLogger(__name__)
+
+
+def is_coalescing():
+    return has_app_context() and app.config.get('PLANNING_NOTIFICATIONS_COALESCE', False)
+
+
+def push_notification(name, **kwargs):
+    """Push the notification, or queue it until the end of the request when coalescing"""
+    if not is_coalescing():
+        _push_notification(name, **kwargs)
+        return
+
+    queue = g.get('planning_notifications')
+    if queue is None:
+        queue = g.planning_notifications = OrderedDict()
+
+    # only notifications about a single item are merged
+    key = (name, str(kwargs['item'])) if kwargs.get('item') else (name, len(queue))
+    if key in queue:
+        merge_notification(queue[key], kwargs)
+    else:
+        queue[key] = dict(kwargs)
+
+
+def merge_notification(queued, kwargs):
+    """Merge the arguments of a later notification for the same item into the queued one"""
+    for field, value in kwargs.items():
+        if field.startswith('original_') and field in queued:
+            continue
+
+        if field == 'changes' and isinstance(value, dict) and isinstance(queued.get(field), dict):
+            queued[field] = dict(queued[field], **value)
+        else:
+            queued[field] = value
+
+
+def get_notification_changes(updates, original):
+    """Get the ``etag`` and ``changes`` to add to the notification of an update
+
+    Must be called once the item is written, so the updates hold the etag it is stored with.
+
+    :param dict updates: updates of the item
+    :param dict original: original item
+    :return dict: extra notification arguments, empty unless ``PLANNING_NOTIFICATIONS_CHANGES`` is enabled
+    """
+    if not app.config.get('PLANNING_NOTIFICATIONS_CHANGES', False):
+        return {}
+
+    extra = {'etag': updates.get(config.ETAG) or original.get(config.ETAG)}
+
+    # encoded now, as the updates can still be changed by later hooks
+    changes = json.dumps({field: value for field, value in updates.items() if field != config.ETAG})
+    if len(changes) <= app.config.get('PLANNING_NOTIFICATIONS_CHANGES_MAX_SIZE', 4096):
+        extra['changes'] = json.loads(changes)
+
+    return extra
+
+
+def flush_notifications():
+    """Send the queued notifications in the recorded order, batching consecutive ones with the same name"""
+    queue = g.pop('planning_notifications', None) if has_app_context() else None
+    if not queue:
+        return
+
+    batches = []
+    for (name, _key), kwargs in queue.items():
+        if batches and batches[-1][0] == name:
+            batches[-1][1].append(kwargs)
+        else:
+            batches.append((name, [kwargs]))
+
+    for name, batch in batches:
+        if len(batch) == 1:
+            _push_notification(name, **batch[0])
+        else:
+            _push_notification(name, batch=batch)
+
+
+def flush_notifications_after_request(response):
+    flush_notifications()
+    return response
+
+
+def flush_notifications_on_teardown(exception=None):
+    """Send the notifications still queued when the app context ends (celery tasks and commands)"""
+    try:
+        flush_notifications()
+    except Exception:
+        logger.exception('Failed to send the queued notifications')
@@ -0,0 +1,74 @@
+from unittest import mock
+from planning.tests import TestCase
+from planning.bulk import get_collection
+from superdesk import get_resource_service
+from planning.notifications import push_notification, flush_notifications, get_notification_changes
+
+
+class NotificationsTestCase(TestCase):
+    @mock.patch('planning.notifications._push_notification')
+    def test_notifications_are_sent_straight_away_by_default(self, push):
+        with self.app.app_context():
+            push_notification('planning:updated', item='p1', user='u1')
+            push.assert_called_once_with('planning:updated', item='p1', user='u1')
+
+    @mock.patch('planning.notifications._push_notification')
+    def test_notifications_are_coalesced(self, push):
+        self.app.config['PLANNING_NOTIFICATIONS_COALESCE'] = True
+        with self.app.app_context():
+            push_notification('planning:updated', item='p1', user='u1')
+            push_notification('planning:updated', item='p2', user='u1')
+            push_notification('planning:updated', item='p1', user='u2')
+            push_notification('events:updated', item='e1', user='u1')
+            push.assert_not_called()
+
+            flush_notifications()
+            self.assertEqual(push.call_args_list, [
+                mock.call('planning:updated', batch=[{'item': 'p1', 'user': 'u2'}, {'item': 'p2', 'user': 'u1'}]),
+                mock.call('events:updated', item='e1', user='u1')
+            ])
+
+            push.reset_mock()
+            flush_notifications()
+            push.assert_not_called()
+
+    @mock.patch('planning.notifications._push_notification')
+    def test_coalesced_notifications_keep_the_original_values_and_order(self, push):
+        self.app.config['PLANNING_NOTIFICATIONS_COALESCE'] = True
+        with self.app.app_context():
+            push_notification('assignments:updated', item='a1', assigned_desk='d2', original_assigned_desk='d1',
+                              changes={'priority': 1})
+            push_notification('assignments:removed', item='a2')
+            push_notification('assignments:updated', item='a1', assigned_desk='d3', original_assigned_desk='d2',
+                              changes={'state': 'in_progress'})
+
+            flush_notifications()
+            self.assertEqual(push.call_args_list, [
+                mock.call('assignments:updated', item='a1', assigned_desk='d3', original_assigned_desk='d1',
+                          changes={'priority': 1, 'state': 'in_progress'}),
+                mock.call('assignments:removed', item='a2')
+            ])
+
+    def test_notification_changes(self):
+        with self.app.app_context():
+            updates = {'slugline': 'foo', '_etag': 'e2'}
+            self.assertEqual(get_notification_changes(updates, {'_etag': 'e1'}), {})
+
+            self.app.config['PLANNING_NOTIFICATIONS_CHANGES'] = True
+            self.assertEqual(get_notification_changes(updates, {'_etag': 'e1'}),
+                             {'etag': 'e2', 'changes': {'slugline': 'foo'}})
+
+            self.app.config['PLANNING_NOTIFICATIONS_CHANGES_MAX_SIZE'] = 10
+            self.assertEqual(get_notification_changes(updates, {'_etag': 'e1'}), {'etag': 'e2'})
+
+    @mock.patch('planning.events.push_notification')
+    def test_events_updated_carries_the_stored_etag(self, push):
+        self.app.config['PLANNING_NOTIFICATIONS_CHANGES'] = True
+        with self.app.app_context():
+            self.app.data.insert('events', [{'_id': 'e1', 'name': 'foo', 'dates': {}}])
+            get_resource_service('events').patch('e1', {'name': 'bar'})
+
+            push.assert_called_once_with('events:updated', item='e1', user='', etag=mock.ANY, changes=mock.ANY)
+            kwargs = push.call_args[1]
+            self.assertEqual(kwargs['etag'], get_collection('events').find_one({'_id': 'e1'})['_etag'])
+            self.assertEqual(kwargs['changes']['name'], 'bar')
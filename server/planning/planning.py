@@ -20,11 +20,12 @@ from superdesk.metadata.item import GUID_NEWSML, metadata_schema
 from superdesk import get_resource_service
 from superdesk.resource import not_analyzed
 from superdesk.users.services import current_user_has_privilege
-from superdesk.notification import push_notification
+from .notifications import push_notification, get_notification_changes
 from apps.archive.common import set_original_creator, get_user, get_auth
 from copy import deepcopy
 from eve.utils import config, ParsedRequest
 from .common import WORKFLOW_STATE_SCHEMA, PUBLISHED_STATE_SCHEMA, get_coverage_cancellation_state
+from .archive_tier import needs_archive, search_with_archive
 from superdesk.utc import utcnow
 from itertools import chain
 
@@ -35,6 +36,11 @@ logger = logging.getLogger(__name__)
 class PlanningService(superdesk.Service):
     """Service class for the planning model."""
 
+    def get(self, req, lookup):
+        if needs_archive(self.datasource, req, lookup):
+            return search_with_archive(self.datasource, req, lookup)
+        return super().get(req, lookup)
+
     def __generate_related_assignments(self, docs):
         coverages = {}
         for doc in docs:
@@ -191,7 +197,8 @@ class PlanningService(superdesk.Service):
             item=str(original[config.ID_FIELD]),
             user=str(updates.get('version_creator', '')),
             added_agendas=added, removed_agendas=removed,
-            session=session_id
+            session=session_id,
+            **get_notification_changes(updates, original)
         )
         doc = deepcopy(original)
         doc.update(updates)
@@ -659,4 +666,27 @@ class PlanningResource(superdesk.Resource):
                   'DELETE': 'planning'}
     etag_ignore_fields = ['_planning_schedule', '_planning_date']
 
-    mongo_indexes = {'event_item': ([('event_item', 1)], {'background': True})}
+    mongo_indexes = {
+        'event_item': ([('event_item', 1)], {'background': True}),
+        '_planning_date_1': ([('_planning_date', 1)], {'background': True}),
+        'recurrence_id_1': ([('recurrence_id', 1)], {'background': True}),
+        'lock_session_1': ([('lock_session', 1)], {'background': True}),
+        'expiry_1': ([('expiry', 1)], {'background': True})
+    }
+
+
+class PlanningArchiveResource(superdesk.Resource):
+    """Archive tier of the planning items, see :mod:`planning.archive_tier`"""
+
+    url = 'planning_archive'
+    item_url = item_url
+    schema = planning_schema
+    datasource = {
+        'source': 'planning_archive',
+        'search_backend': 'elastic',
+    }
+    resource_methods = ['GET']
+    item_methods = ['GET']
+    mongo_indexes = {
+        'event_item': ([('event_item', 1)], {'background': True})
+    }
@@ -10,7 +10,7 @@
 
 from superdesk import get_resource_service
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from apps.archive.common import get_user, get_auth
 from eve.utils import config
 from copy import deepcopy
@@ -45,46 +45,55 @@ class PlanningCancelResource(PlanningResource):
     schema = planning_cancel_schema
 
 
+def get_coverage_cancel_state():
+    """Get the news coverage status cancelled coverages are set to"""
+    coverage_states = get_resource_service('vocabularies').find_one(
+        req=None,
+        _id='newscoveragestatus'
+    )
+
+    coverage_cancel_state = None
+    if coverage_states:
+        coverage_cancel_state = next((x for x in coverage_states.get('items', [])
+                                      if x['qcode'] == 'ncostat:notint'), None)
+        coverage_cancel_state.pop('is_active', None)
+
+    return coverage_cancel_state
+
+
+def get_cancel_note(event_cancellation=False, cancel_all_coverage=False):
+    """Formulate the right 'note' for the scenario"""
+    if event_cancellation:
+        return '''------------------------------------------------------------
+Event cancelled
+'''
+    elif cancel_all_coverage:
+        return '''------------------------------------------------------------
+Coverage cancelled
+'''
+
+    return '''------------------------------------------------------------
+Planning cancelled
+'''
+
+
 class PlanningCancelService(BaseService):
     def update(self, id, updates, original):
         user = get_user(required=True).get(config.ID_FIELD, '')
         session = get_auth().get(config.ID_FIELD, '')
-        coverage_states = get_resource_service('vocabularies').find_one(
-            req=None,
-            _id='newscoveragestatus'
-        )
 
         event_cancellation = updates.pop('event_cancellation', False)
         cancel_all_coverage = updates.pop('cancel_all_coverage', False)
 
-        coverage_cancel_state = None
-        if coverage_states:
-            coverage_cancel_state = next((x for x in coverage_states.get('items', [])
-                                          if x['qcode'] == 'ncostat:notint'), None)
-            coverage_cancel_state.pop('is_active', None)
-
-        # Formulate the right 'note' for the scenario
-        note = '''------------------------------------------------------------
-Planning cancelled
-'''
-        if event_cancellation:
-            note = '''------------------------------------------------------------
-Event cancelled
-'''
-        elif cancel_all_coverage:
-            note = '''------------------------------------------------------------
-Coverage cancelled
-'''
-        ids = []
-        updates['coverages'] = deepcopy(original.get('coverages'))
-        coverages = updates.get('coverages') or []
+        coverage_cancel_state = get_coverage_cancel_state()
+        note = get_cancel_note(event_cancellation, cancel_all_coverage)
         reason = updates.pop('reason', None)
 
-        for coverage in coverages:
-            if coverage_cancel_state and coverage.get('news_coverage_status')['qcode'] !=\
-                    coverage_cancel_state['qcode']:
-                ids.append(coverage.get('coverage_id'))
-                self._cancel_coverage(coverage, coverage_cancel_state, note, reason)
+        cancelled = self._cancel_coverages(updates, original, coverage_cancel_state, note, reason)
+        ids = [coverage.get('coverage_id') for coverage, assignment_id in cancelled]
+        get_resource_service('assignments').cancel_assignments([
+            (assignment_id, coverage) for coverage, assignment_id in cancelled if assignment_id
+        ])
 
         if cancel_all_coverage:
             push_notification(
@@ -126,7 +135,27 @@ Coverage cancelled
         updates['ednote'] = ednote
         updates[ITEM_STATE] = WORKFLOW_STATE.CANCELLED
 
+    def _cancel_coverages(self, updates, original, coverage_cancel_state, note, reason):
+        """Cancel the coverages of the planning item that are not cancelled yet
+
+        The assignments are not updated here, so callers can cancel them
+        together (see ``AssignmentsService.cancel_assignments``).
+
+        :return list: (coverage, assignment id) tuples for the cancelled coverages
+        """
+        updates['coverages'] = deepcopy(original.get('coverages'))
+        coverages = updates.get('coverages') or []
+        cancelled = []
+
+        for coverage in coverages:
+            if coverage_cancel_state and coverage.get('news_coverage_status')['qcode'] !=\
+                    coverage_cancel_state['qcode']:
+                cancelled.append((coverage, self._cancel_coverage(coverage, coverage_cancel_state, note, reason)))
+
+        return cancelled
+
     def _cancel_coverage(self, coverage, coverage_cancel_state, note, reason):
+        """Cancel the coverage, returning the id of its assignment (to be cancelled by the caller)"""
         if reason:
             note += 'Reason: {}\n'.format(reason)
 
@@ -136,10 +165,5 @@ Coverage cancelled
         coverage['planning']['internal_note'] = (coverage['planning'].get('internal_note') or '') + '\n\n' + note
         coverage['news_coverage_status'] = coverage_cancel_state
 
-        assigned_to = coverage.get('assigned_to')
-        if assigned_to:
-            assignment_service = get_resource_service('assignments')
-            assignment = assignment_service.find_one(req=None, _id=assigned_to.get('assignment_id'))
-
-            assignment_service.cancel_assignment(assignment, coverage)
-            coverage.pop('assigned_to', None)
+        assigned_to = coverage.pop('assigned_to', None)
+        return (assigned_to or {}).get('assignment_id')
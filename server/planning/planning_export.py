@@ -1,11 +1,14 @@
 
 import superdesk
 
-from flask import render_template_string, current_app
+from functools import lru_cache
+from flask import current_app
+from eve.utils import config
 
 from apps.auth import get_user_id
 from apps.templates.content_templates import get_item_from_template
 from apps.archive.common import insert_into_versions
+from .common import get_desk
 
 
 TEMPLATE = '''
@@ -40,15 +43,50 @@ class PlanningExportResource(superdesk.Resource):
 
 
 def get_item(_id):
-    item = superdesk.get_resource_service('planning').find_one(None, _id=_id) or {}
-    if item.get('event_item'):
-        item['event'] = superdesk.get_resource_service('events').find_one(None, _id=item['event_item'])
-    return item
+    return get_items([_id])[0]
+
+
+def get_items(ids):
+    """Get the planning items with their events, using one query for each resource
+
+    :param list ids: planning item ids
+    :return list: items in the same order as the ids, empty dict for the ones not found
+    """
+    planning_items = {}
+    if ids:
+        planning_items = {str(item[config.ID_FIELD]): item for item in superdesk.get_resource_service(
+            'planning'
+        ).get_from_mongo(req=None, lookup={config.ID_FIELD: {'$in': list(set(ids))}})}
+
+    event_ids = list(set(item['event_item'] for item in planning_items.values() if item.get('event_item')))
+    events = {}
+    if event_ids:
+        events = {str(event[config.ID_FIELD]): event for event in superdesk.get_resource_service(
+            'events'
+        ).get_from_mongo(req=None, lookup={config.ID_FIELD: {'$in': event_ids}})}
+
+    items = []
+    for _id in ids:
+        # copied, as the same planning item can be exported more than once
+        item = dict(planning_items.get(str(_id)) or {})
+        if item.get('event_item'):
+            item['event'] = events.get(str(item['event_item']))
+        items.append(item)
+    return items
+
+
+@lru_cache(maxsize=16)
+def get_body_template(jinja_env, source):
+    """Compile the export template once per app and template source"""
+    return jinja_env.from_string(source)
 
 
 def generate_body(ids):
-    items = [get_item(_id) for _id in ids]
-    template = current_app.config.get('PLANNING_EXPORT_BODY_TEMPLATE', TEMPLATE)
+    items = get_items(ids)
+    template = get_body_template(
+        current_app.jinja_env,
+        current_app.config.get('PLANNING_EXPORT_BODY_TEMPLATE', TEMPLATE)
+    )
     cv = superdesk.get_resource_service('vocabularies').find_one(req=None, _id='g2_content_type')
     if cv:
         labels = {_type['qcode']: _type['name'] for _type in cv['items']}
@@ -59,7 +97,10 @@ def generate_body(ids):
                                         coverage.get('planning').get('g2_content_type'))
                              for coverage in item.get('coverages', [])
                              if (coverage.get('planning') or {}).get('g2_content_type')]
-    return render_template_string(template, items=items)
+
+    context = {'items': items}
+    current_app.update_template_context(context)
+    return template.render(context)
 
 
 def get_desk_template(desk):
@@ -76,7 +117,7 @@ class PlanningExportService(superdesk.Service):
         production = superdesk.get_resource_service('archive')
         for doc in docs:
             planning_items = doc.pop('items', [])
-            desk = superdesk.get_resource_service('desks').find_one(req=None, _id=doc.pop('desk'))
+            desk = get_desk(doc.pop('desk'))
             template = get_desk_template(desk)
             item = get_item_from_template(template)
             item[current_app.config['VERSION']] = 1
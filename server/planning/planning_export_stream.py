@@ -0,0 +1,216 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Streams planning items or events matching a search as CSV or NDJSON
+
+GET /planning_export/stream?resource=planning&format=csv&source={...}&fields=slugline,headline
+
+``source`` is the same elastic query the planning and events lists use.
+Items are read page by page with an elastic scroll and written to a chunked
+response as they are read, so the export size does not affect memory use.
+The same filters and fetched hooks as a GET of the resource are applied.
+"""
+
+import csv
+import io
+import logging
+import superdesk
+from flask import request, json, stream_with_context, current_app as app
+from superdesk.errors import SuperdeskApiError
+
+logger = logging.getLogger(__name__)
+
+bp = superdesk.Blueprint('planning_export_stream', __name__)
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+DEFAULT_FIELDS = {
+    'planning': [
+        '_id', 'slugline', 'headline', 'description_text', 'ednote', 'agendas', 'state', 'pubstatus',
+        'event_item', 'recurrence_id', '_planning_date', 'coverages.planning.g2_content_type',
+        'coverages.assigned_to.desk', 'coverages.assigned_to.user', 'coverages.assigned_to.state',
+        '_created', '_updated'
+    ],
+    'events': [
+        '_id', 'name', 'slugline', 'definition_short', 'dates.start', 'dates.end', 'dates.tz', 'location.name',
+        'calendars.name', 'occur_status.name', 'state', 'pubstatus', 'recurrence_id', '_created', '_updated'
+    ]
+}
+
+
+def get_value(doc, field):
+    """Get the value of a dotted ``field``, lists of dicts give the list of their values"""
+    value = doc
+    for key in field.split('.'):
+        if isinstance(value, list):
+            value = [item.get(key) for item in value if isinstance(item, dict)]
+        elif isinstance(value, dict):
+            value = value.get(key)
+        else:
+            return None
+    return value
+
+
+def format_csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(format_csv_value(item) for item in value if item is not None)
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return str(value)
+
+
+def get_search_body(resource, query, args=None):
+    """Get the elastic search body of the export, with the filters the list GET applies
+
+    The ``filter`` of the query, the ``filter`` request arg and the ``elastic_filter``
+    (and ``elastic_filter_callback``) of the resource datasource all restrict the results,
+    as they do for a GET of the resource.
+
+    :param str resource: planning or events
+    :param dict query: elastic query, paging and aggregations are ignored
+    :param args: request args
+    :return dict: search body
+    """
+    args = args or {}
+    datasource = app.config['DOMAIN'][resource].get('datasource') or {}
+    filters = [query.get('filter')]
+    if args.get('filter'):
+        filters.append(json.loads(args['filter']))
+    filters.append(datasource.get('elastic_filter'))
+    if datasource.get('elastic_filter_callback'):
+        filters.append(datasource['elastic_filter_callback']())
+    filters = [_filter for _filter in filters if _filter]
+
+    body = {key: value for key, value in query.items() if key in ('query', 'post_filter', 'sort')}
+    if filters:
+        body['query'] = {
+            'filtered': {
+                'query': body.get('query') or {'match_all': {}},
+                'filter': {'bool': {'must': filters}}
+            }
+        }
+    body.setdefault('sort', ['_doc'])
+    return body
+
+
+def on_fetched(resource, docs):
+    """Run the fetched hooks of the resource on a page, as a GET of the resource does"""
+    response = {app.config['ITEMS']: docs}
+    getattr(app, 'on_fetched_resource')(resource, response)
+    getattr(app, 'on_fetched_resource_{}'.format(resource))(response)
+    return response[app.config['ITEMS']]
+
+
+def get_pages(resource, body):
+    """Yield the items matching the elastic search ``body`` one page at a time, using an elastic scroll
+
+    The items go through the fetched hooks of the resource (assignment details of the
+    coverages, planning ids of the events) before they are yielded.
+
+    :param str resource: planning or events
+    :param dict body: elastic search body, see :func:`get_search_body`
+    """
+    es = app.data.elastic.es
+    index = app.config.get('ELASTICSEARCH_INDEXES', {}).get(resource, app.data.elastic.index)
+    keep_alive = app.config.get('PLANNING_EXPORT_STREAM_SCROLL', '2m')
+
+    hits = es.search(
+        index=index,
+        doc_type=resource,
+        body=body,
+        scroll=keep_alive,
+        size=app.config.get('PLANNING_EXPORT_STREAM_PAGE_SIZE', 500)
+    )
+    scroll_id = hits.get('_scroll_id')
+
+    try:
+        while hits['hits']['hits']:
+            docs = []
+            for hit in hits['hits']['hits']:
+                doc = hit.get('_source') or {}
+                doc['_id'] = hit['_id']
+                docs.append(doc)
+
+            yield on_fetched(resource, docs)
+
+            hits = es.scroll(scroll_id=scroll_id, scroll=keep_alive)
+            scroll_id = hits.get('_scroll_id')
+    finally:
+        if scroll_id:
+            try:
+                es.clear_scroll(scroll_id=scroll_id)
+            except Exception:
+                logger.warning('Failed to clear the export scroll {}'.format(scroll_id))
+
+
+def generate_csv(pages, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    for docs in pages:
+        for doc in docs:
+            writer.writerow([format_csv_value(get_value(doc, field)) for field in fields])
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def generate_ndjson(pages, fields):
+    for docs in pages:
+        lines = []
+        for doc in docs:
+            row = {field: get_value(doc, field) for field in fields} if fields else doc
+            lines.append(json.dumps(row))
+        yield '\n'.join(lines) + '\n'
+
+
+@bp.route('/planning_export/stream', methods=['GET'])
+def export_stream():
+    resource = request.args.get('resource', 'planning')
+    if resource not in DEFAULT_FIELDS:
+        raise SuperdeskApiError.badRequestError('Export is only available for planning and events.')
+
+    if not app.auth.authorized([], resource, 'GET'):
+        return app.auth.authenticate()
+
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        raise SuperdeskApiError.badRequestError('Export format must be one of: {}.'.format(
+            ', '.join(sorted(EXPORT_FORMATS.keys()))
+        ))
+
+    try:
+        query = json.loads(request.args['source']) if request.args.get('source') else {}
+        body = get_search_body(resource, query, request.args)
+    except ValueError:
+        raise SuperdeskApiError.badRequestError('Invalid export query.')
+
+    fields = [field for field in request.args.get('fields', '').split(',') if field]
+    if not fields and export_format == 'csv':
+        fields = DEFAULT_FIELDS[resource]
+
+    pages = get_pages(resource, body)
+    generate = generate_csv if export_format == 'csv' else generate_ndjson
+
+    response = app.response_class(
+        stream_with_context(generate(pages, fields)),
+        mimetype=EXPORT_FORMATS[export_format]
+    )
+    response.headers['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(resource, export_format)
+    return response
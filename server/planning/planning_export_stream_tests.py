@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+from flask import json
+from planning.tests import TestCase
+from planning.planning_export_stream import get_value, format_csv_value, generate_csv, get_search_body, on_fetched
+
+
+class PlanningExportStreamTestCase(unittest.TestCase):
+
+    def test_get_value(self):
+        doc = {
+            'slugline': 'foo',
+            'dates': {'start': '2017-10-01T10:00:00+0000'},
+            'location': [{'name': 'Prague'}, {'name': 'Brno'}]
+        }
+
+        self.assertEqual(get_value(doc, 'slugline'), 'foo')
+        self.assertEqual(get_value(doc, 'dates.start'), '2017-10-01T10:00:00+0000')
+        self.assertEqual(get_value(doc, 'location.name'), ['Prague', 'Brno'])
+        self.assertIsNone(get_value(doc, 'slugline.name'))
+        self.assertIsNone(get_value(doc, 'headline'))
+
+    def test_format_csv_value(self):
+        self.assertEqual(format_csv_value(None), '')
+        self.assertEqual(format_csv_value(1), '1')
+        self.assertEqual(format_csv_value(['Prague', None, 'Brno']), 'Prague, Brno')
+
+    def test_generate_csv_writes_one_chunk_per_page(self):
+        pages = iter([
+            [{'_id': '1', 'slugline': 'foo'}],
+            [{'_id': '2', 'slugline': 'bar, baz'}]
+        ])
+
+        chunks = list(generate_csv(pages, ['_id', 'slugline']))
+        self.assertEqual(chunks, ['_id,slugline\r\n1,foo\r\n', '2,"bar, baz"\r\n', ''])
+
+
+class PlanningExportStreamFiltersTestCase(TestCase):
+
+    def test_search_body_applies_the_get_filters(self):
+        with self.app.app_context():
+            datasource = self.app.config['DOMAIN']['planning']['datasource']
+            spiked = {'not': {'term': {'state': 'spiked'}}}
+            with mock.patch.dict(datasource, {'elastic_filter': spiked}):
+                body = get_search_body('planning', {
+                    'query': {'term': {'slugline': 'foo'}},
+                    'filter': {'term': {'agendas': 'sports'}},
+                    'size': 10
+                }, {'filter': json.dumps({'term': {'pubstatus': 'usable'}})})
+
+            self.assertEqual(body, {
+                'query': {'filtered': {
+                    'query': {'term': {'slugline': 'foo'}},
+                    'filter': {'bool': {'must': [
+                        {'term': {'agendas': 'sports'}},
+                        {'term': {'pubstatus': 'usable'}},
+                        spiked
+                    ]}}
+                }},
+                'sort': ['_doc']
+            })
+            self.assertEqual(get_search_body('events', {}), {'sort': ['_doc']})
+
+    def test_pages_go_through_the_fetched_hooks(self):
+        with self.app.app_context():
+            self.app.data.insert('planning', [{'_id': 'p1', 'slugline': 'foo', 'event_item': 'e1'}])
+            docs = on_fetched('events', [{'_id': 'e1'}, {'_id': 'e2'}])
+            self.assertEqual(docs, [{'_id': 'e1', 'planning_ids': ['p1']}, {'_id': 'e2'}])
@@ -31,6 +31,11 @@ class PlanningHistoryResource(Resource):
         'update': {'type': 'dict', 'nullable': True}
     }
 
+    mongo_indexes = {
+        '_created_1': ([('_created', 1)], {'background': True}),
+        'planning_id_1__created_1': ([('planning_id', 1), ('_created', 1)], {'background': True})
+    }
+
 
 class PlanningHistoryService(HistoryService):
     """Service for keeping track of the history of a planning entries
@@ -43,23 +48,15 @@ class PlanningHistoryService(HistoryService):
             'operation': operation,
             'update': update
         }
-        self.post([history])
+        self._write_history(history)
 
     def on_item_updated(self, updates, original, operation=None):
-        item = deepcopy(original)
-        if list(item.keys()) == ['_id']:
-            diff = updates
-        else:
-            diff = self._changes(original, updates)
-            if updates:
-                item.update(updates)
-
-        self._save_history(item, diff, operation or 'update')
+        super().on_item_updated(updates, original, operation)
         self._save_coverage_history(updates, original)
 
     def _save_coverage_history(self, updates, original):
         """Save the coverage history for the planning item"""
-        item = deepcopy(original)
+        item = self._get_item_ref(updates, original)
         original_coverages = {c.get('coverage_id'): c for c in (original or {}).get('coverages') or []}
         updates_coverages = {c.get('coverage_id'): c for c in (updates or {}).get('coverages') or []}
         added, deleted, updated = [], [], []
@@ -0,0 +1,294 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Background jobs for operations on large recurring series
+
+POST /planning_jobs {"operation": "events_cancel", "item_id": "<event id>", "updates": {...}}
+
+``operation`` is the endpoint that would otherwise be patched (``events``, ``events_cancel``,
+``events_postpone``, ``events_reschedule`` or ``events_spike``) and ``updates`` the body of that patch.
+The job is returned straight away and the operation runs in a celery task, which holds
+the series lock until it is done and reports its progress with ``planning:job:*`` notifications.
+
+Cancel, postpone and spike record every event of the series they process, so a job
+interrupted by a worker restart continues where it stopped instead of starting over.
+"""
+
+import logging
+from collections import namedtuple
+from copy import deepcopy
+from bson import ObjectId
+from flask import g, current_app as app
+from eve.utils import config
+from eve.methods.common import serialize
+from superdesk import Resource, get_resource_service
+from superdesk.celery_app import celery
+from superdesk.errors import SuperdeskApiError
+from superdesk.lock import lock, unlock
+from superdesk.notification import push_notification
+from superdesk.resource import not_analyzed
+from superdesk.services import BaseService
+from superdesk.users.services import current_user_has_privilege
+from superdesk.utc import utcnow
+from apps.archive.common import get_user, get_auth
+from .bulk import get_collection
+from .item_lock import LOCK_USER, LOCK_SESSION, get_item_lock_id
+
+logger = logging.getLogger(__name__)
+
+# operations that can run as a job, and the privilege they require
+JOB_OPERATIONS = {
+    'events': 'planning_event_management',
+    'events_cancel': 'planning_event_management',
+    'events_postpone': 'planning_event_management',
+    'events_reschedule': 'planning_event_management',
+    'events_spike': 'planning_event_spike'
+}
+
+# operations that skip the events processed before an interruption
+RESUMABLE_OPERATIONS = ('events_cancel', 'events_postpone', 'events_spike')
+
+job_state = ['queued', 'running', 'completed', 'failed']
+JOB_STATE = namedtuple('JOB_STATE', ['QUEUED', 'RUNNING', 'COMPLETED', 'FAILED'])(*job_state)
+
+
+def get_current_job():
+    """Get the job running in this app context, None outside of jobs"""
+    return g.get('planning_job')
+
+
+def set_job_total(total):
+    """Set the number of events the current job processes, used for the progress notifications"""
+    job = get_current_job()
+    if not job:
+        return
+
+    job['total'] = total
+    get_collection('planning_jobs').update_one(
+        {config.ID_FIELD: job[config.ID_FIELD]},
+        {'$set': {'total': total, config.LAST_UPDATED: utcnow()}}
+    )
+
+
+def is_job_processed(key):
+    """Check if the current job already processed ``key`` (an event id or the name of a step)"""
+    job = get_current_job()
+    return bool(job) and str(key) in job['processed']
+
+
+def set_job_processed(key):
+    """Record that the current job processed ``key``, so it is skipped if the job is resumed"""
+    job = get_current_job()
+    if not job:
+        return
+
+    key = str(key)
+    if key in job['processed']:
+        return
+
+    job['processed'].append(key)
+    get_collection('planning_jobs').update_one(
+        {config.ID_FIELD: job[config.ID_FIELD]},
+        {'$addToSet': {'processed': key}, '$set': {config.LAST_UPDATED: utcnow()}}
+    )
+
+    interval = app.config.get('PLANNING_JOB_PROGRESS_INTERVAL', 10)
+    if interval and len(job['processed']) % interval == 0:
+        push_job_notification('planning:job:progress', job)
+
+
+def push_job_notification(event, job, **kwargs):
+    # sent straight away, even when the other notifications are coalesced until the job ends
+    push_notification(
+        event,
+        job=str(job[config.ID_FIELD]),
+        operation=job['operation'],
+        item=str(job['item_id']),
+        user=str(job['user']),
+        session=str(job['session']),
+        processed=len(job.get('processed') or []),
+        total=job.get('total') or 0,
+        **kwargs
+    )
+
+
+def get_job_lock_owner(job):
+    return 'planning_job {}'.format(job[config.ID_FIELD])
+
+
+class PlanningJobsService(BaseService):
+
+    def on_create(self, docs):
+        user_id = get_user(required=True).get(config.ID_FIELD)
+        session_id = get_auth().get(config.ID_FIELD)
+
+        locked = []
+        try:
+            for doc in docs:
+                operation = doc['operation']
+                if not current_user_has_privilege(JOB_OPERATIONS[operation]):
+                    raise SuperdeskApiError.forbiddenError('User does not have sufficient permissions.')
+
+                service = get_resource_service(operation)
+                item = service.find_one(req=None, _id=doc['item_id'])
+                if not item:
+                    raise SuperdeskApiError.notFoundError('Event not found.')
+
+                if item.get(LOCK_USER) and str(item.get(LOCK_SESSION)) != str(session_id):
+                    raise SuperdeskApiError.forbiddenError('The item was locked by another user')
+
+                # validate the updates as the patch of the operation endpoint would
+                updates = serialize(deepcopy(doc.get('updates') or {}), resource=operation)
+                validator = app.validator(app.config['DOMAIN'][operation]['schema'], resource=operation)
+                if not validator.validate_update(updates, item[config.ID_FIELD], item):
+                    raise SuperdeskApiError.badRequestError(message='Invalid job updates.', payload=validator.errors)
+
+                doc.update({
+                    config.ID_FIELD: ObjectId(),
+                    'updates': updates,
+                    'user': user_id,
+                    'session': session_id,
+                    'state': JOB_STATE.QUEUED,
+                    'lock_id': get_item_lock_id(item),
+                    'processed': [],
+                    'total': 0
+                })
+
+                # hold the series lock from now on, so nobody can lock the series until the job is done
+                if not lock(doc['lock_id'], host=get_job_lock_owner(doc), expire=self._get_lock_expiry()):
+                    raise SuperdeskApiError.forbiddenError(message='Item is locked by another user.')
+                locked.append(doc)
+        except Exception:
+            # the jobs are not created, release the locks taken for the previous docs
+            self._release_locks(locked)
+            raise
+
+    def create(self, docs, **kwargs):
+        try:
+            return super().create(docs, **kwargs)
+        except Exception:
+            self._release_locks(docs)
+            raise
+
+    def _release_locks(self, docs):
+        for doc in docs:
+            unlock(doc['lock_id'], host=get_job_lock_owner(doc), remove=True)
+
+    def on_created(self, docs):
+        for doc in docs:
+            push_job_notification('planning:job:queued', doc)
+            run_planning_job.apply_async(args=[str(doc[config.ID_FIELD])])
+
+    def _get_lock_expiry(self):
+        return app.config.get('PLANNING_JOB_LOCK_EXPIRY', 3600)
+
+    def _set_state(self, job, state, **kwargs):
+        job['state'] = state
+        job.update(kwargs)
+        updates = {'state': state, config.LAST_UPDATED: utcnow()}
+        updates.update(kwargs)
+        get_collection(self.datasource).update_one({config.ID_FIELD: job[config.ID_FIELD]}, {'$set': updates})
+
+    def run(self, job_id):
+        """Run the job, or continue it if it was interrupted
+
+        :param job_id: id of the job
+        """
+        job = self.find_one(req=None, _id=ObjectId(job_id))
+        if not job or job['state'] in (JOB_STATE.COMPLETED, JOB_STATE.FAILED):
+            return
+
+        job.setdefault('processed', [])
+        if job['state'] == JOB_STATE.RUNNING and job['operation'] not in RESUMABLE_OPERATIONS:
+            self._set_state(job, JOB_STATE.FAILED, error='The job was interrupted.')
+            push_job_notification('planning:job:failed', job, error=job['error'])
+            unlock(job['lock_id'], host=get_job_lock_owner(job), remove=True)
+            return
+
+        # take the series lock again, it may have expired if the job was interrupted
+        owner = get_job_lock_owner(job)
+        unlock(job['lock_id'], host=owner, remove=True)
+        if not lock(job['lock_id'], host=owner, expire=self._get_lock_expiry()):
+            self._set_state(job, JOB_STATE.FAILED, error='Item is locked by another user.')
+            push_job_notification('planning:job:failed', job, error=job['error'])
+            return
+
+        # run the operation as the user who created the job
+        g.user = get_resource_service('users').find_one(req=None, _id=job['user']) or {}
+        g.auth = {config.ID_FIELD: job['session']}
+        g.planning_job = job
+
+        try:
+            self._set_state(job, JOB_STATE.RUNNING)
+            push_job_notification('planning:job:started', job)
+
+            service = get_resource_service(job['operation'])
+            original = service.find_one(req=None, _id=job['item_id'])
+            if not original:
+                raise SuperdeskApiError.notFoundError('Event not found.')
+
+            updates = deepcopy(job.get('updates') or {})
+            service.patch(original[config.ID_FIELD], updates)
+            getattr(app, 'on_updated_%s' % job['operation'])(updates, original)
+
+            self._set_state(job, JOB_STATE.COMPLETED)
+            push_job_notification('planning:job:completed', job)
+        except Exception as e:
+            logger.exception('Planning job {} failed'.format(job_id))
+            self._set_state(job, JOB_STATE.FAILED, error=str(e))
+            push_job_notification('planning:job:failed', job, error=job['error'])
+        finally:
+            g.pop('planning_job', None)
+            unlock(job['lock_id'], host=owner, remove=True)
+
+
+@celery.task(soft_time_limit=3600, acks_late=True)
+def run_planning_job(job_id):
+    get_resource_service('planning_jobs').run(job_id)
+
+
+class PlanningJobsResource(Resource):
+    endpoint_name = resource_title = 'planning_jobs'
+    url = 'planning_jobs'
+    schema = {
+        'operation': {
+            'type': 'string',
+            'required': True,
+            'allowed': list(JOB_OPERATIONS.keys()),
+            'mapping': not_analyzed
+        },
+        'item_id': {
+            'type': 'string',
+            'required': True,
+            'mapping': not_analyzed
+        },
+        'updates': {'type': 'dict'},
+        'state': {
+            'type': 'string',
+            'allowed': job_state,
+            'readonly': True,
+            'mapping': not_analyzed
+        },
+        'user': Resource.rel('users'),
+        'session': {'type': 'string', 'readonly': True},
+        'lock_id': {'type': 'string', 'readonly': True},
+        'total': {'type': 'integer', 'readonly': True},
+        'processed': {
+            'type': 'list',
+            'readonly': True,
+            'schema': {'type': 'string'}
+        },
+        'error': {'type': 'string', 'readonly': True}
+    }
+
+    datasource = {'source': 'planning_jobs'}
+    resource_methods = ['GET', 'POST']
+    item_methods = ['GET']
+    privileges = {'POST': 'planning_event_management'}
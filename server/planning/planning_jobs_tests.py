@@ -0,0 +1,70 @@
+from unittest import mock
+from bson import ObjectId
+from flask import g
+from superdesk.errors import SuperdeskApiError
+from planning.tests import TestCase
+from superdesk import get_resource_service
+from planning.planning_jobs import JOB_STATE, is_job_processed, set_job_processed, set_job_total
+
+
+class PlanningJobsTestCase(TestCase):
+    def test_processed_events_are_recorded_on_the_job(self):
+        with self.app.app_context():
+            self.app.data.insert('planning_jobs', [{
+                '_id': 'job1', 'operation': 'events_cancel', 'item_id': 'e1',
+                'user': 'u1', 'session': 's1', 'state': JOB_STATE.RUNNING, 'processed': []
+            }])
+            service = get_resource_service('planning_jobs')
+
+            # without a job nothing is recorded or skipped
+            set_job_processed('e2')
+            self.assertFalse(is_job_processed('e2'))
+
+            g.planning_job = service.find_one(req=None, _id='job1')
+            set_job_total(2)
+            set_job_processed('e2')
+            set_job_processed('e2')
+            self.assertTrue(is_job_processed('e2'))
+            self.assertFalse(is_job_processed('e3'))
+
+            job = service.find_one(req=None, _id='job1')
+            self.assertEqual(job['processed'], ['e2'])
+            self.assertEqual(job['total'], 2)
+
+    def test_completed_jobs_are_not_run_again(self):
+        job_id = ObjectId()
+        with self.app.app_context():
+            self.app.data.insert('planning_jobs', [{
+                '_id': job_id, 'operation': 'events_cancel', 'item_id': 'e1',
+                'user': 'u1', 'session': 's1', 'state': JOB_STATE.COMPLETED, 'processed': []
+            }])
+            get_resource_service('planning_jobs').run(str(job_id))
+            self.assertEqual(get_resource_service('planning_jobs').find_one(req=None, _id=job_id)['state'],
+                             JOB_STATE.COMPLETED)
+
+    @mock.patch('planning.planning_jobs.current_user_has_privilege', return_value=True)
+    @mock.patch('planning.planning_jobs.unlock')
+    @mock.patch('planning.planning_jobs.lock', return_value=True)
+    def test_locks_are_released_when_the_jobs_are_not_created(self, lock, unlock, _privilege):
+        with self.app.app_context():
+            self.app.data.insert('events', [{'_id': 'e1', 'name': 'foo', 'dates': {}}])
+            g.user = {'_id': ObjectId()}
+            g.auth = {'_id': ObjectId()}
+            service = get_resource_service('planning_jobs')
+
+            docs = [
+                {'operation': 'events_cancel', 'item_id': 'e1', 'updates': {}},
+                {'operation': 'events_cancel', 'item_id': 'missing', 'updates': {}}
+            ]
+            with self.assertRaises(SuperdeskApiError):
+                service.on_create(docs)
+            self.assertEqual(lock.call_count, 1)
+            unlock.assert_called_once_with('item_lock e1', host='planning_job {}'.format(docs[0]['_id']), remove=True)
+
+            unlock.reset_mock()
+            docs = [{'operation': 'events_cancel', 'item_id': 'e1', 'updates': {}}]
+            service.on_create(docs)
+            with mock.patch('superdesk.services.BaseService.create', side_effect=Exception('insert failed')):
+                with self.assertRaises(Exception):
+                    service.create(docs)
+            unlock.assert_called_once_with('item_lock e1', host='planning_job {}'.format(docs[0]['_id']), remove=True)
@@ -11,7 +11,7 @@
 from .planning import PlanningResource
 from .common import ITEM_EXPIRY, ITEM_STATE, set_item_expiry, WORKFLOW_STATE
 from superdesk.services import BaseService
-from superdesk.notification import push_notification
+from .notifications import push_notification
 from apps.auth import get_user
 from superdesk import config
 from .item_lock import LOCK_USER, LOCK_SESSION
@@ -0,0 +1,209 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Purge of the expired events and planning items
+
+Events and planning items with an ``expiry`` in the past are removed from mongo and elastic,
+one batch at a time, unless they are locked (when read or when deleted) or still in use:
+
+* planning items with active (not completed or cancelled) assignments are kept,
+  the other assignments of a purged planning item are removed with it (with their
+  deliveries, workload counts and links to content)
+* events with planning items are kept, planning items are purged first so that
+  events of purged planning items are purged in the same run
+
+If enabled, a tombstone (the id, name and dates of the item) is written to the
+``planning_purged_items`` collection for every purged item.
+"""
+
+import logging
+from flask import current_app as app
+from eve.utils import config
+from superdesk import Resource, get_resource_service
+from superdesk.services import BaseService
+from superdesk.resource import not_analyzed
+from superdesk.utc import utcnow
+from .assignments import invalidate_assignment_cache
+from .bulk import get_collection, bulk_delete, bulk_insert, bulk_update
+from .common import ITEM_EXPIRY, ACTIVE_ASSIGNMENT_STATES
+
+logger = logging.getLogger(__name__)
+
+# purged resources and the fields of their tombstones (name and date)
+PURGED_RESOURCES = {
+    'planning': ('slugline', '_planning_date'),
+    'events': ('name', 'dates.start')
+}
+
+
+def get_field(doc, path):
+    for key in path.split('.'):
+        doc = (doc or {}).get(key)
+    return doc
+
+
+class PurgedItemsService(BaseService):
+
+    def get_expired(self, resource, batch_size, now=None):
+        """Yield the expired items of the resource which are not locked, one batch at a time
+
+        The items are read with a single cursor on the ``expiry`` index, so items kept
+        by a batch are not read again by the next one.
+        """
+        name_field, date_field = PURGED_RESOURCES[resource]
+        cursor = get_collection(resource).find(
+            {ITEM_EXPIRY: {'$lt': now or utcnow()}, 'lock_user': None},
+            [config.ID_FIELD, ITEM_EXPIRY, name_field, date_field]
+        ).sort(ITEM_EXPIRY, 1).batch_size(batch_size)
+
+        batch = []
+        for item in cursor:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def purge(self, batch_size=None, tombstones=None):
+        """Purge the expired planning items and events
+
+        :param int batch_size: number of items per batch, defaults to ``PLANNING_PURGE_EXPIRED_BATCH_SIZE``
+        :param bool tombstones: write tombstones, defaults to ``PLANNING_PURGE_EXPIRED_TOMBSTONES``
+        :return dict: number of purged items by resource
+        """
+        batch_size = batch_size or app.config.get('PLANNING_PURGE_EXPIRED_BATCH_SIZE', 500)
+        if tombstones is None:
+            tombstones = app.config.get('PLANNING_PURGE_EXPIRED_TOMBSTONES', False)
+
+        now = utcnow()
+        return {
+            'planning': self.purge_planning(batch_size, tombstones, now),
+            'events': self.purge_events(batch_size, tombstones, now)
+        }
+
+    def purge_planning(self, batch_size, tombstones=False, now=None):
+        now = now or utcnow()
+        total = 0
+        for batch in self.get_expired('planning', batch_size, now):
+            ids = [item[config.ID_FIELD] for item in batch]
+            active = set(assignment['planning_item'] for assignment in get_collection('assignments').find(
+                {'planning_item': {'$in': ids}, 'assigned_to.state': {'$in': ACTIVE_ASSIGNMENT_STATES}},
+                ['planning_item']
+            ))
+            items = [item for item in batch if item[config.ID_FIELD] not in active]
+            if not items:
+                continue
+
+            deleted = self._delete('planning', items, tombstones, now)
+            self._delete_assignments(deleted)
+            total += len(deleted)
+            logger.info('Purged {} expired planning items'.format(total))
+
+        return total
+
+    def purge_events(self, batch_size, tombstones=False, now=None):
+        now = now or utcnow()
+        planning = get_collection('planning')
+        total = 0
+        for batch in self.get_expired('events', batch_size, now):
+            ids = [item[config.ID_FIELD] for item in batch]
+            used = set(plan['event_item'] for plan in planning.find(
+                {'event_item': {'$in': ids}}, ['event_item']
+            ))
+            items = [item for item in batch if item[config.ID_FIELD] not in used]
+            if items:
+                total += len(self._delete('events', items, tombstones, now))
+                logger.info('Purged {} expired events'.format(total))
+
+        return total
+
+    def _delete(self, resource, items, tombstones, now):
+        """Delete the items, unless they were locked or their expiry changed since they were read
+
+        :return list: ids of the deleted items
+        """
+        deleted = bulk_delete(resource, [item[config.ID_FIELD] for item in items], {
+            ITEM_EXPIRY: {'$lt': now},
+            'lock_user': None
+        })
+
+        if tombstones and deleted:
+            name_field, date_field = PURGED_RESOURCES[resource]
+            deleted_ids = set(deleted)
+            bulk_insert(self.datasource, [{
+                'resource': resource,
+                'item_id': str(item[config.ID_FIELD]),
+                'name': get_field(item, name_field),
+                'item_date': get_field(item, date_field),
+                ITEM_EXPIRY: item.get(ITEM_EXPIRY)
+            } for item in items if item[config.ID_FIELD] in deleted_ids])
+
+        return deleted
+
+    def _delete_assignments(self, planning_ids):
+        """Delete the assignments of the purged planning items, with their deliveries
+
+        The workload counters are updated and the content linked to the assignments is unlinked.
+        """
+        if not planning_ids:
+            return
+
+        assignments = list(get_collection('assignments').find(
+            {'planning_item': {'$in': planning_ids}}, [config.ID_FIELD, 'assigned_to']
+        ))
+        if not assignments:
+            return
+
+        delivery_ids = [delivery[config.ID_FIELD] for delivery in get_collection('delivery').find(
+            {'planning_id': {'$in': planning_ids}}, [config.ID_FIELD]
+        )]
+        bulk_delete('delivery', delivery_ids)
+
+        deleted = set(bulk_delete('assignments', [assignment[config.ID_FIELD] for assignment in assignments]))
+        invalidate_assignment_cache(deleted)
+        get_resource_service('assignments_workload').update_counters([
+            (assignment.get('assigned_to'), None)
+            for assignment in assignments if assignment[config.ID_FIELD] in deleted
+        ])
+
+        # unlinked as assignments/unlink does, keeping the etag of the content
+        items = list(get_collection('archive').find({
+            'assignment_id': {'$in': list(deleted) + [str(_id) for _id in deleted]}
+        }))
+        bulk_update('archive', [
+            (item, dict({'assignment_id': None}, **({config.ETAG: item[config.ETAG]} if item.get(config.ETAG) else {})))
+            for item in items
+        ])
+
+
+class PurgedItemsResource(Resource):
+    endpoint_name = 'planning_purged_items'
+    resource_methods = ['GET']
+    item_methods = []
+    privileges = {'GET': 'planning'}
+    schema = {
+        'resource': {
+            'type': 'string',
+            'allowed': list(PURGED_RESOURCES.keys()),
+            'mapping': not_analyzed
+        },
+        'item_id': {
+            'type': 'string',
+            'mapping': not_analyzed
+        },
+        'name': {'type': 'string'},
+        'item_date': {'type': 'datetime'},
+        ITEM_EXPIRY: {'type': 'datetime'}
+    }
+
+    mongo_indexes = {
+        'resource_1_item_id_1': ([('resource', 1), ('item_id', 1)], {'background': True})
+    }
@@ -0,0 +1,120 @@
+from datetime import timedelta
+from unittest import mock
+from bson import ObjectId
+from planning.tests import TestCase
+from planning.bulk import get_collection
+from superdesk import get_resource_service
+from superdesk.utc import utcnow
+from superdesk.tests import update_config
+from superdesk.factory.app import get_app
+from planning.commands.purge_expired_items import PurgeExpiredItemsCommand
+
+
+class PurgedItemsTestCase(TestCase):
+    def test_purge_expired_items(self):
+        with self.app.app_context():
+            now = utcnow()
+            expired = now - timedelta(days=1)
+            self.app.data.insert('events', [
+                {'_id': 'e1', 'name': 'expired', 'dates': {'start': expired}, 'expiry': expired},
+                {'_id': 'e2', 'name': 'with planning', 'dates': {'start': expired}, 'expiry': expired},
+                {'_id': 'e3', 'name': 'locked', 'dates': {'start': expired}, 'expiry': expired,
+                 'lock_user': ObjectId()},
+                {'_id': 'e4', 'name': 'not expired', 'dates': {'start': now}, 'expiry': now + timedelta(days=1)},
+                {'_id': 'e5', 'name': 'of a purged planning item', 'dates': {'start': expired}, 'expiry': expired},
+            ])
+            self.app.data.insert('planning', [
+                {'_id': 'p1', 'slugline': 'expired', 'expiry': expired},
+                {'_id': 'p2', 'slugline': 'assigned', 'expiry': expired, 'event_item': 'e2'},
+                {'_id': 'p3', 'slugline': 'completed', 'expiry': expired, 'event_item': 'e5'},
+            ])
+            self.app.data.insert('assignments', [
+                {'_id': ObjectId(), 'planning_item': 'p2', 'assigned_to': {'state': 'in_progress'}},
+                {'_id': ObjectId(), 'planning_item': 'p3', 'assigned_to': {'state': 'completed'}},
+            ])
+
+            purged = get_resource_service('planning_purged_items').purge(batch_size=2, tombstones=True)
+            self.assertEqual(purged, {'planning': 2, 'events': 2})
+
+            self.assertEqual(sorted(event['_id'] for event in get_collection('events').find()), ['e2', 'e3', 'e4'])
+            self.assertEqual([plan['_id'] for plan in get_collection('planning').find()], ['p2'])
+            self.assertEqual([assignment['planning_item'] for assignment in get_collection('assignments').find()],
+                             ['p2'])
+
+            tombstones = {
+                (tombstone['resource'], tombstone['item_id']): tombstone
+                for tombstone in get_collection('planning_purged_items').find()
+            }
+            self.assertEqual(sorted(tombstones.keys()), [
+                ('events', 'e1'), ('events', 'e5'), ('planning', 'p1'), ('planning', 'p3')
+            ])
+            self.assertEqual(tombstones[('events', 'e1')]['name'], 'expired')
+            self.assertEqual(tombstones[('planning', 'p3')]['name'], 'completed')
+
+    def test_tombstones_are_optional(self):
+        with self.app.app_context():
+            expired = utcnow() - timedelta(days=1)
+            self.app.data.insert('events', [{'_id': 'e1', 'name': 'expired', 'dates': {}, 'expiry': expired}])
+
+            purged = get_resource_service('planning_purged_items').purge()
+            self.assertEqual(purged, {'planning': 0, 'events': 1})
+            self.assertEqual(get_collection('planning_purged_items').count(), 0)
+
+    @mock.patch('planning.assignments_workload.AssignmentsWorkloadService.update_counters')
+    def test_purged_assignments_are_removed_from_workload_and_content(self, update_counters):
+        with self.app.app_context():
+            expired = utcnow() - timedelta(days=1)
+            assignment_id = ObjectId()
+            assigned_to = {'desk': 'd1', 'user': 'u1', 'state': 'completed'}
+            self.app.data.insert('planning', [{'_id': 'p1', 'slugline': 'expired', 'expiry': expired}])
+            self.app.data.insert('assignments', [
+                {'_id': assignment_id, 'planning_item': 'p1', 'assigned_to': assigned_to}
+            ])
+            self.app.data.insert('archive', [{'_id': 'i1', 'type': 'text', 'assignment_id': assignment_id}])
+
+            purged = get_resource_service('planning_purged_items').purge()
+            self.assertEqual(purged, {'planning': 1, 'events': 0})
+            update_counters.assert_called_once_with([(assigned_to, None)])
+            self.assertIsNone(get_collection('archive').find_one({'_id': 'i1'})['assignment_id'])
+
+    def test_items_locked_while_purging_are_kept(self):
+        with self.app.app_context():
+            expired = utcnow() - timedelta(days=1)
+            self.app.data.insert('events', [
+                {'_id': 'e1', 'name': 'locked meanwhile', 'dates': {}, 'expiry': expired},
+                {'_id': 'e2', 'name': 'expired', 'dates': {}, 'expiry': expired},
+            ])
+
+            service = get_resource_service('planning_purged_items')
+            get_expired = service.get_expired
+
+            def lock_after_read(resource, batch_size, now=None):
+                for batch in get_expired(resource, batch_size, now):
+                    get_collection('events').update_one({'_id': 'e1'}, {'$set': {'lock_user': ObjectId()}})
+                    yield batch
+
+            with mock.patch.object(service, 'get_expired', side_effect=lock_after_read):
+                purged = service.purge(tombstones=True)
+
+            self.assertEqual(purged, {'planning': 0, 'events': 1})
+            self.assertEqual([event['_id'] for event in get_collection('events').find()], ['e1'])
+            self.assertEqual([tombstone['item_id'] for tombstone in get_collection('planning_purged_items').find()],
+                             ['e2'])
+
+
+class PurgeExpiredTaskTestCase(TestCase):
+    def test_purge_task_is_scheduled_when_enabled(self):
+        self.assertNotIn('planning:purge_expired', self.app.config['CELERY_BEAT_SCHEDULE'])
+
+        config = {'INSTALLED_APPS': ['planning'], 'PLANNING_PURGE_EXPIRED': True}
+        update_config(config)
+        entry = get_app(config).config['CELERY_BEAT_SCHEDULE']['planning:purge_expired']
+        self.assertEqual(entry['task'], 'planning.commands.purge_expired_items.purge_expired_items')
+        self.assertEqual(entry['schedule'], timedelta(hours=1))
+
+    def test_purge_is_skipped_while_running(self):
+        with self.app.app_context():
+            with mock.patch('planning.commands.purge_expired_items.lock', return_value=False), \
+                    mock.patch('planning.commands.purge_expired_items.get_resource_service') as get_service:
+                PurgeExpiredItemsCommand().run()
+            get_service.assert_not_called()
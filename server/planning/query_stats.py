@@ -0,0 +1,248 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Count the mongo and elastic queries made by the planning services during a request
+
+Enabled with ``PLANNING_QUERY_STATS``. The queries made through the backend of the
+planning services (and the bulk helpers) are counted per resource and operation,
+per query shape (the fields of the lookup) and per service hook (``on_create``,
+``on_update``...) they were made from. Once the request is finished:
+
+- read queries with the same shape repeated ``PLANNING_QUERY_STATS_REPEAT_THRESHOLD``
+  times (5 by default) are logged as a possible N+1 query
+- requests that took longer than ``PLANNING_QUERY_STATS_SLOW_REQUEST`` seconds
+  (1 by default) are logged with the breakdown of their queries
+
+Tests can record all the queries made by an app with ``start_query_recording``.
+"""
+
+import sys
+import time
+import logging
+from collections import Counter
+from flask import g, json, request, has_app_context, has_request_context, current_app as app
+from eve.utils import ParsedRequest
+from superdesk.eve_backend import EveBackend
+
+logger = logging.getLogger(__name__)
+
+READ_OPERATIONS = ('find', 'find_one', 'find_list_of_ids', 'aggregate')
+QUERY_OPERATIONS = READ_OPERATIONS + ('insert', 'update', 'replace', 'remove', 'bulk_write', 'insert_many')
+
+# frames to look through for the service hook making the query
+MAX_HOOK_DEPTH = 30
+
+
+class QueryStats:
+    """Queries made during a request (or recorded by a test)"""
+
+    def __init__(self):
+        self.start = time.time()
+        self.total = 0
+        self.queries = Counter()
+        self.shapes = Counter()
+        self.hooks = Counter()
+
+    def add(self, kind, resource, operation, shape=(), hook=None):
+        self.total += 1
+        self.queries[(kind, resource, operation)] += 1
+        if operation in READ_OPERATIONS:
+            self.shapes[(kind, resource, operation, shape)] += 1
+        if hook:
+            self.hooks[hook] += 1
+
+    @property
+    def duration(self):
+        return time.time() - self.start
+
+    def get_repeated(self, threshold):
+        """Get the read queries with the same shape made at least ``threshold`` times"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def format_breakdown(self):
+        queries = ', '.join(
+            '{} {}.{}={}'.format(kind, resource, operation, count)
+            for (kind, resource, operation), count in self.queries.most_common()
+        )
+        hooks = ', '.join('{}={}'.format(hook, count) for hook, count in self.hooks.most_common())
+        return '{}{}'.format(queries, ' (hooks: {})'.format(hooks) if hooks else '')
+
+
+def is_enabled():
+    return has_app_context() and app.config.get('PLANNING_QUERY_STATS', False)
+
+
+def get_query_shape(args, kwargs):
+    """Get the fields (and operators) of the lookups of a read query"""
+    keys = []
+    lookups = list(args) + [kwargs.get('req'), {key: value for key, value in kwargs.items() if key != 'req'}]
+    for lookup in lookups:
+        if isinstance(lookup, ParsedRequest):
+            try:
+                lookup = json.loads(lookup.where) if lookup.where else None
+            except (TypeError, ValueError):
+                lookup = None
+
+        if isinstance(lookup, dict):
+            for key, value in sorted(lookup.items()):
+                if isinstance(value, dict) and value and all(str(op).startswith('$') for op in value):
+                    keys.append('{}.{}'.format(key, ','.join(sorted(value))))
+                else:
+                    keys.append(key)
+
+    return tuple(keys)
+
+
+def get_hook():
+    """Get the service hook (i.e. ``EventsService.on_update``) the query is made from"""
+    frame = sys._getframe(2)
+    for _depth in range(MAX_HOOK_DEPTH):
+        if frame is None:
+            break
+
+        name = frame.f_code.co_name
+        service = frame.f_locals.get('self')
+        if name.startswith('on_') and hasattr(service, 'datasource'):
+            return '{}.{}'.format(type(service).__name__, name)
+
+        frame = frame.f_back
+
+    return None
+
+
+def record_query(kind, resource, operation, args=(), kwargs=None):
+    """Count a query made to mongo or elastic in the current request
+
+    :param str kind: ``mongo`` or ``elastic``
+    :param str resource: resource (or collection) queried
+    :param str operation: operation name, i.e. ``find_one``
+    :param args: positional arguments of the query, used to get the query shape
+    :param kwargs: keyword arguments of the query, used to get the query shape
+    """
+    if not is_enabled():
+        return
+
+    kwargs = kwargs or {}
+    shape = get_query_shape(args, kwargs) if operation in READ_OPERATIONS else ()
+    hook = get_hook()
+
+    stats = g.get('planning_query_stats')
+    if stats is None:
+        stats = g.planning_query_stats = QueryStats()
+    stats.add(kind, resource, operation, shape, hook)
+
+    recorder = getattr(app, 'planning_query_recorder', None)
+    if recorder is not None:
+        recorder.add(kind, resource, operation, shape, hook)
+
+
+def report_query_stats(name):
+    """Log the possible N+1 queries and the slow request of the current app context"""
+    stats = g.pop('planning_query_stats', None) if has_app_context() else None
+    if stats is None:
+        return
+
+    threshold = app.config.get('PLANNING_QUERY_STATS_REPEAT_THRESHOLD', 5)
+    for (kind, resource, operation, shape), count in stats.get_repeated(threshold):
+        logger.warning('Possible N+1 query in {}: {} {}.{} by {} made {} times'.format(
+            name, kind, resource, operation, ', '.join(shape) or 'no lookup', count
+        ))
+
+    duration = stats.duration
+    if duration >= app.config.get('PLANNING_QUERY_STATS_SLOW_REQUEST', 1):
+        logger.warning('Slow request {} took {:.3f}s with {} queries: {}'.format(
+            name, duration, stats.total, stats.format_breakdown()
+        ))
+    else:
+        logger.debug('Request {} took {:.3f}s with {} queries: {}'.format(
+            name, duration, stats.total, stats.format_breakdown()
+        ))
+
+
+def start_query_stats():
+    """Start counting the queries of a new request
+
+    The app context can be shared by several requests (i.e. in tests).
+    """
+    if is_enabled():
+        g.planning_query_stats = QueryStats()
+
+
+def report_query_stats_after_request(response):
+    if has_request_context():
+        report_query_stats('{} {}'.format(request.method, request.path))
+    return response
+
+
+def report_query_stats_on_teardown(exception=None):
+    """Report the queries of celery tasks and commands, made outside of any request"""
+    try:
+        report_query_stats('app context')
+    except Exception:
+        logger.exception('Failed to report the query stats')
+
+
+def start_query_recording(flask_app):
+    """Record all the queries made by the app, until ``stop_query_recording`` is called
+
+    :return QueryStats: recorded queries
+    """
+    flask_app.planning_query_recorder = QueryStats()
+    return flask_app.planning_query_recorder
+
+
+def stop_query_recording(flask_app):
+    """Stop recording the queries of the app
+
+    :return QueryStats: recorded queries, None if they were not recorded
+    """
+    recorder = getattr(flask_app, 'planning_query_recorder', None)
+    flask_app.planning_query_recorder = None
+    return recorder
+
+
+class CountingLayer:
+    """Data layer (eve mongo or elastic) proxy counting the queries made through it"""
+
+    def __init__(self, layer, kind, resource):
+        self._layer = layer
+        self._kind = kind
+        self._resource = resource
+
+    def __getattr__(self, name):
+        attr = getattr(self._layer, name)
+        if name not in QUERY_OPERATIONS or not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            record_query(self._kind, self._resource, name, args, kwargs)
+            return attr(*args, **kwargs)
+
+        return counted
+
+
+class QueryCountingBackend(EveBackend):
+    """Backend counting the mongo and elastic queries made by the services"""
+
+    def _backend(self, endpoint_name):
+        backend = super()._backend(endpoint_name)
+        return CountingLayer(backend, 'mongo', endpoint_name) if is_enabled() else backend
+
+    def _lookup_backend(self, endpoint_name, fallback=False):
+        backend = super()._lookup_backend(endpoint_name, fallback)
+        if backend is None or not is_enabled():
+            return backend
+
+        kind = 'elastic' if app.data._search_backend(endpoint_name) is backend else 'mongo'
+        return CountingLayer(backend, kind, endpoint_name)
+
+    def remove_from_search(self, endpoint_name, _id):
+        record_query('elastic', endpoint_name, 'remove')
+        return super().remove_from_search(endpoint_name, _id)
@@ -0,0 +1,45 @@
+from unittest import mock
+from eve.utils import ParsedRequest
+from planning.tests import TestCase
+from superdesk import get_resource_service
+from planning.query_stats import get_query_shape, record_query, report_query_stats, start_query_recording, \
+    stop_query_recording
+
+
+class QueryStatsTestCase(TestCase):
+    def test_query_shape(self):
+        req = ParsedRequest()
+        req.where = '{"recurrence_id": "r1"}'
+        self.assertEqual(get_query_shape(('events', req, {'_id': {'$in': ['e1']}}), {}),
+                         ('recurrence_id', '_id.$in'))
+        self.assertEqual(get_query_shape(('events',), {'req': None, '_id': 'e1'}), ('_id',))
+
+    def test_queries_are_not_counted_by_default(self):
+        with self.app.app_context():
+            recorder = start_query_recording(self.app)
+            record_query('mongo', 'events', 'find_one', kwargs={'_id': 'e1'})
+            self.assertEqual(recorder.total, 0)
+
+    def test_queries_are_counted(self):
+        self.app.config['PLANNING_QUERY_STATS'] = True
+        with self.app.app_context():
+            recorder = start_query_recording(self.app)
+            self.app.data.insert('events', [{'_id': 'e1', 'name': 'foo', 'dates': {}}])
+            get_resource_service('events').find_one(req=None, name='foo')
+            self.assertGreater(recorder.total, 0)
+            self.assertIn(('mongo', 'events', 'insert'), recorder.queries)
+            self.assertIn(('mongo', 'events', 'find_one'), recorder.queries)
+            self.assertIs(stop_query_recording(self.app), recorder)
+
+    @mock.patch('planning.query_stats.logger')
+    def test_repeated_queries_are_reported(self, logger):
+        self.app.config['PLANNING_QUERY_STATS'] = True
+        with self.app.app_context():
+            for index in range(5):
+                record_query('mongo', 'planning', 'find', ({'event_item': 'e{}'.format(index)},))
+            record_query('mongo', 'events', 'find', ({'_id': 'e1'},))
+
+            report_query_stats('test')
+            self.assertEqual(logger.warning.call_count, 1)
+            self.assertIn('Possible N+1 query in test: mongo planning.find by event_item made 5 times',
+                          logger.warning.call_args[0][0])
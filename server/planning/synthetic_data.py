@@ -0,0 +1,316 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013, 2014, 2015, 2016, 2017 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Deterministic synthetic planning data, for benchmarks and capacity tests
+
+The same seed (and sizes) always generate the same agendas, locations, events, planning
+items, coverages, assignments and history entries. Ids are prefixed with
+``urn:newsml:synthetic:<seed>`` (and ObjectIds are generated from the seed), so that
+generated items can be told apart from real ones.
+
+The documents are written with bulk inserts, bypassing the service hooks, and indexed in
+elastic one batch at a time. The fields the hooks would set are generated here instead:
+``recurrence_id`` of the events of a series, ``_planning_date`` and ``_planning_schedule``
+of the planning items, and the links between coverages and their assignments.
+The assignment workload counters are reconciled once everything is written.
+"""
+
+import random
+import logging
+from array import array
+from datetime import datetime, timedelta
+from collections import Counter
+from bson import ObjectId
+from eve.utils import config
+from superdesk import get_resource_service
+from superdesk.utc import utc
+from .bulk import bulk_insert, get_collection
+from .common import WORKFLOW_STATE, PUBLISHED_STATE, assignment_workflow_state
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = ('text', 'photo', 'video', 'audio')
+SERIES_SIZE = (2, 30)
+SERIES_FREQUENCIES = (('DAILY', 1), ('WEEKLY', 7))
+EVENT_STATES = ((WORKFLOW_STATE.DRAFT, 40), (WORKFLOW_STATE.SCHEDULED, 50),
+                (WORKFLOW_STATE.CANCELLED, 5), (WORKFLOW_STATE.POSTPONED, 5))
+PLANNING_STATES = ((WORKFLOW_STATE.DRAFT, 60), (WORKFLOW_STATE.SCHEDULED, 40))
+
+# events and planning items are spread over 3 years from the start date
+DATE_RANGE_MINUTES = 3 * 365 * 24 * 60
+
+COVERAGE_INTENDED = {'qcode': 'ncostat:int', 'name': 'coverage intended'}
+COVERAGE_NOT_INTENDED = {'qcode': 'ncostat:notint', 'name': 'coverage not intended'}
+
+
+class SyntheticDataGenerator:
+    """Generate and write synthetic planning data
+
+    :param int seed: seed of the random generator
+    :param datetime start: earliest date of the events and planning items
+    :param int batch_size: number of documents per bulk insert
+    :param bool history: also write a ``create`` history entry per event and planning item
+    """
+
+    def __init__(self, seed=1, start=None, batch_size=1000, history=True):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.start = start or datetime(2018, 1, 1, tzinfo=utc)
+        self.batch_size = batch_size
+        self.history = history
+        self.counts = Counter()
+        self._batches = {}
+        self._assignments = 0
+
+        # compact per event details, used to link the planning items
+        self._event_starts = array('d')
+        self._event_series = array('l')
+
+        self.desks = self._get_ids('desks')
+        self.users = self._get_ids('users')
+        self.agendas = []
+        self.locations = []
+
+    def _get_ids(self, resource):
+        ids = sorted(doc[config.ID_FIELD] for doc in get_collection(resource).find({}, {config.ID_FIELD: 1}))
+        if not ids:
+            logger.warning('There are no {}, assignments will reference generated ids'.format(resource))
+            ids = [self.object_id() for _index in range(10)]
+        return ids
+
+    def object_id(self):
+        return ObjectId('{:024x}'.format(self.rng.getrandbits(96)))
+
+    def guid(self, kind, index):
+        return 'urn:newsml:synthetic:{}:{}:{}'.format(self.seed, kind, index)
+
+    def random_date(self):
+        return self.start + timedelta(minutes=15 * self.rng.randrange(DATE_RANGE_MINUTES // 15))
+
+    def weighted_choice(self, choices):
+        total = sum(weight for _choice, weight in choices)
+        value = self.rng.uniform(0, total)
+        for choice, weight in choices:
+            value -= weight
+            if value <= 0:
+                return choice
+        return choices[-1][0]
+
+    def add(self, resource, doc):
+        """Queue the document, the queue of the resource is written once it is full"""
+        batch = self._batches.setdefault(resource, [])
+        batch.append(doc)
+        if len(batch) >= self.batch_size:
+            self.flush(resource)
+
+    def flush(self, resource=None):
+        """Write the queued documents of the resource (or all of them)"""
+        resources = [resource] if resource else list(self._batches.keys())
+        for name in resources:
+            batch = self._batches.pop(name, None)
+            if batch:
+                bulk_insert(name, batch)
+                self.counts[name] += len(batch)
+
+    def _audit(self, doc, created, user=None):
+        user = user or self.rng.choice(self.users)
+        doc.update({
+            'original_creator': user,
+            'firstcreated': created,
+            'versioncreated': created,
+            config.DATE_CREATED: created,
+            config.LAST_UPDATED: created
+        })
+        return user
+
+    def _add_history(self, resource, field, item, user, update):
+        if self.history:
+            self.add(resource, {
+                field: item[config.ID_FIELD],
+                'user_id': user,
+                'operation': 'create',
+                'update': update,
+                config.DATE_CREATED: item[config.DATE_CREATED],
+                config.LAST_UPDATED: item[config.DATE_CREATED]
+            })
+
+    def generate(self, events=10000, recurring=0.2, planning=3000, max_coverages=60, agendas=20, locations=200):
+        """Generate and write all the data
+
+        :return Counter: number of documents written per resource
+        """
+        self.generate_agendas(agendas)
+        self.generate_locations(locations)
+        self.generate_events(events, recurring)
+        self.generate_planning(planning, max_coverages)
+        self.flush()
+        get_resource_service('assignments_workload').reconcile()
+        return self.counts
+
+    def generate_agendas(self, count):
+        for index in range(count):
+            agenda = {config.ID_FIELD: self.object_id(), 'name': 'Synthetic agenda {}-{}'.format(self.seed, index),
+                      'is_enabled': self.rng.random() > 0.1}
+            self._audit(agenda, self.start)
+            self.agendas.append(agenda[config.ID_FIELD])
+            self.add('agenda', agenda)
+
+    def generate_locations(self, count):
+        for index in range(count):
+            name = 'Synthetic location {}-{}'.format(self.seed, index)
+            location = {
+                config.ID_FIELD: self.object_id(),
+                'guid': self.guid('location', index),
+                'name': name,
+                'unique_name': name
+            }
+            self._audit(location, self.start)
+            self.locations.append({'qcode': location['guid'], 'name': name})
+            self.add('locations', location)
+
+    def generate_events(self, count, recurring=0.2):
+        """Generate ``count`` events, ``recurring`` of them (0.2 = 20%) in recurring series"""
+        index = 0
+        series = 0
+        in_series = 0
+        while index < count:
+            if in_series < recurring * (index + 1):
+                size = min(self.rng.randint(*SERIES_SIZE), count - index)
+                self._generate_series(index, series, size)
+                series += 1
+                in_series += size
+                index += size
+            else:
+                self._generate_event(index, self.random_date())
+                index += 1
+
+    def _generate_series(self, index, series, size):
+        start = self.random_date()
+        frequency, days = self.rng.choice(SERIES_FREQUENCIES)
+        rule = {'frequency': frequency, 'interval': 1, 'count': size, 'endRepeatMode': 'count'}
+        for occurrence in range(size):
+            self._generate_event(index + occurrence, start + timedelta(days=days * occurrence), series, rule)
+
+    def _generate_event(self, index, start, series=None, rule=None):
+        guid = self.guid('event', index)
+        state = self.weighted_choice(EVENT_STATES)
+        event = {
+            config.ID_FIELD: guid,
+            'guid': guid,
+            'name': 'Synthetic event {}'.format(index),
+            'slugline': 'synthetic-event-{}'.format(index),
+            'definition_short': 'Synthetic event {} of seed {}'.format(index, self.seed),
+            'dates': {
+                'start': start,
+                'end': start + timedelta(hours=self.rng.choice((1, 2, 3, 8))),
+                'tz': 'UTC'
+            },
+            'state': state,
+            'pubstatus': PUBLISHED_STATE.USABLE if state != WORKFLOW_STATE.DRAFT else None
+        }
+        if self.locations and self.rng.random() < 0.5:
+            event['location'] = [self.rng.choice(self.locations)]
+        if series is not None:
+            event['recurrence_id'] = self.guid('series', series)
+            event['dates']['recurring_rule'] = dict(rule)
+
+        user = self._audit(event, start - timedelta(days=self.rng.randint(1, 30)))
+        self._event_starts.append(start.timestamp())
+        self._event_series.append(-1 if series is None else series)
+        self.add('events', event)
+        self._add_history('events_history', 'event_id', event, user, {'name': event['name'], 'state': state})
+
+    def generate_planning(self, count, max_coverages=60):
+        """Generate ``count`` planning items, half of them linked to an event
+
+        Most planning items have a few coverages, the number of coverages follows an
+        exponential distribution (4 on average) capped at ``max_coverages``.
+        """
+        planning_service = get_resource_service('planning')
+        coverage_index = 0
+        for index in range(count):
+            guid = self.guid('planning', index)
+            plan = {
+                config.ID_FIELD: guid,
+                'guid': guid,
+                'slugline': 'synthetic-planning-{}'.format(index),
+                'headline': 'Synthetic planning {}'.format(index),
+                'description_text': 'Synthetic planning {} of seed {}'.format(index, self.seed),
+                'item_class': 'plinat:newscoverage',
+                'state': self.weighted_choice(PLANNING_STATES),
+                'agendas': self.rng.sample(self.agendas, min(len(self.agendas), self.rng.randint(0, 3)))
+            }
+
+            if self._event_starts and self.rng.random() < 0.5:
+                event_index = self.rng.randrange(len(self._event_starts))
+                plan['event_item'] = self.guid('event', event_index)
+                plan['_planning_date'] = datetime.fromtimestamp(self._event_starts[event_index], utc)
+                if self._event_series[event_index] >= 0:
+                    plan['recurrence_id'] = self.guid('series', self._event_series[event_index])
+            else:
+                plan['_planning_date'] = self.random_date()
+
+            user = self._audit(plan, plan['_planning_date'] - timedelta(days=self.rng.randint(1, 30)))
+
+            plan['coverages'] = []
+            for _coverage in range(min(max_coverages, int(self.rng.expovariate(0.25)))):
+                plan['coverages'].append(self._generate_coverage(plan, coverage_index))
+                coverage_index += 1
+
+            planning_service.set_planning_schedule(plan)
+            self.add('planning', plan)
+            self._add_history('planning_history', 'planning_id', plan, user, {'slugline': plan['slugline']})
+
+    def _generate_coverage(self, plan, index):
+        coverage = {
+            'coverage_id': self.guid('coverage', index),
+            'planning': {
+                'g2_content_type': self.rng.choice(CONTENT_TYPES),
+                'slugline': '{}-{}'.format(plan['slugline'], index),
+                'ednote': 'Synthetic coverage {}'.format(index),
+                'scheduled': plan['_planning_date'] + timedelta(hours=self.rng.randint(0, 48))
+            },
+            'news_coverage_status': COVERAGE_INTENDED,
+            'original_creator': plan['original_creator'],
+            'firstcreated': plan['firstcreated']
+        }
+
+        if self.rng.random() < 0.6:
+            # cycle through the workflow states, so every state is generated
+            state = assignment_workflow_state[self._assignments % len(assignment_workflow_state)]
+            self._assignments += 1
+            assignment = self._generate_assignment(plan, coverage, state)
+            coverage['assigned_to'] = {'assignment_id': str(assignment[config.ID_FIELD]), 'state': state}
+            if state == 'cancelled':
+                coverage['news_coverage_status'] = COVERAGE_NOT_INTENDED
+
+        return coverage
+
+    def _generate_assignment(self, plan, coverage, state):
+        assigned = plan['firstcreated'] + timedelta(hours=self.rng.randint(1, 72))
+        assignment = {
+            config.ID_FIELD: self.object_id(),
+            'assigned_to': {
+                'desk': str(self.rng.choice(self.desks)),
+                'user': str(self.rng.choice(self.users)) if self.rng.random() < 0.7 else None,
+                'state': state,
+                'assignor_desk': str(self.rng.choice(self.desks)),
+                'assignor_user': str(plan['original_creator']),
+                'assigned_date_desk': assigned,
+                'assigned_date_user': assigned
+            },
+            'planning_item': plan[config.ID_FIELD],
+            'coverage_item': coverage['coverage_id'],
+            'planning': dict(coverage['planning']),
+            'priority': self.rng.randint(1, 5)
+        }
+        self._audit(assignment, assigned, plan['original_creator'])
+        self.add('assignments', assignment)
+        return assignment
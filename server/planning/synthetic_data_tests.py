@@ -0,0 +1,47 @@
+from copy import deepcopy
+from unittest import mock
+from planning.tests import TestCase
+from planning.common import assignment_workflow_state
+from planning.synthetic_data import SyntheticDataGenerator
+
+
+class SyntheticDataTestCase(TestCase):
+    def generate(self, seed):
+        written = {}
+
+        def bulk_insert(resource, docs):
+            written.setdefault(resource, []).extend(deepcopy(docs))
+
+        with mock.patch('planning.synthetic_data.bulk_insert', side_effect=bulk_insert):
+            counts = SyntheticDataGenerator(seed=seed, batch_size=50).generate(
+                events=200, planning=100, agendas=5, locations=10
+            )
+        return counts, written
+
+    def test_data_is_deterministic(self):
+        with self.app.app_context():
+            counts, written = self.generate(3)
+            self.assertEqual(self.generate(3), (counts, written))
+            self.assertNotEqual(self.generate(4)[1]['events'], written['events'])
+
+    def test_generated_data(self):
+        with self.app.app_context():
+            counts, written = self.generate(1)
+            self.assertEqual(counts['events'], 200)
+            self.assertEqual(counts['planning'], 100)
+            self.assertEqual(counts['events_history'], 200)
+
+            recurring = [event for event in written['events'] if event.get('recurrence_id')]
+            self.assertAlmostEqual(len(recurring) / 200.0, 0.2, delta=0.15)
+
+            assignments = {str(assignment['_id']): assignment for assignment in written['assignments']}
+            self.assertEqual(set(assignment['assigned_to']['state'] for assignment in assignments.values()),
+                             set(assignment_workflow_state))
+
+            for plan in written['planning']:
+                self.assertTrue(plan['_planning_schedule'])
+                for coverage in plan['coverages']:
+                    assignment_id = (coverage.get('assigned_to') or {}).get('assignment_id')
+                    if assignment_id:
+                        self.assertEqual(assignments[assignment_id]['coverage_item'], coverage['coverage_id'])
+                        self.assertEqual(assignments[assignment_id]['planning_item'], plan['_id'])
@@ -164,6 +164,27 @@ if env('REDIS_PORT'):
     REDIS_URL = env('REDIS_PORT').replace('tcp:', 'redis:')
 BROKER_URL = env('CELERY_BROKER_URL', REDIS_URL)
 
+# Interval of the assignment workload counters reconciliation (scheduled by planning.init_app), 0 to disable it
+PLANNING_WORKLOAD_RECONCILE_MINUTES = int(env('PLANNING_WORKLOAD_RECONCILE_MINUTES', 15))
+
+# Events and planning history older than this is moved to the history archive every day (scheduled by
+# planning.init_app), 0 keeps it forever
+PLANNING_HISTORY_RETENTION_DAYS = int(env('PLANNING_HISTORY_RETENTION_DAYS', 0))
+
+# Remove the expired events and planning items every hour (scheduled by planning.init_app), keeping a tombstone
+# of each if enabled
+PLANNING_PURGE_EXPIRED = env('PLANNING_PURGE_EXPIRED', 'false').lower() == 'true'
+PLANNING_PURGE_EXPIRED_TOMBSTONES = env('PLANNING_PURGE_EXPIRED_TOMBSTONES', 'false').lower() == 'true'
+PLANNING_PURGE_EXPIRED_BATCH_SIZE = int(env('PLANNING_PURGE_EXPIRED_BATCH_SIZE', 500))
+
+# Events and planning items older than this number of days are moved to the archive tier every day (scheduled by
+# planning.init_app), 0 to disable it
+PLANNING_ARCHIVE_DAYS = int(env('PLANNING_ARCHIVE_DAYS', 0))
+PLANNING_ARCHIVE_BATCH_SIZE = int(env('PLANNING_ARCHIVE_BATCH_SIZE', 500))
+# Elastic index of the archive tier (added to ELASTICSEARCH_INDEXES by planning.init_app), defaults to
+# ELASTICSEARCH_INDEX with a _planning_archive suffix
+PLANNING_ARCHIVE_ELASTICSEARCH_INDEX = env('PLANNING_ARCHIVE_ELASTICSEARCH_INDEX')
+
 # Determines if the ODBC publishing mechanism will be used, If enabled then pyodbc must be installed along with it's
 # dependencies
 ODBC_PUBLISH = env('ODBC_PUBLISH', None)